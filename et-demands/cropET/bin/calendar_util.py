@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+
+class DailyCalendar(object):
+    """Calendar arrays of a daily datetime index
+
+    The year, month, day and day of year are computed once for all days
+    with vectorized pandas operations, instead of converting each date.
+
+    Attributes:
+        index (pandas DatetimeIndex): daily dates
+        year (numpy array): year of each day
+        month (numpy array): month of each day
+        day (numpy array): day of the month of each day
+        doy (numpy array): day of year of each day
+    """
+    __slots__ = ('index', 'year', 'month', 'day', 'doy')
+
+    def __init__(self, index):
+        """Compute the calendar arrays of a datetime index
+
+        Args:
+            index (): pandas DatetimeIndex (or values that can be converted)
+        """
+        self.index = pd.DatetimeIndex(index)
+        self.year = np.asarray(self.index.year, dtype=np.int64)
+        self.month = np.asarray(self.index.month, dtype=np.int64)
+        self.day = np.asarray(self.index.day, dtype=np.int64)
+        self.doy = np.asarray(self.index.dayofyear, dtype=np.int64)
+
+
+def date_from_ymd(year, month, day):
+    """Build the dates from year, month and day arrays
+
+    Args:
+        year (): array of years
+        month (): array of months
+        day (): array of days of the month
+
+    Returns:
+        numpy datetime64 array
+    """
+    return pd.to_datetime(pd.DataFrame({
+        'year': np.asarray(year), 'month': np.asarray(month),
+        'day': np.asarray(day)})).values
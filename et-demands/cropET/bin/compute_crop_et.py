@@ -1,10 +1,35 @@
 import logging
 import math
-import sys
+
+import numpy as np
 
 import grow_root
 import runoff
-import util
+
+
+def snow_kc_mult(snow_depth, doy):
+    """Kc multiplier for snow cover
+
+    Only depends on the cell snow depth and the day of year,
+    so it is computed once per cell for all days
+
+    Args:
+        snow_depth (numpy array): daily snow depth
+        doy (numpy array): daily day of year
+
+    Returns:
+        numpy array
+    """
+    # Radiation term for reducing Kc to actCount for snow albedo
+    k_rad = (
+        0.000000022 * doy ** 3 - 0.0000242 * doy ** 2 +
+        0.006 * doy + 0.011)
+    albedo_snow = 0.8
+    albedo_soil = 0.25
+    kc_mult = 1 - k_rad + (1 - albedo_snow) / (1 - albedo_soil) * k_rad
+    # Was 0.9, reduced another 30% to account for latent heat of fusion of melting snow
+    kc_mult = kc_mult * 0.7
+    return np.where(snow_depth > 0.01, kc_mult, 1.)
 
 
 def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
@@ -26,6 +51,28 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
     if crop.class_number in [55, 56, 57]:
         return
 
+    compute_crop_kc(data, et_cell, crop, foo, foo_day, debug_flag)
+    compute_crop_water_balance(data, et_cell, crop, foo, foo_day, debug_flag)
+
+
+def compute_crop_kc(data, et_cell, crop, foo, foo_day, debug_flag=False):
+    """Compute kc_max and fraction of ground cover and finalize kc_bas
+
+    This is the part of the crop et computations that only depends on
+    the crop phenology, not on the soil water balance.
+    The results are stored in foo.kc_max, foo.fc and foo.kc_bas.
+
+    Args:
+        data ():
+        et_cell ():
+        crop ():
+        foo ():
+        foo_day ():
+        debug_flag (bool): If True, write debug level comments to debug.txt
+
+    Returns:
+        None
+    """
     # Maximum Kc when soil is wet.  For grass reference, kc_max = 1.2 plus climatic adj.
     # For alfalfa reference, kc_max = 1.0, with no climatic adj.
     # kc_max is set to less than 1.0 during winter to account for effects of cold soil.
@@ -37,104 +84,47 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
 
     # Limit height for numerical stability
     foo.height = max(0.05, foo.height)
-    if data.refet['type'] == 'eto':
+
+    # The refet type and crop branches are resolved once in crop_load()
+    # See crop_context.CropCellContext for the constants
+    context = foo.context
+    if context.eto_flag:
         kc_max = ((0.04 * (foo_day.u2 - 2) - 0.004 * (foo_day.rh_min - 45)) *
                   (foo.height / 3) ** 0.3)
-        if crop.kc_max > 0.3:
-            kc_max += crop.kc_max
-        else:
-            kc_max += 1.2
-    elif data.refet['type'] == 'etr':    # edited by Allen, 6/8/09 to use kc_max from file if given
-        if crop.kc_max > 0.3:
-            kc_max = crop.kc_max
-        else:
-            kc_max = 1.0
+        kc_max += context.kc_max_crop
     else:
-        sys.exit()
+        # edited by Allen, 6/8/09 to use kc_max from file if given
+        kc_max = context.kc_max_crop
 
     # ETr basis:
     # kc_max = 1#  #'for ETr ******************* #'commented out 12/2007
 
     # Assign fraction of ground covered for each of three non-growing season cover types
-    if crop.class_number not in [44, 45, 46]:
-        pass
-    elif crop.class_number == 44:
-        # Bare soil (changed Jan. 2007 for add. crop cats)
-        foo.fc = 0.0
-    elif crop.class_number == 45:
-        # Mulched soil, including grain stubble
-        foo.fc = 0.4
-    elif crop.class_number == 46:
-        # Dormant turf/sod (winter time) (was 0.6)
-        foo.fc = 0.7
-
-    # Kc_max and foo.fc for wintertime land use (Nov-Mar)
+    # Bare soil 44 (changed Jan. 2007 for add. crop cats), mulched soil 45,
+    #   including grain stubble, and dormant turf/sod 46 (winter time) (was 0.6)
+    if context.cover_flag:
+        foo.fc = context.fc_cover
+
+    # Kc_max for wintertime land use (Nov-Mar)
     # wscc = 1 bare, 2 mulch, 3 sod
     wscc = crop.winter_surface_cover_class
 
     # Assume that winter time is constrained to Nov-March in northern hemisphere
     # Also set up kc_max for non-growing seasons for other crops
     # Kc_max for wintertime land use (Nov-Mar)for non-growing season crops
-    if util.is_winter(et_cell, foo_day):
-        if crop.class_number not in [44, 45, 46]:
-            # Note that these are ETr based.  (Allen 12/2007)
-            # Multiply by 1.2 (plus adj?) for ETo base
-            if wscc == 1:
-                # bare soil
-                # foo.fc is calculated below
-                if data.refet['type'] == 'eto':
-                    kc_max = 1.1
-                elif data.refet['type'] == 'etr':
-                    kc_max = 0.9
-            elif wscc == 2:
-                # Mulched soil, including grain stubble
-                if data.refet['type'] == 'eto':
-                    kc_max = 1.0
-                elif data.refet['type'] == 'etr':
-                    kc_max = 0.85
-            elif wscc == 3:
-                # Dormant turf/sod (winter time)
-                if data.refet['type'] == 'eto':
-                    kc_max = 0.95
-                elif data.refet['type'] == 'etr':
-                    kc_max = 0.8
-        elif crop.class_number == 44:
-            # Bare soil
-            # Less soil heat in winter.
-            if data.refet['type'] == 'eto':
-                # For ETo  (Allen 12/2007)
-                kc_max = 1.1
-            elif data.refet['type'] == 'etr':
-                # For ETr (Allen 3/2008)
-                kc_max = 0.9
-            foo.fc = 0.0
-        elif crop.class_number == 45:
-            # Mulched soil, including grain stubble
-            if data.refet['type'] == 'eto':
-                # For ETo (0.85 * 1.2)  (Allen 12/2007)
-                kc_max = 1.0
-            elif data.refet['type'] == 'etr':
-                # For ETr (Allen 3/2008)
-                kc_max = 0.85
-            foo.fc = 0.4
-        elif crop.class_number == 46:
-            # Dormant turf/sod (winter time)
-            if data.refet['type'] == 'eto':
-                # For ETo (0.8 * 1.2)  (Allen 12/2007)
-                kc_max = 0.95
-            elif data.refet['type'] == 'etr':
-                # For ETr (Allen 3/2008)
-                kc_max = 0.8
-            # Was 0.6
-            foo.fc = 0.7
+    # Note that these are ETr based.  (Allen 12/2007)
+    # Multiply by 1.2 (plus adj?) for ETo base
+    # Bare soil 44 gets less soil heat in winter.
+    if foo_day.winter and context.kc_max_winter is not None:
+        kc_max = context.kc_max_winter
 
     # added 2/21/08 to make sure that a winter cover class is used if during non-growing season
     # override Kc_bas assigned from kcb_daily() if non-growing season and not water
-    if (not foo.in_season and
-        (crop.class_number < 55 or crop.class_number > 57)):
-        logging.debug(
-            'compute_crop_et(): kc_bas %.6f  kc_bas_wscc %.6f  wscc %.6f' % (
-                foo.kc_bas, foo.kc_bas_wscc[wscc], wscc))
+    if not foo.in_season and not context.water_flag:
+        if debug_flag:
+            logging.debug(
+                'compute_crop_et(): kc_bas %.6f  kc_bas_wscc %.6f  wscc %.6f' % (
+                    foo.kc_bas, foo.kc_bas_wscc[wscc], wscc))
         foo.kc_bas = foo.kc_bas_wscc[wscc]
 
     # limit kc_max to at least Kc_bas + .05
@@ -151,7 +141,7 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
 
     # Estimate height of vegetation for estimating fraction of ground cover
     #   for evaporation and fraction of ground covered by vegetation
-    if crop.class_number not in [44, 45, 46]:
+    if not context.cover_flag:
         if kc_max <= foo.kc_min:
             kc_max = foo.kc_min + 0.001
         if foo.in_season:
@@ -166,7 +156,31 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
         logging.debug(
             'compute_crop_et(): kc_max %.6f  kc_min %.6f  kc_bas %.6f  in_season %d' % (
             kc_max, foo.kc_min, foo.kc_bas, foo.in_season))
+    foo.kc_max = kc_max
+
+    # The 30 day ETref is also limited here since the limited value
+    #   is carried forward in compute_crop_gdd()
+    foo.etref_30 = max(0.1, foo.etref_30)  # mm/day  #'edited from ETr to ETref 12/26/2007
+
+
+def compute_crop_water_balance(data, et_cell, crop, foo, foo_day,
+                               debug_flag=False):
+    """Compute Ke, Ks and ETc and update the soil water balance
+
+    kc_max, fc and kc_bas must already be set by compute_crop_kc()
 
+    Args:
+        data ():
+        et_cell ():
+        crop ():
+        foo ():
+        foo_day ():
+        debug_flag (bool): If True, write debug level comments to debug.txt
+
+    Returns:
+        None
+    """
+    kc_max = foo.kc_max
 
     # Estimate infiltrating precipitation
     # Yesterday's infiltration
@@ -301,9 +315,10 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
     # Update depletion of few beyond that wetted by irrigation
     foo.depl_zep = foo.depl_zep - foo.ppt_inf + depl_zep_prev
     foo.depl_zep = min(max(foo.depl_zep, 0), foo.tew)
-    logging.debug(
-        ('compute_crop_et(): depl_ze %.6f  depl_zep %.6f') %
-        (foo.depl_ze, foo.depl_zep))
+    if debug_flag:
+        logging.debug(
+            ('compute_crop_et(): depl_ze %.6f  depl_zep %.6f') %
+            (foo.depl_ze, foo.depl_zep))
 
     # reducer coefficient for evaporation based on moisture left
     # This is set up for three stage evaporation
@@ -332,11 +347,8 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
     tew2use = foo.tew2
     tew3use = foo.tew3  # for stage 3 drying (cracking soils (not in Idaho))
     rew2use = foo.rew
-    foo.etref_30 = max(0.1, foo.etref_30)  # mm/day  #'edited from ETr to ETref 12/26/2007
-    if data.refet['type'] == 'eto':
-        etr_threshold = 5  # for ETo basis #'added March 26, 2008 RGA
-    elif data.refet['type'] == 'etr':
-        etr_threshold = 4  # for ETr basis
+    # 5 for ETo basis #'added March 26, 2008 RGA, 4 for ETr basis
+    etr_threshold = foo.context.etr_threshold
 
     # Use 30 day ETr, if less than 4 or 5 mm/d to reduce TEW
     if foo.etref_30 < etr_threshold:
@@ -430,17 +442,7 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
             ks = 0.0
 
     # Calculate Kc during snow cover
-    kc_mult = 1
-    if foo_day.snow_depth > 0.01:
-        # Radiation term for reducing Kc to actCount for snow albedo
-        k_rad = (
-            0.000000022 * foo_day.doy ** 3 - 0.0000242 * foo_day.doy ** 2 +
-            0.006 * foo_day.doy + 0.011)
-        albedo_snow = 0.8
-        albedo_soil = 0.25
-        kc_mult = 1 - k_rad + (1 - albedo_snow) / (1 - albedo_soil) * k_rad
-        # Was 0.9, reduced another 30% to account for latent heat of fusion of melting snow
-        kc_mult = kc_mult * 0.7
+    kc_mult = foo_day.kc_mult
 
     ke *= kc_mult
     ke_irr *= kc_mult
@@ -537,13 +539,15 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
     # (ptt_inf, irr and dperc_ze were subtracted or added earlier)
 
     foo.depl_ze = depl_ze_prev + e_irr / few + te_irr
-    logging.debug('compute_crop_et(): depl_ze %.6f' % (foo.depl_ze))
+    if debug_flag:
+        logging.debug('compute_crop_et(): depl_ze %.6f' % (foo.depl_ze))
 
     # This next section modified 2/21/08 to keep a days potential E from exceeding
     # Evaporable water available (for coarse soils).  Allen and Huntington
     if foo.depl_ze < 0:
         foo.depl_ze = 0.0
-        logging.debug('compute_crop_et(): depl_ze %.6f' % (foo.depl_ze))
+        if debug_flag:
+            logging.debug('compute_crop_et(): depl_ze %.6f' % (foo.depl_ze))
     if foo.depl_ze > foo.tew:
         # use tew here rather than tew2use to allow depl_ze to remain at tew
         #'''  probably not.  if Delast <= 0:    Delast = 0
@@ -555,7 +559,8 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
         e_irr *= e_factor
         te_irr *= e_factor
         foo.depl_ze = depl_ze_prev + e_irr / few + te_irr  # recalculate
-        logging.debug('compute_crop_et(): depl_ze %.6f' % (foo.depl_ze))
+        if debug_flag:
+            logging.debug('compute_crop_et(): depl_ze %.6f' % (foo.depl_ze))
         if foo.depl_ze > foo.tew + 0.2:
             logging.warning(
                 ('Problem in keeping depl_ze water balance within TEW.' +
@@ -604,6 +609,9 @@ def compute_crop_et(data, et_cell, crop, foo, foo_day, debug_flag=False):
 
     foo.kc_act = kc_mult * ks * foo.kc_bas + ke
     foo.kc_pot = foo.kc_bas + ke
+    # Keep the final coefficients for the crop trace (see crop_trace.py)
+    foo.ke = ke
+    foo.ks = ks
 
     # # CO2 correction
     # if data.co2_flag:
@@ -1,6 +1,34 @@
 import logging
 
 
+def etref_30_series(etref_list):
+    """Compute the 30 day mean ETref for each day of the crop day loop
+
+    This is the running mean that was updated each day in compute_crop_gdd(),
+    including the lower limit of 0.1 mm/day that compute_crop_kc() applies
+    to the value that is carried forward to the next day.
+    It only depends on the cell ETref, so it is computed once per cell.
+
+    Args:
+        etref_list (list): daily ETref values
+
+    Returns:
+        list of the daily 30 day mean ETref before the lower limit is applied
+    """
+    etref_30_list = []
+    etref_30 = 0.
+    for step_i, etref in enumerate(etref_list):
+        sdays = step_i + 1
+        if sdays > 30:
+            etref_lost = etref_list[step_i - 30]
+            etref_30 = etref_30 + (etref - etref_lost) / 30.
+        else:
+            etref_30 = (etref_30 * (sdays - 1) + etref) / sdays
+        etref_30_list.append(etref_30)
+        etref_30 = max(0.1, etref_30)  # mm/day  #'edited from ETr to ETref 12/26/2007
+    return etref_30_list
+
+
 def compute_crop_gdd(crop, foo, foo_day, debug_flag=False):
     """Compute crop growing degree days
 
@@ -15,20 +43,8 @@ def compute_crop_gdd(crop, foo, foo_day, debug_flag=False):
     """
     ##logging.debug('compute_crop_gdd()')
 
-    # Calculate 30 day ETr each year
-    # Shift entries in 30 day array to add today's ETref
-    etref_lost = 0.0
-    if foo_day.sdays > 30:
-        #ETreflost = ETref_array(1)
-        #For idx = 1 To 29  # idx = 1 is 30 days ago
-        etref_lost = foo_day.etref_array[0]
-        for idx in range(29):    # idx = 1 is 30 days ago
-            foo_day.etref_array[idx] = foo_day.etref_array[idx + 1]
-        foo_day.etref_array[29] = foo_day.etref
-        foo.etref_30 = foo.etref_30 + (foo_day.etref - etref_lost) / 30.
-    else:
-        foo_day.etref_array[foo_day.sdays-1] = foo_day.etref
-        foo.etref_30 = (foo.etref_30 * (foo_day.sdays - 1) + foo_day.etref) / foo_day.sdays
+    # 30 day ETref is precomputed for the cell (see etref_30_series())
+    foo.etref_30 = foo_day.etref_30
 
     # Reset CGDD if new year
     # For all crops, but winter grain, reset CGDD counter on cropGDDTriggerDoy
@@ -124,8 +140,8 @@ def compute_crop_gdd(crop, foo, foo_day, debug_flag=False):
 
     if debug_flag:
         logging.debug(
-            ('compute_crop_gdd(): ETref30 %.6f  sdays %d  ETref %.6f  ETref_lost %.6f') %
-            (foo.etref_30, foo_day.sdays, foo_day.etref, etref_lost))
+            ('compute_crop_gdd(): ETref30 %.6f  sdays %d  ETref %.6f') %
+            (foo.etref_30, foo_day.sdays, foo_day.etref))
         logging.debug(
             ('compute_crop_gdd(): doy_start_cycle %d  crop_curve_number %d  ' +
              'crop_class_num %d') %
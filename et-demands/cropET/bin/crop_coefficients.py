@@ -1,6 +1,10 @@
 #!/usr/bin/env python
 import numpy as np
 
+# Largest table entry used as the start of an interpolation
+# The curves have 35 entries, interpolation reads the entry after it
+max_index = 33
+
 
 class CropCoeff:
     """Crop coefficient container
@@ -13,6 +17,9 @@ class CropCoeff:
         name (str): Crop name
         percents (numpy array): crop coefficient percents
         data (numpy array): Crop coefficient curve values
+        lentry (int): index of the last non-empty curve value
+        values (list): curve values for the daily lookup
+        slopes (list): change in the curve value to the next entry
 
     """
 
@@ -51,6 +58,7 @@ class CropCoeff:
         values = np.where(mask, '0', values)
         self.data = values.astype(float)
         self.lentry = np.where(~mask)[0][-1]
+        self.set_table()
 
         # # CGM 9/1/2015 - These aren't used anywhere else in the code
         # t2n = { '1':'simple', '2':'corn'}
@@ -66,6 +74,29 @@ class CropCoeff:
         # self.comment1 = dc[46]
         # self.comment2 = dc[47]
 
+    def set_table(self):
+        """Build the lookup table and slopes from the curve values
+
+        The curve is linear between entries, so storing the slope to the
+        next entry turns each daily interpolation into one multiply-add.
+        The last entry has a slope of 0 and holds the curve value.
+        """
+        self.values = self.data.tolist()
+        self.slopes = np.append(np.diff(self.data), 0.).tolist()
+
+    def interpolate(self, x, max_index=max_index):
+        """Interpolate the curve at a fractional table position
+
+        Args:
+            x (float): table position (10 entries per unit of the curve basis)
+            max_index (int): largest entry to interpolate from
+
+        Returns:
+            float of the crop coefficient
+        """
+        i = min(int(x), max_index)
+        return self.values[i] + (x - i) * self.slopes[i]
+
 
 def read_crop_coefs(fn):
     """Load the crop coefficients from the static file
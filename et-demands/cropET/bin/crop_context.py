@@ -0,0 +1,142 @@
+class CropCellContext(object):
+    """Loop invariant constants for one crop in one cell
+
+    Built once by InitializeCropCycle.crop_load() so that the daily kernels
+    (kcb_daily(), compute_crop_kc(), compute_crop_water_balance() and runoff())
+    do not need to re-derive them or look them up through the data, cell
+    and crop coefficient objects every simulated day.
+
+    Attributes:
+        eto_flag (bool): True if the reference ET is ETo, False for ETr
+        etr_threshold (float): 30 day ETref below which TEW is reduced
+        cover_flag (bool): True for the non-growing season cover types (44-46)
+        water_flag (bool): True for the open water "crops" (55-57)
+        kc_max_crop (float): kc_max before the ETo climatic adjustment
+        kc_max_winter (float): wintertime kc_max or None if not adjusted
+        fc_cover (float): fraction of ground cover for cover types 44-46
+        kc_bas_water (float): constant kc_bas for open water 55 and 57
+        kc_curves (dict): crop curve number to the CropCoeff Kcb curve
+        time_for_efc (float): time for EFC, at least 1 day
+        runoff_cn (dict): runoff curve number constants by (CNII, TEW)
+    """
+    __slots__ = (
+        'cover_flag', 'eto_flag', 'etr_threshold', 'fc_cover',
+        'kc_bas_water', 'kc_curves', 'kc_max_crop',
+        'kc_max_winter', 'rew', 'runoff_cn', 'time_for_efc', 'water_flag'
+    )
+
+    def __init__(self, data, et_cell, crop, rew):
+        """Initialize the crop-cell context
+
+        Args:
+            data (): CropETData object
+            et_cell (): ETCell object
+            crop (): CropParameters object
+            rew (float): readily evaporable water (mm)
+        """
+        self.eto_flag = data.refet['type'] == 'eto'
+        if self.eto_flag:
+            self.etr_threshold = 5  # for ETo basis #'added March 26, 2008 RGA
+        else:
+            self.etr_threshold = 4  # for ETr basis
+
+        self.cover_flag = crop.class_number in [44, 45, 46]
+        self.water_flag = crop.class_number in [55, 56, 57]
+
+        # kc_max from the crop file if given (edited by Allen, 6/8/09)
+        # The ETo climatic adjustment is added daily in compute_crop_kc()
+        if crop.kc_max > 0.3:
+            self.kc_max_crop = crop.kc_max
+        elif self.eto_flag:
+            self.kc_max_crop = 1.2
+        else:
+            self.kc_max_crop = 1.0
+
+        # Wintertime kc_max (Nov-Mar) and fraction of ground cover
+        # Winter kc_max values are ETr based (Allen 3/2008)
+        #   and multiplied by 1.2 for the ETo basis (Allen 12/2007)
+        # wscc = 1 bare, 2 mulch, 3 sod
+        if crop.class_number == 44:
+            wscc = 1
+            self.fc_cover = 0.0
+        elif crop.class_number == 45:
+            wscc = 2
+            self.fc_cover = 0.4
+        elif crop.class_number == 46:
+            # Was 0.6
+            wscc = 3
+            self.fc_cover = 0.7
+        else:
+            wscc = crop.winter_surface_cover_class
+            self.fc_cover = None
+        if wscc == 1:
+            self.kc_max_winter = 1.1 if self.eto_flag else 0.9
+        elif wscc == 2:
+            self.kc_max_winter = 1.0 if self.eto_flag else 0.85
+        elif wscc == 3:
+            self.kc_max_winter = 0.95 if self.eto_flag else 0.8
+        else:
+            self.kc_max_winter = None
+
+        # Open water shallow systems and small stock ponds have a constant kcb
+        # Note that these values are substantially different from FAO56
+        if crop.class_number == 55:
+            self.kc_bas_water = 1.05 if self.eto_flag else 0.6
+        elif crop.class_number == 57:
+            self.kc_bas_water = 0.85 if self.eto_flag else 0.7
+        else:
+            self.kc_bas_water = None
+
+        # Cutting crops switch to the next two curves for later cycles
+        self.kc_curves = {}
+        if crop.curve_number > 0:
+            for curve_number in range(crop.curve_number, crop.curve_number + 3):
+                if curve_number in et_cell.crop_coeffs.keys():
+                    self.kc_curves[curve_number] = (
+                        et_cell.crop_coeffs[curve_number])
+
+        # Deal with values of zero or null - added Dec. 29, 2011, rga
+        # This was applied to the crop parameters in kcb_daily(),
+        #   but the crop parameters are shared by the cells and are read only
+        self.time_for_efc = max(crop.time_for_efc, 1.)
+
+        self.rew = rew
+        self.runoff_cn = {}
+
+    def runoff_constants(self, cn2, tew):
+        """Curve numbers and AWC limits for the antecedent conditions
+
+        CNII only switches between the crop and the winter cover values,
+        so the derived constants are computed once for each
+
+        Args:
+            cn2 (float): curve number for antecedent condition II
+            tew (float): total evaporable water (mm)
+
+        Returns:
+            tuple of CNI, CNIII, AWCI and AWCIII
+        """
+        try:
+            return self.runoff_cn[(cn2, tew)]
+        except KeyError:
+            pass
+
+        # Check to insure CNII is within limits
+        CNII = min(max(cn2, 10), 100)
+
+        # Compute CN's for other antecedent conditions
+        # Hawkins et al., 1985, ASCE Irr.Drn. 11(4):330-340
+        CNI = CNII / (2.281 - 0.01281 * CNII)
+        CNIII = CNII / (0.427 + 0.00573 * CNII)
+
+        # Presume that AWCIII is quite moist (when only 1/2 of REW is evaporated)
+        AWCIII = 0.5 * self.rew
+
+        # Presume that dry AWCI condition occurs somewhere between REW and TEW
+        # Make sure AWCI>AWCIII
+        AWCI = 0.7 * self.rew + 0.3 * tew
+        if AWCI <= AWCIII:
+            AWCI = AWCIII + 0.01
+
+        self.runoff_cn[(cn2, tew)] = (CNI, CNIII, AWCI, AWCIII)
+        return self.runoff_cn[(cn2, tew)]
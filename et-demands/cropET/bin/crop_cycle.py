@@ -1,54 +1,45 @@
 #!/usr/bin/env python
 import datetime
 import logging
-import multiprocessing as mp
 import os
+import sys
 
 import numpy as np
 import pandas as pd
 
 import calculate_height
+import calendar_util
 import compute_crop_et
 import compute_crop_gdd
+import crop_trace
+import grow_root
 from initialize_crop_cycle import InitializeCropCycle
 import kcb_daily
+import util
+from water_balance import WaterBalance
 
 
-class DayData:
-    def __init__(self):
-        """ """
-        # Used in compute_crop_gdd(), needs to be persistent during day loop
-        self.etref_array = np.zeros(30)
+# Open water crops don't have a soil water balance
+water_crops = [55, 56, 57]
 
+# Daily output fields computed by the soil water balance
+water_balance_fields = [
+    'et_act', 'et_pot', 'et_bas', 'kc_act', 'irrigation', 'runoff',
+    'dperc', 'niwr']
 
-def crop_cycle_mp(data, et_cell, vb_flag=False, mp_procs=1):
-    """Compute crop ET for all crops using multiprocessing
 
-    crop_day_loop_mp() will unpack arguments and call crop_day_loop
+class DayData(object):
+    # Daily values are reassigned every time step of the day loop
+    __slots__ = (
+        'sdays', 'doy_prev', 'doy', 'year', 'month', 'day', 'date',
+        'tmax_orig', 'tdew', 'u2', 'precip', 'rh_min', 'etref', 'tmean',
+        'tmin', 'tmax', 'snow_depth', 't30', 'co2', 'etref_30', 'winter',
+        'kc_mult'
+    )
 
-    Args:
-        data ():
-        et_cell ():
-        vb_flag (bool): If True, mimic calculations in VB version of code
-        mp_procs (int): number of cores to use for multiprocessing
-    """
-    crop_mp_list = []
-    for crop_num, crop in sorted(et_cell.crop_params.items()):
-        if et_cell.crop_flags[crop_num] != 0:
-            # print('Crop %2d %s' % (crop_num, crop))
-            # Force debug_flag false when multiprocessing
-            crop_mp_list.append([
-                data, et_cell, crop, False, vb_flag, mp_procs])
-    results = []
-    if crop_mp_list:
-        pool = mp.Pool(mp_procs)
-        results = pool.imap(crop_day_loop_mp, crop_mp_list, chunksize=1)
-        pool.close()
-        pool.join()
-        del pool, results
-
-
-def crop_cycle(data, et_cell, debug_flag=False, vb_flag=False, mp_procs=1):
+
+def crop_cycle(data, et_cell, debug_flag=False, vb_flag=False, mp_procs=1,
+               crop_num_list=None):
     """Compute crop ET for all crops
 
     Args:
@@ -56,12 +47,16 @@ def crop_cycle(data, et_cell, debug_flag=False, vb_flag=False, mp_procs=1):
         et_cell ():
         debug_flag (bool): If True, write debug level comments to debug.txt
         vb_flag (bool): If True, mimic calculations in VB version of code
+        mp_procs (int): number of cores to use for multiprocessing
+        crop_num_list (list): if set, only compute these crops
 
     Returns:
         None
     """
     for crop_num, crop in sorted(et_cell.crop_params.items()):
-        if et_cell.crop_flags[crop_num] == 0:
+        if crop_num_list is not None and crop_num not in crop_num_list:
+            continue
+        elif et_cell.crop_flags[crop_num] == 0:
             if debug_flag:
                 logging.debug('Crop %2d %s' % (crop_num, crop.name))
                 logging.debug('  NOT USED')
@@ -69,24 +64,45 @@ def crop_cycle(data, et_cell, debug_flag=False, vb_flag=False, mp_procs=1):
         crop_day_loop(data, et_cell, crop, debug_flag, vb_flag, mp_procs)
 
 
-def crop_day_loop_mp(tup):
-    """Pool multiprocessing friendly crop_day_loop function
+def cell_daily_inputs(et_cell):
+    """Pull the daily input time series out of the cell data frames
 
-    mp.Pool needs all inputs are packed into a single tuple
-    Tuple is unpacked and and single processing version of function is called
+    Daily values that only depend on the cell (the winter months,
+    the snow cover Kc multiplier and the 30 day mean ETref) are also
+    computed here once for all of the crops.
 
     Args:
-        data ():
         et_cell ():
-        crop ():
-        debug_flag (bool): If True, write debug level comments to debug.txt
-        vb_flag (bool): If True, mimic calculations in VB version of code
-        mp_procs (int):
 
     Returns:
-
+        dict of lists of native Python types, one value per day
     """
-    return crop_day_loop(*tup)
+    date_index = et_cell.refet_pd.index
+    weather_pd = et_cell.weather_pd.reindex(date_index)
+    climate_pd = et_cell.climate_pd.reindex(date_index)
+    calendar = calendar_util.DailyCalendar(date_index)
+    doy_array = et_cell.refet_pd['doy'].values.astype(int)
+    etref_list = et_cell.refet_pd['etref'].values.astype(float).tolist()
+    return {
+        'date': list(date_index.to_pydatetime()),
+        'doy': doy_array.tolist(),
+        'etref': etref_list,
+        'etref_30': compute_crop_gdd.etref_30_series(etref_list),
+        'winter': util.winter_mask(et_cell, calendar.month).tolist(),
+        'kc_mult': compute_crop_et.snow_kc_mult(
+            climate_pd['snow_depth'].values.astype(float),
+            doy_array).tolist(),
+        'tmax_orig': weather_pd['tmax'].values.astype(float).tolist(),
+        'tdew': weather_pd['tdew'].values.astype(float).tolist(),
+        'wind': weather_pd['wind'].values.astype(float).tolist(),
+        'ppt': weather_pd['ppt'].values.astype(float).tolist(),
+        'rh_min': weather_pd['rh_min'].values.astype(float).tolist(),
+        'tmean': climate_pd['tmean'].values.astype(float).tolist(),
+        'tmin': climate_pd['tmin'].values.astype(float).tolist(),
+        'tmax': climate_pd['tmax'].values.astype(float).tolist(),
+        'snow_depth': climate_pd['snow_depth'].values.astype(float).tolist(),
+        't30': climate_pd['t30'].values.astype(float).tolist(),
+    }
 
 
 def crop_day_loop(data, et_cell, crop, debug_flag=False, vb_flag=False,
@@ -122,14 +138,57 @@ def crop_day_loop(data, et_cell, crop, debug_flag=False, vb_flag=False,
 
     # First time through for crop, load basic crop parameters and
     #   process climate data
-    foo.crop_load(et_cell, crop)
+    foo.crop_load(data, et_cell, crop)
 
     # Get the CO2 correction factors for each crop
     if data.co2_flag:
         foo.setup_co2(et_cell, crop)
 
-    # Initialize crop data frame
-    foo.setup_dataframe(et_cell)
+    # Pull the daily input time series out of the data frames once
+    # Lists of native Python types are indexed by day number in the loop
+    #   below instead of looking up each value by date
+    inputs = cell_daily_inputs(et_cell)
+    date_list = inputs['date']
+    doy_list = inputs['doy']
+    etref_list = inputs['etref']
+    tmax_orig_list = inputs['tmax_orig']
+    tdew_list = inputs['tdew']
+    wind_list = inputs['wind']
+    ppt_list = inputs['ppt']
+    rh_min_list = inputs['rh_min']
+    tmean_list = inputs['tmean']
+    tmin_list = inputs['tmin']
+    tmax_list = inputs['tmax']
+    snow_depth_list = inputs['snow_depth']
+    t30_list = inputs['t30']
+    etref_30_list = inputs['etref_30']
+    winter_list = inputs['winter']
+    kc_mult_list = inputs['kc_mult']
+    if data.co2_flag:
+        co2_list = foo.co2.reindex(
+            et_cell.refet_pd.index).values.astype(float).tolist()
+    del inputs
+
+    # Preallocate the daily output arrays
+    # These are only wrapped into the output data frame after the day loop
+    day_count = len(date_list)
+    et_act_array = np.full(day_count, np.nan)
+    et_pot_array = np.full(day_count, np.nan)
+    et_bas_array = np.full(day_count, np.nan)
+    kc_act_array = np.full(day_count, np.nan)
+    kc_bas_array = np.full(day_count, np.nan)
+    irrigation_array = np.full(day_count, np.nan)
+    runoff_array = np.full(day_count, np.nan)
+    dperc_array = np.full(day_count, np.nan)
+    niwr_array = np.full(day_count, np.nan)
+    season_array = np.zeros(day_count, dtype=np.int64)
+    cutting_array = np.zeros(day_count, dtype=np.int64)
+
+    # Daily trace of the crop cycle variables, only if tracing is enabled
+    if data.trace_ws:
+        trace = crop_trace.CropTrace(date_list)
+    else:
+        trace = None
 
     foo_day = DayData()
     foo_day.sdays = 0
@@ -141,27 +200,25 @@ def crop_day_loop(data, et_cell, crop, debug_flag=False, vb_flag=False,
     if not foo.in_season and foo.crop_setup_flag:
         foo.setup_crop(crop)
 
-    for step_dt, step_doy in foo.crop_pd[['doy']].iterrows():
+    year_start_i = 0
+    for step_i in range(day_count):
+        step_dt = date_list[step_i]
         if debug_flag:
             logging.debug(
                 '\n{}: DOY {}  Date {}'.format(
-                    func_str, int(step_doy), step_dt.date()))
+                    func_str, doy_list[step_i], step_dt.date()))
             # Log RefET values at time step
             logging.debug(
                 ('{}: PPT {:.6f}  Wind {:.6f}  ' +
                  'Tdew {:.6f} ETref {:.6f}').format(
-                    func_str, et_cell.weather_pd.at[step_dt, 'ppt'],
-                    et_cell.weather_pd.at[step_dt, 'wind'],
-                    et_cell.weather_pd.at[step_dt, 'tdew'],
-                    et_cell.refet_pd.at[step_dt, 'etref']))
+                    func_str, ppt_list[step_i], wind_list[step_i],
+                    tdew_list[step_i], etref_list[step_i]))
             # Log climate values at time step
             logging.debug(
                 ('{}: tmax {:.6f}  tmin {:.6f}  ' +
                  'tmean {:.6f}  t30 {:.6f}').format(
-                    func_str, et_cell.climate_pd.at[step_dt, 'tmax'],
-                    et_cell.climate_pd.at[step_dt, 'tmin'],
-                    et_cell.climate_pd.at[step_dt, 'tmean'],
-                    et_cell.climate_pd.at[step_dt, 't30']))
+                    func_str, tmax_list[step_i], tmin_list[step_i],
+                    tmean_list[step_i], t30_list[step_i]))
 
         # At end of season for each crop, set up for non-growing and dormant season
         if not foo.in_season and foo.dormant_setup_flag:
@@ -175,28 +232,29 @@ def crop_day_loop(data, et_cell, crop, debug_flag=False, vb_flag=False,
         # Track variables for each day
         # For now, cast all values to native Python types
         foo_day.sdays += 1
-        foo_day.doy = int(step_doy)
-        foo_day.year = int(step_dt.year)
-        foo_day.month = int(step_dt.month)
-        foo_day.day = int(step_dt.day)
+        foo_day.doy = doy_list[step_i]
+        foo_day.year = step_dt.year
+        foo_day.month = step_dt.month
+        foo_day.day = step_dt.day
         foo_day.date = step_dt
-        foo_day.tmax_orig = float(et_cell.weather_pd.at[step_dt, 'tmax'])
-        foo_day.tdew = float(et_cell.weather_pd.at[step_dt, 'tdew'])
-        foo_day.u2 = float(et_cell.weather_pd.at[step_dt, 'wind'])
-        foo_day.precip = float(et_cell.weather_pd.at[step_dt, 'ppt'])
-        foo_day.rh_min = float(et_cell.weather_pd.at[step_dt, 'rh_min'])
-        foo_day.etref = float(et_cell.refet_pd.at[step_dt, 'etref'])
-        foo_day.tmean = float(et_cell.climate_pd.at[step_dt, 'tmean'])
-        foo_day.tmin = float(et_cell.climate_pd.at[step_dt, 'tmin'])
-        foo_day.tmax = float(et_cell.climate_pd.at[step_dt, 'tmax'])
-        foo_day.snow_depth = float(
-            et_cell.climate_pd.at[step_dt, 'snow_depth'])
-        foo_day.t30 = float(et_cell.climate_pd.at[step_dt, 't30'])
-        # foo_day.precip = float(et_cell.climate_pd.at[step_dt, 'precip'])
+        foo_day.tmax_orig = tmax_orig_list[step_i]
+        foo_day.tdew = tdew_list[step_i]
+        foo_day.u2 = wind_list[step_i]
+        foo_day.precip = ppt_list[step_i]
+        foo_day.rh_min = rh_min_list[step_i]
+        foo_day.etref = etref_list[step_i]
+        foo_day.tmean = tmean_list[step_i]
+        foo_day.tmin = tmin_list[step_i]
+        foo_day.tmax = tmax_list[step_i]
+        foo_day.snow_depth = snow_depth_list[step_i]
+        foo_day.t30 = t30_list[step_i]
+        foo_day.etref_30 = etref_30_list[step_i]
+        foo_day.winter = winter_list[step_i]
+        foo_day.kc_mult = kc_mult_list[step_i]
 
         # Get the CO2 correction factor for each day
         if data.co2_flag:
-            foo_day.co2 = float(foo.co2.at[step_dt])
+            foo_day.co2 = co2_list[step_i]
 
         # Compute crop growing degree days
         compute_crop_gdd.compute_crop_gdd(crop, foo, foo_day, debug_flag)
@@ -213,19 +271,20 @@ def crop_day_loop(data, et_cell, crop, debug_flag=False, vb_flag=False,
         compute_crop_et.compute_crop_et(
             data, et_cell, crop, foo, foo_day, debug_flag)
 
-        # Retrieve values from foo_day and write to output data frame
-        # Eventually let compute_crop_et() write directly to output df
-        foo.crop_pd.at[step_dt, 'et_act'] = foo.etc_act
-        foo.crop_pd.at[step_dt, 'et_pot'] = foo.etc_pot
-        foo.crop_pd.at[step_dt, 'et_bas'] = foo.etc_bas
-        foo.crop_pd.at[step_dt, 'kc_act'] = foo.kc_act
-        foo.crop_pd.at[step_dt, 'kc_bas'] = foo.kc_bas
-        foo.crop_pd.at[step_dt, 'irrigation'] = foo.irr_sim
-        foo.crop_pd.at[step_dt, 'runoff'] = foo.sro
-        foo.crop_pd.at[step_dt, 'dperc'] = foo.dperc
-        foo.crop_pd.at[step_dt, 'niwr'] = foo.niwr + 0
-        foo.crop_pd.at[step_dt, 'season'] = int(foo.in_season)
-        foo.crop_pd.at[step_dt, 'cutting'] = int(foo.cutting)
+        # Retrieve values from foo and write to the daily output arrays
+        et_act_array[step_i] = foo.etc_act
+        et_pot_array[step_i] = foo.etc_pot
+        et_bas_array[step_i] = foo.etc_bas
+        kc_act_array[step_i] = foo.kc_act
+        kc_bas_array[step_i] = foo.kc_bas
+        irrigation_array[step_i] = foo.irr_sim
+        runoff_array[step_i] = foo.sro
+        dperc_array[step_i] = foo.dperc
+        niwr_array[step_i] = foo.niwr + 0
+        season_array[step_i] = int(foo.in_season)
+        cutting_array[step_i] = int(foo.cutting)
+        if trace is not None:
+            trace.record(step_i, foo)
 
         # Write final output file variables to DEBUG file
         if debug_flag:
@@ -241,9 +300,10 @@ def crop_day_loop(data, et_cell, crop, debug_flag=False, vb_flag=False,
                     func_str, foo.irr_sim, foo.sro, foo.dperc, foo.niwr))
 
         # Check that season started
+        if foo_day.month == 1 and foo_day.day == 1:
+            year_start_i = step_i
         if foo_day.month == 12 and foo_day.day == 31:
-            season_count = foo.crop_pd.loc[
-                str(foo_day.year):str(foo_day.year), 'season'].sum()
+            season_count = season_array[year_start_i:step_i + 1].sum()
             if season_count == 0:
                 logging.warning(
                     '  Crop {} - {} growing season never started'.format(
@@ -253,6 +313,17 @@ def crop_day_loop(data, et_cell, crop, debug_flag=False, vb_flag=False,
                     '  Crop {} - {} growing season active for 1 day'.format(
                         crop.class_number, foo_day.year))
 
+    if trace is not None:
+        trace.save(data.trace_ws, et_cell, crop)
+
+    # Wrap the daily output arrays into the output data frame
+    foo.setup_dataframe(et_cell, {
+        'et_act': et_act_array, 'et_pot': et_pot_array,
+        'et_bas': et_bas_array, 'kc_act': kc_act_array,
+        'kc_bas': kc_bas_array, 'irrigation': irrigation_array,
+        'runoff': runoff_array, 'dperc': dperc_array, 'niwr': niwr_array,
+        'season': season_array, 'cutting': cutting_array})
+
     # Write output files
     if (data.daily_output_flag or
             data.monthly_output_flag or
@@ -262,6 +333,446 @@ def crop_day_loop(data, et_cell, crop, debug_flag=False, vb_flag=False,
     return True
 
 
+def crop_cycle_cell(data, et_cell, vb_flag=False, crop_num_list=None):
+    """Compute crop ET for all crops of a cell advanced together
+
+    Args:
+        data ():
+        et_cell ():
+        vb_flag (bool): If True, mimic calculations in VB version of code
+        crop_num_list (list): if set, only compute these crops
+
+    Returns:
+        None
+    """
+    lane_list = [
+        (et_cell, crop)
+        for crop_num, crop in sorted(et_cell.crop_params.items())
+        if (et_cell.crop_flags[crop_num] != 0 and
+            (crop_num_list is None or crop_num in crop_num_list))]
+    if lane_list:
+        lane_day_loop(data, lane_list, vb_flag)
+
+
+def crop_cycle_station(data, et_cell_list, vb_flag=False):
+    """Compute crop ET for all cells that share a weather station
+
+    Each crop is run for all of the cells at once so the soil water balance
+    is computed across the cells, with the soil properties of each cell
+    in the WaterBalance lane arrays.
+
+    Args:
+        data ():
+        et_cell_list (list): ETCell objects with the same refet_id
+        vb_flag (bool): If True, mimic calculations in VB version of code
+
+    Returns:
+        None
+    """
+    crop_num_list = sorted(set(
+        crop_num for et_cell in et_cell_list
+        for crop_num in et_cell.crop_params.keys()
+        if et_cell.crop_flags[crop_num] != 0))
+
+    # Daily inputs are only read once for each cell
+    cell_inputs = dict(
+        (et_cell.cell_id, cell_daily_inputs(et_cell))
+        for et_cell in et_cell_list)
+
+    for crop_num in crop_num_list:
+        lane_list = [
+            (et_cell, et_cell.crop_params[crop_num])
+            for et_cell in et_cell_list
+            if (crop_num in et_cell.crop_params.keys() and
+                et_cell.crop_flags[crop_num] != 0)]
+        lane_day_loop(data, lane_list, vb_flag, cell_inputs)
+
+
+def lane_day_loop(data, lane_list, vb_flag=False, cell_inputs=None):
+    """Compute crop ET for a set of cell/crop "lanes"
+
+    The model is run in two stages.  The phenology of each lane is computed
+    first for all days with crop_phenology_loop().  The soil water balance
+    of all of the lanes is then computed together, one day at a time,
+    in a single WaterBalance object from the daily phenology arrays.
+    Lanes that WaterBalance.supported() rejects are run with crop_day_loop().
+
+    All of the cells must use the same weather station.
+
+    Args:
+        data ():
+        lane_list (list): (et_cell, crop) tuples
+        vb_flag (bool): If True, mimic calculations in VB version of code
+        cell_inputs (dict): daily inputs from cell_daily_inputs()
+            keyed by cell ID, missing cells are added
+
+    Returns:
+        None
+    """
+    # The daily weather values are shared by all of the lanes
+    if len(set(et_cell.refet_id for et_cell, crop in lane_list)) > 1:
+        logging.error(
+            '\nERROR: All cells must have the same RefET ID, exiting')
+        sys.exit()
+    multi_cell_flag = len(set(
+        et_cell.cell_id for et_cell, crop in lane_list)) > 1
+    if cell_inputs is None:
+        cell_inputs = {}
+
+    foo_list = []
+    wb_lane_list = []
+    crop_num_prev = None
+    for et_cell, crop in lane_list:
+        foo = InitializeCropCycle()
+        foo.crop_load(data, et_cell, crop)
+
+        # Crops that the WaterBalance doesn't handle use the scalar model
+        if (crop.class_number not in water_crops and
+                not WaterBalance.supported(foo)):
+            crop_day_loop(data, et_cell, crop, vb_flag=vb_flag)
+            continue
+        if crop.class_number != crop_num_prev:
+            logging.warning('Crop {} - {}'.format(
+                crop.class_number, crop.name))
+            crop_num_prev = crop.class_number
+        if not foo.in_season and foo.crop_setup_flag:
+            foo.setup_crop(crop)
+        foo_list.append(foo)
+        wb_lane_list.append((et_cell, crop))
+
+        # Daily inputs are only read once for each cell
+        if et_cell.cell_id not in cell_inputs.keys():
+            cell_inputs[et_cell.cell_id] = cell_daily_inputs(et_cell)
+    lane_list = wb_lane_list
+
+    # Hand the soil water balance for the lanes off to the WaterBalance
+    #   before the phenology is computed
+    wb_index = [
+        lane_i for lane_i, (et_cell, crop) in enumerate(lane_list)
+        if crop.class_number not in water_crops]
+    wb = WaterBalance(data, [
+        lane_list[lane_i] + (foo_list[lane_i],) for lane_i in wb_index])
+    for lane_i in wb_index:
+        foo_list[lane_i].water_balance_flag = False
+
+    # Stage 1 - Phenology
+    # Lanes with the same phenology inputs share the phenology arrays
+    pheno_cache = {}
+    pheno_list = []
+    for lane_i, (et_cell, crop) in enumerate(lane_list):
+        pheno_key = phenology_key(et_cell, crop)
+        if pheno_key not in pheno_cache.keys():
+            pheno_cache[pheno_key] = crop_phenology_loop(
+                data, et_cell, crop, foo_list[lane_i],
+                cell_inputs[et_cell.cell_id], vb_flag, multi_cell_flag)
+        pheno_list.append(pheno_cache[pheno_key])
+    del pheno_cache
+
+    # Stage 2 - Soil water balance
+    # Open water crop ET is computed entirely in the phenology stage
+    output_list = [
+        dict((field, pheno[field]) for field in water_balance_fields)
+        if lane_i not in wb_index else None
+        for lane_i, pheno in enumerate(pheno_list)]
+    if wb_index:
+        # The inputs of the first cell are used for all of the lanes.
+        # The water balance only reads doy, etref, ppt and kc_mult, which
+        #   come from the station RefET and weather data (kc_mult uses the
+        #   station snow depth, not the aridity adjusted one), so they are
+        #   the same for all cells with the same RefET ID (checked above).
+        wb_output = water_balance_loop(
+            data, wb, [pheno_list[lane_i] for lane_i in wb_index],
+            cell_inputs[lane_list[0][0].cell_id])
+        for wb_i, lane_i in enumerate(wb_index):
+            output_list[lane_i] = dict(
+                (field, wb_output[field][:, wb_i])
+                for field in water_balance_fields)
+
+    for lane_i, (et_cell, crop) in enumerate(lane_list):
+        foo = foo_list[lane_i]
+        output_arrays = output_list[lane_i]
+        output_arrays['kc_bas'] = pheno_list[lane_i]['kc_bas']
+        output_arrays['season'] = pheno_list[lane_i]['in_season'].astype(
+            np.int64)
+        output_arrays['cutting'] = pheno_list[lane_i]['cutting']
+        foo.setup_dataframe(et_cell, output_arrays)
+        if (data.daily_output_flag or
+                data.monthly_output_flag or
+                data.annual_output_flag or
+                data.gs_output_flag):
+            write_crop_output(data, et_cell, crop, foo)
+        foo.crop_pd = None
+
+
+def phenology_key(et_cell, crop):
+    """Key of the cell and crop inputs that the phenology depends on
+
+    The climate arrays only depend on the weather station and the aridity
+    rating, so the phenology of a crop is the same in all cells with the
+    same station and aridity unless the crop parameters, the hemisphere
+    (for the winter months) or the number of cuttings are different.
+
+    Args:
+        et_cell ():
+        crop ():
+
+    Returns:
+        tuple
+    """
+    key = [
+        et_cell.refet_id, et_cell.aridity_rating, et_cell.stn_lat > 0,
+        repr(sorted(vars(crop).items()))]
+    if crop.curve_number in et_cell.crop_coeffs.keys():
+        key.append(et_cell.crop_coeffs[crop.curve_number].data.tobytes())
+    if crop.cutting_crop:
+        key.extend([et_cell.dairy_cuttings, et_cell.beef_cuttings])
+    return tuple(key)
+
+
+def crop_phenology_loop(data, et_cell, crop, foo, inputs, vb_flag=False,
+                        cell_log_flag=False):
+    """Compute the daily crop phenology for a cell/crop
+
+    The phenology (compute_crop_gdd, calculate_height, kcb_daily and
+    compute_crop_kc) only depends on the weather, the cell climate and the
+    crop parameters.  It never reads the soil water balance state, so it
+    can be computed for all days before the soil water balance.
+
+    The phenology does change the soil water balance state in three places,
+    which are returned as daily event flags so they can be applied in the
+    water balance stage:
+        dormant: setup_dormant() was called at the start of the day
+            (dormant_fc is the fraction of cover set for the winter cover)
+        crop_setup: setup_crop() was called from kcb_daily()
+        stress_reset: stress_event was cleared by kcb_daily()
+
+    For the open water crops (55-57), the ET is computed in kcb_daily()
+    and the water balance output fields are also returned.
+
+    Args:
+        data ():
+        et_cell ():
+        crop ():
+        foo (): InitializeCropCycle object after crop_load()
+        inputs (dict): daily inputs from cell_daily_inputs()
+        vb_flag (bool): If True, mimic calculations in VB version of code
+        cell_log_flag (bool): If True, include the cell ID in log messages
+
+    Returns:
+        dict of daily numpy arrays
+    """
+    water_flag = crop.class_number in water_crops
+    cell_str = ''
+    if cell_log_flag:
+        cell_str = ' CellID {}'.format(et_cell.cell_id)
+
+    # Get the CO2 correction factors for each crop
+    if data.co2_flag:
+        foo.setup_co2(et_cell, crop)
+        co2_list = foo.co2.reindex(
+            et_cell.refet_pd.index).values.astype(float).tolist()
+
+    date_list = inputs['date']
+    doy_list = inputs['doy']
+    etref_list = inputs['etref']
+    tmax_orig_list = inputs['tmax_orig']
+    tdew_list = inputs['tdew']
+    wind_list = inputs['wind']
+    ppt_list = inputs['ppt']
+    rh_min_list = inputs['rh_min']
+    tmean_list = inputs['tmean']
+    tmin_list = inputs['tmin']
+    tmax_list = inputs['tmax']
+    snow_depth_list = inputs['snow_depth']
+    t30_list = inputs['t30']
+    etref_30_list = inputs['etref_30']
+    winter_list = inputs['winter']
+    kc_mult_list = inputs['kc_mult']
+    day_count = len(date_list)
+
+    in_season_array = np.zeros(day_count, dtype=bool)
+    dormant_array = np.zeros(day_count, dtype=bool)
+    crop_setup_array = np.zeros(day_count, dtype=bool)
+    stress_reset_array = np.zeros(day_count, dtype=bool)
+    kc_bas_array = np.full(day_count, np.nan)
+    kc_max_array = np.full(day_count, np.nan)
+    fc_array = np.full(day_count, np.nan)
+    dormant_fc_array = np.zeros(day_count)
+    mad_array = np.full(day_count, np.nan)
+    height_array = np.full(day_count, np.nan)
+    etref_30_array = np.full(day_count, np.nan)
+    fractime_array = np.zeros(day_count)
+    doy_start_cycle_array = np.zeros(day_count, dtype=np.int64)
+    cycle_array = np.zeros(day_count, dtype=np.int64)
+    cutting_array = np.zeros(day_count, dtype=np.int64)
+    if water_flag:
+        water_arrays = dict(
+            (field, np.full(day_count, np.nan))
+            for field in water_balance_fields)
+
+    foo_day = DayData()
+    foo_day.sdays = 0
+    foo_day.doy_prev = 0
+
+    year_start_i = 0
+    for step_i in range(day_count):
+        step_dt = date_list[step_i]
+
+        # At end of season for each crop, set up for non-growing and dormant season
+        if not foo.in_season and foo.dormant_setup_flag:
+            foo.setup_dormant(et_cell, crop)
+            dormant_array[step_i] = True
+            dormant_fc_array[step_i] = foo.fc
+
+        foo_day.sdays += 1
+        foo_day.doy = doy_list[step_i]
+        foo_day.year = step_dt.year
+        foo_day.month = step_dt.month
+        foo_day.day = step_dt.day
+        foo_day.date = step_dt
+        foo_day.tmax_orig = tmax_orig_list[step_i]
+        foo_day.tdew = tdew_list[step_i]
+        foo_day.u2 = wind_list[step_i]
+        foo_day.precip = ppt_list[step_i]
+        foo_day.rh_min = rh_min_list[step_i]
+        foo_day.etref = etref_list[step_i]
+        foo_day.tmean = tmean_list[step_i]
+        foo_day.tmin = tmin_list[step_i]
+        foo_day.tmax = tmax_list[step_i]
+        foo_day.snow_depth = snow_depth_list[step_i]
+        foo_day.t30 = t30_list[step_i]
+        foo_day.etref_30 = etref_30_list[step_i]
+        foo_day.winter = winter_list[step_i]
+        foo_day.kc_mult = kc_mult_list[step_i]
+        if data.co2_flag:
+            foo_day.co2 = co2_list[step_i]
+
+        compute_crop_gdd.compute_crop_gdd(crop, foo, foo_day)
+        calculate_height.calculate_height(crop, foo)
+
+        # kcb_daily() calls setup_crop(), which clears crop_setup_flag,
+        #   and can clear stress_event.  Neither flag is read by the
+        #   phenology so they are set here to detect those events.
+        foo.crop_setup_flag = True
+        foo.stress_event = True
+        kcb_daily.kcb_daily(data, et_cell, crop, foo, foo_day, False, vb_flag)
+        crop_setup_array[step_i] = not foo.crop_setup_flag
+        stress_reset_array[step_i] = not foo.stress_event
+
+        if not water_flag:
+            compute_crop_et.compute_crop_kc(data, et_cell, crop, foo, foo_day)
+            kc_max_array[step_i] = foo.kc_max
+            fc_array[step_i] = foo.fc
+            mad_array[step_i] = foo.mad
+            etref_30_array[step_i] = foo.etref_30
+            if foo.in_season:
+                fractime_array[step_i] = grow_root.root_fraction_time(
+                    crop, foo)
+        else:
+            water_arrays['et_act'][step_i] = foo.etc_act
+            water_arrays['et_pot'][step_i] = foo.etc_pot
+            water_arrays['et_bas'][step_i] = foo.etc_bas
+            water_arrays['kc_act'][step_i] = foo.kc_act
+            water_arrays['irrigation'][step_i] = foo.irr_sim
+            water_arrays['runoff'][step_i] = foo.sro
+            water_arrays['dperc'][step_i] = foo.dperc
+            water_arrays['niwr'][step_i] = foo.niwr + 0
+        in_season_array[step_i] = foo.in_season
+        kc_bas_array[step_i] = foo.kc_bas
+        height_array[step_i] = foo.height
+        doy_start_cycle_array[step_i] = foo.doy_start_cycle
+        cycle_array[step_i] = foo.cycle
+        cutting_array[step_i] = int(foo.cutting)
+
+        # Check that season started
+        if step_dt.month == 1 and step_dt.day == 1:
+            year_start_i = step_i
+        if step_dt.month == 12 and step_dt.day == 31:
+            season_count = in_season_array[year_start_i:step_i + 1].sum()
+            if season_count == 0:
+                logging.warning(
+                    '  Crop {} - {}{} growing season never started'.format(
+                        crop.class_number, step_dt.year, cell_str))
+            elif season_count == 1:
+                logging.warning(
+                    '  Crop {} - {}{} growing season active for 1 day'.format(
+                        crop.class_number, step_dt.year, cell_str))
+
+    pheno = {
+        'in_season': in_season_array, 'dormant': dormant_array,
+        'crop_setup': crop_setup_array, 'stress_reset': stress_reset_array,
+        'kc_bas': kc_bas_array, 'kc_max': kc_max_array, 'fc': fc_array,
+        'dormant_fc': dormant_fc_array, 'mad': mad_array,
+        'height': height_array, 'etref_30': etref_30_array,
+        'fractime': fractime_array,
+        'doy_start_cycle': doy_start_cycle_array, 'cycle': cycle_array,
+        'cutting': cutting_array}
+    if water_flag:
+        pheno.update(water_arrays)
+    return pheno
+
+
+def water_balance_loop(data, wb, pheno_list, inputs):
+    """Compute the daily soil water balance for all lanes of a WaterBalance
+
+    Args:
+        data ():
+        wb (): WaterBalance
+        pheno_list (list): daily phenology arrays from crop_phenology_loop()
+            for each WaterBalance lane
+        inputs (dict): daily inputs from cell_daily_inputs()
+
+    Returns:
+        dict of numpy arrays of the output fields (days x lanes)
+    """
+    doy_list = inputs['doy']
+    etref_list = inputs['etref']
+    ppt_list = inputs['ppt']
+    kc_mult_list = inputs['kc_mult']
+    day_count = len(doy_list)
+
+    # Stack the phenology arrays so each day is a row
+    def stack(field):
+        return np.column_stack([pheno[field] for pheno in pheno_list])
+    in_season = stack('in_season')
+    dormant = stack('dormant')
+    crop_setup = stack('crop_setup')
+    stress_reset = stack('stress_reset')
+    kc_bas = stack('kc_bas')
+    kc_max = stack('kc_max')
+    fc = stack('fc')
+    dormant_fc = stack('dormant_fc')
+    mad = stack('mad')
+    doy_start_cycle = stack('doy_start_cycle')
+    etref_30 = stack('etref_30')
+    fractime = stack('fractime')
+
+    output = dict(
+        (field, np.full((day_count, len(pheno_list)), np.nan))
+        for field in water_balance_fields)
+    for step_i in range(day_count):
+        wb.setup_dormant(dormant[step_i], dormant_fc[step_i])
+        wb.setup_crop(crop_setup[step_i])
+        wb.stress_event[stress_reset[step_i]] = False
+        wb.step(
+            precip=ppt_list[step_i], etref=etref_list[step_i],
+            doy=doy_list[step_i],
+            kc_mult=kc_mult_list[step_i],
+            in_season=in_season[step_i], kc_bas=kc_bas[step_i],
+            kc_max=kc_max[step_i], fc=fc[step_i], mad=mad[step_i],
+            doy_start_cycle=doy_start_cycle[step_i],
+            etref_30=etref_30[step_i], fractime=fractime[step_i])
+        output['et_act'][step_i] = wb.etc_act
+        output['et_pot'][step_i] = wb.etc_pot
+        output['et_bas'][step_i] = wb.etc_bas
+        output['kc_act'][step_i] = wb.kc_act
+        output['irrigation'][step_i] = wb.irr_sim
+        output['runoff'][step_i] = wb.sro
+        output['dperc'][step_i] = wb.dperc
+        output['niwr'][step_i] = wb.niwr + 0
+    return output
+
+
 def write_crop_output(data, et_cell, crop, foo):
     """Write ET-Demands output files for each cell/crop
 
@@ -5,6 +5,9 @@ import logging
 import os
 import sys
 
+import numpy as np
+import pandas as pd
+
 import crop_coefficients
 import crop_parameters
 import util
@@ -20,6 +23,9 @@ class CropETData():
         # True sets crop 1 to nonpristine alfalfa w/cuttings
         self.crop_one_flag = True
 
+        # Folder for the daily crop traces, tracing is off if not set
+        self.trace_ws = None
+
     def __str__(self):
         """ """
         return '<Cropet_data>'
@@ -182,6 +188,25 @@ class CropETData():
                 logging.debug('    gs_output_folder = growing_season_stats')
                 self.gs_output_ws = 'growing_season_stats'
 
+        # Binary copies of the parsed RefET and weather data
+        # The store is written and used automatically unless disabled
+        try:
+            self.weather_store_flag = config.getboolean(
+                crop_et_sec, 'weather_store_flag')
+        except:
+            self.weather_store_flag = True
+        if self.weather_store_flag:
+            try:
+                self.weather_store_ws = os.path.join(
+                    self.project_ws,
+                    config.get(crop_et_sec, 'weather_store_folder'))
+            except:
+                logging.debug('    weather_store_folder = weather_store')
+                self.weather_store_ws = os.path.join(
+                    self.project_ws, 'weather_store')
+        else:
+            self.weather_store_ws = None
+
         # Start/end date
         try:
             self.start_dt = dt.datetime.strptime(config.get(
@@ -258,7 +283,21 @@ class CropETData():
             self.spatial_cal_ws = config.get(crop_et_sec, 'spatial_cal_folder')
         except:
             self.spatial_cal_ws = None
+        # A single cell/crop parameter table can be used instead of the
+        #   crop parameter shapefiles in the spatial calibration folder
+        try:
+            self.spatial_cal_table = config.get(
+                crop_et_sec, 'spatial_cal_table')
+        except:
+            self.spatial_cal_table = None
         if (self.spatial_cal_flag and
+                self.spatial_cal_table is not None and
+                not os.path.isfile(self.spatial_cal_table)):
+            logging.error(('ERROR: The spatial calibration table {} ' +
+                           'does not exist').format(self.spatial_cal_table))
+            sys.exit()
+        elif (self.spatial_cal_flag and
+                self.spatial_cal_table is None and
                 self.spatial_cal_ws is not None and
                 not os.path.isdir(self.spatial_cal_ws)):
             logging.error(('ERROR: The spatial calibration folder {} ' +
@@ -292,6 +331,13 @@ class CropETData():
         self.refet['header_lines'] = config.getint(refet_sec, 'header_lines')
         self.refet['names_line'] = config.getint(refet_sec, 'names_line')
         self.refet['delimiter'] = config.get(refet_sec, 'delimiter')
+        # All stations can be in a single file with a station ID field
+        #   (name_format is then the file name)
+        try:
+            self.refet['station_field'] = config.get(
+                refet_sec, 'station_field')
+        except:
+            self.refet['station_field'] = None
 
         # Field names and units
         # Date can be read directly or computed from year, month, and day
@@ -370,6 +416,11 @@ class CropETData():
         self.weather['header_lines'] = config.getint(weather_sec, 'header_lines')
         self.weather['names_line'] = config.getint(weather_sec, 'names_line')
         self.weather['delimiter'] = config.get(weather_sec, 'delimiter')
+        try:
+            self.weather['station_field'] = config.get(
+                weather_sec, 'station_field')
+        except:
+            self.weather['station_field'] = None
 
         # Field names and units
         # Date can be read directly or computed from year, month, and day
@@ -584,6 +635,61 @@ class CropETData():
         self.crop_coeffs = crop_coefficients.read_crop_coefs(
             self.crop_coefs_path)
 
+    def set_refet_ratios(self):
+        """Read the ETo/ETr ratios static file once for all cells
+
+        The ratios are stored by station ID as an array of the 12 monthly
+        ratios, so each cell only has to look up its station.
+        Missing ratios are set to 1.0.
+        """
+        self.refet_ratios = {}
+        if not self.refet_ratios_path:
+            return False
+        logging.info('  Reading ETo/ETr ratios')
+        # Assume field names are fixed
+        # The other easy approach would be assume the first two columns
+        #   are the ID and name
+        id_field = 'Met Node ID'
+        name_field = 'Met Node Name'
+        try:
+            refet_ratios_pd = pd.read_table(
+                self.refet_ratios_path, dtype='str')
+            del refet_ratios_pd[name_field]
+        except IOError:
+            logging.error(
+                ('  IOError: ETo ratios static file could not be ' +
+                 'read and may not exist\n  {}').format(
+                    self.refet_ratios_path))
+            return False
+        except:
+            logging.error(('  Unknown error reading ETo ratios static ' +
+                           'file\n {}').format(self.refet_ratios_path))
+            return False
+
+        # Remove duplicates
+        # If there are duplicate station IDs, for now only use first instance
+        # Eventually allow users to tie the station IDs to the cells
+        if refet_ratios_pd.duplicated(subset=id_field).any():
+            logging.warning(
+                '  There are duplicate station IDs in ETo Ratios file\n' +
+                '  Only the first instance of the station ID will be applied')
+            refet_ratios_pd.drop_duplicates(subset=id_field, inplace=True)
+
+        # Convert the month abbrevations to month indices
+        month_columns = [
+            (dt.datetime.strptime(m, '%b').month - 1, m)
+            for m in refet_ratios_pd.columns if m != id_field]
+        ratio_array = np.ones((len(refet_ratios_pd.index), 12))
+        for month_i, month_field in month_columns:
+            ratio_array[:, month_i] = refet_ratios_pd[month_field].astype(
+                np.float).values
+        # Set any missing values to 1.0
+        ratio_array[np.isnan(ratio_array)] = 1.0
+
+        self.refet_ratios = dict(zip(
+            refet_ratios_pd[id_field].values, ratio_array))
+        return True
+
     def set_crop_co2(self):
         """Set crop CO2 type using the values in the INI"""
         for crop_num, crop_param in self.crop_params.iteritems():
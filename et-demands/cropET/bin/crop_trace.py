@@ -0,0 +1,87 @@
+import logging
+import os
+
+import numpy as np
+
+# Crop cycle (InitializeCropCycle) variables that are recorded each day
+trace_fields = [
+    'cgdd', 'gdd', 'height', 'doy_start_cycle', 'in_season', 'cycle',
+    'cutting', 'n_cgdd', 'n_pl_ec', 'kc_bas', 'kc_max', 'kc_min', 'fc',
+    'ke', 'ks', 'kc_act', 'kc_pot', 'mad', 'etref_30', 'zr', 'tew',
+    'depl_ze', 'depl_zep', 'depl_root', 'depl_surface', 'cn2', 's',
+    'ppt_inf', 'sro', 'irr_sim', 'dperc', 'niwr', 'cum_evap', 'aw3',
+    'etc_act', 'etc_pot', 'etc_bas']
+
+
+class CropTrace(object):
+    """Daily trace of the crop cycle variables for one crop in one cell
+
+    The values are written into a preallocated array inside the day loop
+    and saved once as a columnar NPZ file after the loop.
+    Nothing is created or recorded unless tracing is enabled.
+
+    Attributes:
+        date_list (list): datetime of each day
+        fields (list): names of the recorded InitializeCropCycle attributes
+        values (numpy array): recorded values [field, day]
+    """
+
+    def __init__(self, date_list, fields=trace_fields):
+        """Preallocate the trace for the day loop
+
+        Args:
+            date_list (list): datetime of each day
+            fields (list): names of the InitializeCropCycle attributes
+        """
+        self.date_list = date_list
+        self.fields = list(fields)
+        self.values = np.full((len(self.fields), len(date_list)), np.nan)
+
+    def record(self, step_i, foo):
+        """Record the crop cycle variables at the end of a day
+
+        Args:
+            step_i (int): index of the day in the day loop
+            foo (): InitializeCropCycle object
+        """
+        values = self.values
+        for field_i, field in enumerate(self.fields):
+            try:
+                values[field_i, step_i] = getattr(foo, field)
+            except (AttributeError, TypeError):
+                # Variables that are not set yet are left as NaN
+                pass
+
+    def save(self, trace_ws, et_cell, crop):
+        """Save the trace as a columnar NPZ file
+
+        Args:
+            trace_ws (str): folder for the trace files
+            et_cell (): ETCell object
+            crop (): CropParameters object
+
+        Returns:
+            str of the trace file path
+        """
+        trace_path = os.path.join(trace_ws, trace_name(
+            et_cell.cell_id, crop.class_number))
+        logging.debug('  Writing trace: {}'.format(trace_path))
+        columns = dict(zip(self.fields, self.values))
+        columns['date'] = np.array(
+            [d.strftime('%Y-%m-%d') for d in self.date_list])
+        columns['fields'] = np.array(self.fields)
+        np.savez_compressed(trace_path, **columns)
+        return trace_path
+
+
+def trace_name(cell_id, crop_num):
+    """File name of the trace for a cell and crop
+
+    Args:
+        cell_id (str): ET cell ID
+        crop_num (int): crop class number
+
+    Returns:
+        str
+    """
+    return '{0}_trace_crop_{1:02d}.npz'.format(cell_id, int(crop_num))
@@ -1,76 +1,185 @@
 #!/usr/bin/env python
 import copy
-import datetime
 import logging
 import os
-import re
 import sys
 
 import numpy as np
 import pandas as pd
 
+import calendar_util
+import spatial_crop_params
+import station_input
 import util
+import weather_cache
+import weather_store
 
 
-class ETCellData():
-    """Functions for loading ET Cell data from the static text files"""
+# ET cell properties that are stored as columns in the ETCellData registry
+#   and set as attributes of the ETCell objects
+cell_property_fields = [
+    'cell_id', 'cell_name', 'refet_id', 'stn_lat', 'stn_lon', 'stn_elev',
+    'permeability', 'stn_whc', 'stn_soildepth', 'stn_hydrogroup_str',
+    'stn_hydrogroup', 'aridity_rating', 'air_pressure', 'irrigation_flag',
+    'dairy_cuttings', 'beef_cuttings']
+
+
+class ETCellData(object):
+    """Functions for loading ET Cell data from the static text files
+
+    The cell properties are stored as one array per property (see
+    cell_property_fields) indexed by the cell index, and the crop flags
+    are stored as a boolean [cell, crop] array with the crop numbers
+    in crop_numbers.  The ETCell objects are only built for the active
+    cells when et_cells_dict is first used.
+    """
     def __init__(self):
         """ """
-        self.et_cells_dict = dict()
+        self.cell_index = dict()
+        self.cell_active = np.zeros(0, dtype=bool)
+        self.cell_views = None
         self.crop_num_list = []
 
+    @property
+    def et_cells_dict(self):
+        """Dictionary of ETCell objects of the active cells by cell ID"""
+        if self.cell_views is None:
+            self.cell_views = dict(
+                (self.cell_id[cell_i], self.cell_view(cell_i))
+                for cell_i in np.where(self.cell_active)[0])
+        return self.cell_views
+
+    def cell_view(self, cell_i):
+        """Build the ETCell object for a cell from the registry
+
+        Args:
+            cell_i (int): cell index
+
+        Returns:
+            ETCell
+        """
+        cell = ETCell()
+        cell.cell_index = int(cell_i)
+        for field in cell_property_fields:
+            setattr(cell, field, getattr(self, field)[cell_i].item())
+        cell.source_file_properties = self.source_file_properties
+        cell.source_file_crop = self.source_file_crop
+        cell.crop_names = self.crop_names
+        cell.crop_numbers = self.crop_numbers
+        cell.crop_flags = dict(zip(self.crop_numbers, self.crop_flags[cell_i]))
+        cell.ncrops = len(cell.crop_flags)
+
+        # List of active crop numbers (i.e. flag is True) in the cell
+        cell.crop_num_list = self.crop_numbers[
+            self.crop_flags[cell_i]].tolist()
+        return cell
+
+    def cell_indexes(self, cell_ids, func_str):
+        """Cell index of each cell ID, exit if a cell ID is not found
+
+        Args:
+            cell_ids (list): cell IDs
+            func_str (str): function name for the error message
+
+        Returns:
+            numpy array of cell indexes
+        """
+        cell_i_list = []
+        for cell_id in cell_ids:
+            try:
+                cell_i_list.append(self.cell_index[cell_id])
+            except KeyError:
+                logging.error(
+                    '%s, cell_id %s not found' % (func_str, cell_id))
+                sys.exit()
+        return np.array(cell_i_list, dtype=int)
+
     def set_properties(self, fn, delimiter='\t'):
         """Extract the ET cell property data from the text file
 
-        This function will build the ETCell objects and must be run first.
+        This function will build the cell registry and must be run first.
+
+        Order of the values:
+            ETCellIDs, ETCellNames, RefETIDs, station_lat, station_long,
+            station_elevft, station_WHC, station_soildepth, station_HydroGroup,
+            aridity_rating, refet_path
 
         Args:
             fn (str): file path of the ET cell properties text file
             delimiter (str): file delimiter (i.e. space, comma, tab, etc.)
         """
         logging.info('\nSetting static cell properties')
-        a = np.loadtxt(fn, delimiter=delimiter, dtype='str')
+        a = np.loadtxt(fn, delimiter=delimiter, dtype='str', ndmin=2)
         # Klamath file has one header, other has two lines
         if a[0, 0] == 'ET Cell ID':
             a = a[1:]
         else:
             a = a[2:]
-        for i, row in enumerate(a):
-            cell = ETCell()
-            cell.init_properties_from_row(row)
-            cell.source_file_properties = fn
-            self.et_cells_dict[cell.cell_id] = cell
+        self.source_file_properties = fn
+        self.cell_id = a[:, 0]
+        self.cell_name = a[:, 1]
+        self.refet_id = a[:, 2]    # met_id ??
+        self.stn_lat = a[:, 3].astype(float)
+        self.stn_lon = a[:, 4].astype(float)
+        self.stn_elev = a[:, 5].astype(float)
+        self.permeability = a[:, 6].astype(float)
+        self.stn_whc = a[:, 7].astype(float)
+        self.stn_soildepth = a[:, 8].astype(float)
+        self.stn_hydrogroup_str = a[:, 9]
+        # [140822] changed for RioGrande
+        # Hydrologic group values can be written as floats (i.e. 1.0)
+        self.stn_hydrogroup = a[:, 10].astype(float).astype(int)
+        self.aridity_rating = a[:, 11].astype(float)
+        # DEADBEEF - RefET path will be build from the ID and format
+        # DEADBEEF - For now assume station and cell have the same lat/lon/elev
+
+        # Compute air pressure of the station/cell
+        self.air_pressure = util.pair_from_elev(0.3048 * self.stn_elev)
+
+        # If a cell ID is repeated, the last row is used
+        self.cell_index = dict(
+            (cell_id, cell_i) for cell_i, cell_id in enumerate(self.cell_id))
+        self.cell_active = np.zeros(len(self.cell_id), dtype=bool)
+        self.cell_active[list(self.cell_index.values())] = True
+        self.cell_views = None
+
+        # Cells that are not in the crops and cuttings files
+        #   don't have any crops or cuttings
+        self.source_file_crop = None
+        self.crop_names = np.array([], dtype=str)
+        self.crop_numbers = np.array([], dtype=int)
+        self.crop_flags = np.zeros((len(self.cell_id), 0), dtype=bool)
+        self.irrigation_flag = np.zeros(len(self.cell_id), dtype=int)
+        self.dairy_cuttings = np.zeros(len(self.cell_id), dtype=int)
+        self.beef_cuttings = np.zeros(len(self.cell_id), dtype=int)
 
     def set_crops(self, fn, delimiter='\t'):
         """Extract the ET cell crop data from the text file
 
+        There is code in kcb_daily to adjust cgdd_term using the crop flag
+        as a multiplier.  This code is currently commented out and
+        crop_flags are being read in as booleans.
+
         Args:
             fn (str): file path  of the ET cell crops text file
             delimiter (str): file delimiter (i.e. space, comma, tab, etc.)
         """
         logging.info('Setting static cell crops')
-        a = np.loadtxt(fn, delimiter=delimiter, dtype='str')
-        crop_numbers = a[1, 4:].astype(int)
-        crop_names = a[2, 4:]
+        a = np.loadtxt(fn, delimiter=delimiter, dtype='str', ndmin=2)
+        self.source_file_crop = fn
+        self.crop_numbers = a[1, 4:].astype(int)
+        self.crop_names = a[2, 4:]
         a = a[3:]
-        for i, row in enumerate(a):
-            cell_id = row[0]
-            if cell_id not in self.et_cells_dict.keys():
-                logging.error(
-                    'read_et_cells_crops(), cell_id %s not found' % cell_id)
-                sys.exit()
-            cell = self.et_cells_dict[cell_id]
-            cell.init_crops_from_row(row, crop_numbers)
-            cell.source_file_crop = fn
-            cell.crop_names = crop_names
-            cell.crop_numbers = crop_numbers
-
-            # List of active crop numbers (i.e. flag is True) in the cell
-            cell.crop_num_list = sorted(
-                [k for k, v in cell.crop_flags.items() if v])
-            self.crop_num_list.extend(cell.crop_num_list)
+        cell_i = self.cell_indexes(a[:, 0], 'read_et_cells_crops()')
+        self.irrigation_flag[cell_i] = a[:, 3].astype(int)
+        self.crop_flags = np.zeros(
+            (len(self.cell_id), len(self.crop_numbers)), dtype=bool)
+        self.crop_flags[cell_i] = a[:, 4:].astype(bool)
+        self.cell_views = None
 
         # Update list of active crop numbers in all cells
+        self.crop_num_list = self.crop_numbers[
+            self.crop_flags[cell_i].any(axis=0)].tolist()
         self.crop_num_list = sorted(list(set(self.crop_num_list)))
 
     def set_cuttings(self, fn, delimiter='\t', skip_rows=2):
@@ -91,29 +200,23 @@ class ETCellData():
         try:
             cell_id_index = a[1].split(delimiter).index('ET Cell ID')
         except:
-            cell_id_index = None
+            cell_id_index = 0
 
-        a = a[skip_rows:]
-        for i, line in enumerate(a):
-            row = line.split(delimiter)
-            if cell_id_index is not None:
-                cell_id = row[cell_id_index]
-            else:
-                cell_id = row[0]
-            if cell_id not in self.et_cells_dict.keys():
-                logging.error(
-                    'crop_et_data.static_mean_cuttings(), cell_id %s not found' % cell_id)
-                sys.exit()
-            cell = self.et_cells_dict[cell_id]
-            cell.init_cuttings_from_row(row)
+        rows = [line.split(delimiter) for line in a[skip_rows:]]
+        cell_i = self.cell_indexes(
+            [row[cell_id_index] for row in rows],
+            'crop_et_data.static_mean_cuttings()')
+        # self.cuttingsLat = float(data[2])
+        self.dairy_cuttings[cell_i] = [int(row[3]) for row in rows]
+        self.beef_cuttings[cell_i] = [int(row[4]) for row in rows]
+        self.cell_views = None
 
     def set_crop_numbers(self):
         """Update the master crop number list based on the active crops"""
         logging.info('\nUpdating master crop number list')
-        crop_numbers = set()
-        for cell in self.et_cells_dict.values():
-            crop_numbers.update(cell.crop_num_list)
-        self.crop_num_list = sorted(list(crop_numbers))
+        self.crop_num_list = self.crop_numbers[
+            self.crop_flags[self.cell_active].any(axis=0)].tolist()
+        self.crop_num_list = sorted(list(set(self.crop_num_list)))
         logging.info('  All active crops: {}'.format(
             ', '.join(map(str, self.crop_num_list))))
 
@@ -148,181 +251,169 @@ class ETCellData():
             crop_numbers &= set(data.crop_test_list)
         # self.crop_num_list = sorted(crop_numbers)
 
+        # Turn off the crop flags of the filtered crops in all cells
+        self.crop_flags &= np.in1d(self.crop_numbers, list(crop_numbers))
+        self.cell_views = None
+
         # Get max length of CELL_ID for formatting of log string
-        cell_id_len = max([
-            len(cell_id) for cell_id in self.et_cells_dict.keys()])
-
-        # Filter each cell with updated master crop list
-        for cell_id, cell in sorted(self.et_cells_dict.items()):
-            cell.crop_num_list = sorted(
-                crop_numbers & set(cell.crop_num_list))
-            # Turn off the crop flag
-            cell.crop_flags = {
-                c: f and c in cell.crop_num_list
-                for c, f in cell.crop_flags.iteritems()}
+        cell_id_len = max([len(cell_id) for cell_id in self.cell_id])
+        for cell_i in sorted(np.where(self.cell_active)[0],
+                             key=lambda i: self.cell_id[i]):
             logging.info('  CellID: {1:{0}s}: {2}'.format(
-                cell_id_len, cell_id,
-                ', '.join(map(str, cell.crop_num_list))))
+                cell_id_len, self.cell_id[cell_i], ', '.join(map(
+                    str, self.crop_numbers[self.crop_flags[cell_i]]))))
 
     def filter_cells(self, data):
         """Remove cells with no active crops"""
         logging.info('\nFiltering ET Cells')
-        cell_ids = set(self.et_cells_dict.keys())
+        keep_mask = self.cell_active.copy()
         if data.cell_skip_list:
-            cell_ids -= set(data.cell_skip_list)
+            keep_mask &= ~np.in1d(self.cell_id, data.cell_skip_list)
             logging.info('  Cell skip list: {}'.format(
                 ','.join(map(str, data.cell_skip_list))))
         if data.cell_test_list:
-            cell_ids &= set(data.cell_test_list)
+            keep_mask &= np.in1d(self.cell_id, data.cell_test_list)
             logging.info('  Cell test list: {}'.format(
                 ','.join(map(str, data.cell_test_list))))
 
-        # Get max length of CELL_ID for formatting of log string
-        cell_id_len = max([
-            len(cell_id) for cell_id in self.et_cells_dict.keys()])
+        # Remove cells without any active crops
+        crop_mask = self.crop_flags[:, np.in1d(
+            self.crop_numbers, self.crop_num_list)].any(axis=1)
 
-        for cell_id, cell in sorted(self.et_cells_dict.items()):
-            # Remove cells without any active crops
-            if cell_id not in cell_ids:
+        # Get max length of CELL_ID for formatting of log string
+        cell_id_len = max([len(cell_id) for cell_id in self.cell_id])
+        for cell_i in sorted(np.where(self.cell_active)[0],
+                             key=lambda i: self.cell_id[i]):
+            if not keep_mask[cell_i]:
                 logging.info('  CellID: {1:{0}s} skipping'.format(
-                    cell_id_len, cell_id))
-                del self.et_cells_dict[cell_id]
-            elif not set(self.crop_num_list) & set(cell.crop_num_list):
+                    cell_id_len, self.cell_id[cell_i]))
+            elif not crop_mask[cell_i]:
                 logging.info('  CellID: {1:{0}s} skipping (no active crops)'.format(
-                    cell_id_len, cell_id))
-                del self.et_cells_dict[cell_id]
-            # else:
-            #     logging.debug(('  CellID: {}').format(cell_id))
+                    cell_id_len, self.cell_id[cell_i]))
+        self.cell_active = keep_mask & crop_mask
+
+        # Drop the filtered cells if the ETCell objects were already built
+        if self.cell_views is not None:
+            for cell_id in list(self.cell_views.keys()):
+                if not self.cell_active[self.cell_index[cell_id]]:
+                    del self.cell_views[cell_id]
 
     def set_static_crop_params(self, crop_params):
-        """"""
+        """Share the static crop parameters with all of the cells
+
+        The crop parameter objects are not copied for each cell.
+        Spatially varying parameters are applied with ETCell.set_crop_param(),
+        which only copies the crops of a cell that are changed.
+
+        Args:
+            crop_params (dict): crop number to CropParameters object
+        """
         logging.info('\nSetting static crop parameters')
         # print crop_params
         for cell_id in sorted(self.et_cells_dict.keys()):
             cell = self.et_cells_dict[cell_id]
-            cell.crop_params = copy.deepcopy(crop_params)
+            cell.crop_params = crop_params
+            cell.crop_param_overrides = {}
 
     def set_static_crop_coeffs(self, crop_coeffs):
-        """"""
+        """Share the static crop coefficients with all of the cells
+
+        The crop coefficient curves are read only and are never copied.
+
+        Args:
+            crop_coeffs (dict): crop curve number to CropCoeff object
+        """
         logging.info('Setting static crop coefficients')
         for cell_id in sorted(self.et_cells_dict.keys()):
             cell = self.et_cells_dict[cell_id]
-            cell.crop_coeffs = copy.deepcopy(crop_coeffs)
+            cell.crop_coeffs = crop_coeffs
 
-    def set_spatial_crop_params(self, calibration_ws):
-        """"""
-        import shapefile
+    def set_spatial_crop_params(self, calibration_ws=None, cal_table_path=None):
+        """Apply the spatially varying crop parameters to the cells
 
+        The parameters are read from the crop parameter shapefile DBFs in
+        the calibration folder (one file per crop) or from a single
+        consolidated cell/crop parameter table (see spatial_crop_params.py).
+
+        Args:
+            calibration_ws (str): spatial calibration folder path
+            cal_table_path (str): consolidated parameter table path,
+                used instead of the folder if set
+        """
         logging.info('Setting spatially varying crop parameters')
-        cell_id_field = 'CELL_ID'
-        crop_dbf_re = re.compile('crop_\d{2}_\w+.dbf$', re.I)
 
-        # Get list of crop parameter shapefiles DBFs
-        crop_dbf_dict = dict([
-            (int(item.split('_')[1]), os.path.join(calibration_ws, item))
-            for item in os.listdir(calibration_ws)
-            if crop_dbf_re.match(item)])
+        # Crop parameter shapefiles are by crop,
+        #   but parameters need to be separated first by ETCell
+        if cal_table_path:
+            logging.debug('  {}'.format(cal_table_path))
+            crop_columns_dict = spatial_crop_params.crop_columns(
+                spatial_crop_params.read_table_columns(cal_table_path))
+            crop_source_dict = dict(
+                (crop_num, cal_table_path) for crop_num in crop_columns_dict)
+        else:
+            crop_columns_dict = {}
+            crop_source_dict = spatial_crop_params.crop_dbf_paths(
+                calibration_ws)
 
-        # Filter the file list based on the "active" crops
-        for crop_num in crop_dbf_dict.keys():
+        # Process each crop parameter table, skipping inactive crops
+        for crop_num, crop_source in sorted(crop_source_dict.items()):
             if crop_num not in self.crop_num_list:
-                try:
-                    del crop_dbf_dict[crop_num]
-                except:
-                    pass
-
-        # DEADBEEF - This really shouldn't be hard coded here
-        # Dictionary to convert shapefile field names to crop parameters
-        param_field_dict = {
-            'Name':      'name',
-            'ClassNum':  'class_number',
-            'IsAnnual':  'is_annual',
-            'IrrigFlag': 'irrigation_flag',
-            'IrrigDays': 'days_after_planting_irrigation',
-            'Crop_FW':   'crop_fw',
-            'WinterCov': 'winter_surface_cover_class',
-            'CropKcMax': 'kc_max',
-            'MAD_Init':  'mad_initial',
-            'MAD_Mid':   'mad_midseason',
-            'RootDepIni':'rooting_depth_initial',
-            'RootDepMax':'rooting_depth_max',
-            'EndRootGrw':'end_of_root_growth_fraction_time',
-            'HeightInit':'height_initial',
-            'HeightMax': 'height_max',
-            'CurveNum':  'curve_number',
-            'CurveName': 'curve_name',
-            'CurveType': 'curve_type',
-            'PL_GU_Flag':'flag_for_means_to_estimate_pl_or_gu',
-            'T30_CGDD':  't30_for_pl_or_gu_or_cgdd',
-            'PL_GU_Date':'date_of_pl_or_gu',
-            'CGDD_Tbase':'tbase',
-            'CGDD_EFC':  'cgdd_for_efc',
-            'CGDD_Term': 'cgdd_for_termination',
-            'Time_EFC':  'time_for_efc',
-            'Time_Harv': 'time_for_harvest',
-            'KillFrostC':'killing_frost_temperature',
-            'InvokeStrs':'invoke_stress',
-            'CN_Coarse': 'cn_coarse_soil',
-            'CN_Medium': 'cn_medium_soil',
-            'CN_Fine':   'cn_fine_soil'}
-        # Cuttings values can also be updated spatially
-        cutting_field_dict = {
-            'Beef_Cut':  'beef_cuttings',
-            'Dairy_Cur': 'dairy_cuttings'}
+                continue
+            logging.debug('    {0:2d} {1}'.format(crop_num, crop_source))
+            try:
+                column_dict = crop_columns_dict[crop_num]
+            except KeyError:
+                column_dict = spatial_crop_params.read_dbf_columns(crop_source)
+            self.set_spatial_crop_columns(crop_num, column_dict)
+        return True
 
-        # Crop parameter shapefiles are by crop,
-        #   but parameters need to be separated first by ETCell
-        # Process each crop parameter shapefile
-        for crop_num, crop_dbf in sorted(crop_dbf_dict.items()):
-            logging.debug('    {0:2d} {1}'.format(crop_num, crop_dbf))
-
-            # Process using dbfread
-            # crop_f = DBF(crop_dbf)
-            # for record in crop_f:
-            #     _id = record[cell_id_field]
-            #      field_name, row_value in dict(record).items():
-
-            # Process using shapefile/pyshp
-            crop_f = shapefile.Reader(crop_dbf)
-            crop_fields = [f[0] for f in crop_f.fields if f[0] != 'DeletionFlag']
-            for record in crop_f.iterRecords():
-                cell_id = record[crop_fields.index(cell_id_field)]
-                # Skip cells
-                if cell_id not in self.et_cells_dict.keys():
-                    continue
-                for field_name, row_value in zip(crop_fields, record):
-                    # DEADBEEF - I really want to skip non-crop parameter fields
-                    #   but also tell the user if a crop parameter field is missing
-                    try:
-                        param_name = param_field_dict[field_name]
-                    except:
-                        param_name = None
-                    try:
-                        cutting_name = cutting_field_dict[field_name]
-                    except:
-                        cutting_name = None
-                    if param_name is not None:
-                        try:
-                            setattr(
-                                self.et_cells_dict[cell_id].crop_params[crop_num],
-                                param_name, float(row_value))
-                        except:
-                            logging.warning(
-                                ('  The spatial crop parameter was not updated\n' +
-                                 '    cell_id:    {0}\n    crop_num:   {1}\n' +
-                                 '    field_name: {2}\n    parameter:  {3}').format(
-                                 cell_id, crop_num, field_name, param_name))
-                    elif cutting_name is not None:
-                        try:
-                            setattr(
-                                self.et_cells_dict[cell_id],
-                                cutting_name, float(row_value))
-                        except:
-                            logging.warning(
-                                ('  The spatial cutting parameter was not updated\n' +
-                                 '    cell_id:    {0}\n    crop_num:   {1}\n' +
-                                 '    field_name: {2}\n    parameter:  {3}').format(
-                                 cell_id, crop_num, field_name, cutting_name))
+    def set_spatial_crop_columns(self, crop_num, column_dict):
+        """Apply the spatially varying parameters of one crop
+
+        Args:
+            crop_num (int): crop class number
+            column_dict (dict): parameter column arrays by field name
+        """
+        # Only the columns that map to a parameter are converted
+        param_columns = []
+        for field_name, values in column_dict.items():
+            if field_name in spatial_crop_params.param_field_dict.keys():
+                param_name = spatial_crop_params.param_field_dict[field_name]
+                param_type = 'crop'
+            elif field_name in spatial_crop_params.cutting_field_dict.keys():
+                param_name = spatial_crop_params.cutting_field_dict[field_name]
+                param_type = 'cutting'
+            else:
+                continue
+            param_columns.append((
+                field_name, param_name, param_type,
+                spatial_crop_params.float_values(values)))
+
+        # Skip cells that are not being run
+        et_cells_dict = self.et_cells_dict
+        cell_id_array = np.asarray(
+            column_dict[spatial_crop_params.cell_id_field]).astype(str)
+        cell_mask = np.array([
+            cell_id in et_cells_dict for cell_id in cell_id_array], dtype=bool)
+        if not cell_mask.any():
+            return False
+
+        for field_name, param_name, param_type, values in param_columns:
+            value_mask = cell_mask & np.isfinite(values)
+            if (cell_mask & ~value_mask).any():
+                logging.warning(
+                    ('  The spatial {0} parameter was not updated for ' +
+                     '{1} cells\n    crop_num:   {2}\n' +
+                     '    field_name: {3}\n    parameter:  {4}').format(
+                        param_type, (cell_mask & ~value_mask).sum(),
+                        crop_num, field_name, param_name))
+            for cell_id, value in zip(
+                    cell_id_array[value_mask], values[value_mask]):
+                cell = et_cells_dict[cell_id]
+                if param_type == 'crop':
+                    cell.set_crop_param(crop_num, param_name, float(value))
+                else:
+                    setattr(cell, param_name, float(value))
         return True
 
 
@@ -336,81 +427,89 @@ class ETCell():
         return '<ETCell {0}, {1} {2}>'.format(
             self.cell_id, self.cell_name, self.refet_id)
 
-    def init_properties_from_row(self, data):
-        """ Parse a row of data from the ET cell properties file
+    def set_crop_param(self, crop_num, param_name, value):
+        """Set a crop parameter for this cell only
 
-        Order of the values:
-            ETCellIDs, ETCellNames, RefETIDs, station_lat, station_long,
-            station_elevft, station_WHC, station_soildepth, station_HydroGroup,
-            aridity_rating, refet_path
+        The crop parameters are shared by all cells (see
+        ETCellData.set_static_crop_params()), so the crop parameter dictionary
+        and the changed crop are copied the first time they are changed.
+        The changed values are also kept in crop_param_overrides.
 
         Args:
-            data (list): row values
-
+            crop_num (int): crop class number
+            param_name (str): CropParameters attribute name
+            value (float): parameter value
         """
-        self.cell_id = data[0]
-        self.cell_name = data[1]
-        self.refet_id = data[2]    # met_id ??
-        self.stn_lat = float(data[3])
-        self.stn_lon = float(data[4])
-        self.stn_elev = float(data[5])
-        self.permeability = float(data[6])
-        self.stn_whc = float(data[7])
-        self.stn_soildepth = float(data[8])
-        self.stn_hydrogroup_str = data[9]
-        # [140822] changed for RioGrande
-        #self.stn_hydrogroup = int(data[10])
-        self.stn_hydrogroup = int(eval(data[10]))
-        self.aridity_rating = float(data[11])
-        # DEADBEEF - RefET path will be build from the ID and format
-        # self.refet_path = data[12]
-        # if len(data) == 14:       # CVP
-        #     .area = data[13]
-        # elif len(data) == 15:     # truckee
-        #     .huc = data[13]
-        #     .huc_name = data[14]
-        # elif len(data) > 13:
-        #     .cell_lat = float(data[13])
-        #     .cell_lon = float(data[14])
-        #     .cell_elev = float(data[15])
-        # DEADBEEF - For now assume station and cell have the same lat/lon/elev
-        # self.cell_lat = float(data[13])
-        # self.cell_lon = float(data[14])
-        # self.cell_elev = float(data[15])
-
-        # Compute air pressure of the station/cell
-        self.air_pressure = util.pair_from_elev(0.3048 * self.stn_elev)
-        # self.air_pressure = util.pair_from_elev(0.3048 * self.cell_elev)
-
-    def init_crops_from_row(self, data, crop_numbers):
-        """Parse the row of data
-
-        There is code in kcb_daily to adjust cgdd_term using the crop flag as a multiplier
-        This code is currently commented out and crop_flags are being read in as booleans
-
-        """
-        self.irrigation_flag = int(data[3])
-        self.crop_flags = dict(zip(crop_numbers, data[4:].astype(bool)))
-        # self.crop_flags = dict(zip(crop_numbers, data[4:]))
-        self.ncrops = len(self.crop_flags)
-
-    def init_cuttings_from_row(self, data):
-        """ Parse the row of data """
-        # self.cuttingsLat = float(data[2])
-        self.dairy_cuttings = int(data[3])
-        self.beef_cuttings = int(data[4])
+        if not self.crop_param_overrides:
+            self.crop_params = dict(self.crop_params)
+        if crop_num not in self.crop_param_overrides:
+            self.crop_params[crop_num] = copy.copy(self.crop_params[crop_num])
+            self.crop_param_overrides[crop_num] = {}
+        setattr(self.crop_params[crop_num], param_name, value)
+        self.crop_param_overrides[crop_num][param_name] = value
 
     def initialize_weather(self, data):
-        """Wrapper for setting all refet/weather/climate data"""
-        # Could the pandas dataframes be inherited instead from data
-        self.set_refet_data(data.refet)
-        if data.refet_ratios_path:
-            self.set_refet_ratio_data(data.refet_ratios_path)
-        self.set_weather_data(data.weather)
+        """Wrapper for setting all refet/weather/climate data
+
+        The data is cached by station and by climate (see weather_cache.py),
+        so the files are only read once for all cells of a station.
+        The parsed station data and the climate data computed from the
+        full record are also kept between runs in the weather store folder
+        (see weather_store.py), so later runs only read the dates being run.
+        The cached data frames are shared by the cells and are read only.
+        """
+        climate_key = weather_cache.climate_key(self)
+        climate_data = weather_cache.climate_cache.get(climate_key)
+        if climate_data is not None:
+            logging.debug('  Using cached weather and climate data')
+            (self.refet_pd, self.weather_pd, self.climate_pd,
+             self.climate) = climate_data
+            return
+
+        # Only the dates being run are read if the climate data is stored
+        if data.weather_store_ws:
+            climate_data = weather_store.read_climate(
+                data, self, data.start_dt, data.end_dt)
+            if climate_data is not None:
+                (self.refet_pd, self.weather_pd, self.climate_pd,
+                 self.climate) = climate_data
+                weather_cache.climate_cache.put(climate_key, climate_data)
+                return
+
+        station_key = weather_cache.station_key(self)
+        station_data = weather_cache.station_cache.get(station_key)
+        if station_data is not None:
+            logging.debug('  Using cached RefET and weather data')
+            self.refet_pd, self.weather_pd = station_data
+        else:
+            # Parsed station data is also stored in binary files between runs
+            #   (see weather_store.py)
+            station_data = None
+            if data.weather_store_ws:
+                station_data = weather_store.read_station(data, self)
+            if station_data is not None:
+                self.refet_pd, self.weather_pd = station_data
+            else:
+                # Could the pandas dataframes be inherited instead from data
+                refet_flag = self.set_refet_data(data.refet)
+                if data.refet_ratios_path:
+                    self.set_refet_ratio_data(data.refet_ratios)
+                weather_flag = self.set_weather_data(data.weather)
+                if data.weather_store_ws and refet_flag and weather_flag:
+                    weather_store.write_station(
+                        data, self, [self.refet_pd, self.weather_pd])
+            weather_cache.station_cache.put(
+                station_key, (self.refet_pd, self.weather_pd))
 
         # Process climate arrays
+        # Snow depth is modified in place, so don't modify the cached copy
+        self.weather_pd = self.weather_pd.copy()
         self.process_climate()
+        if data.weather_store_ws:
+            weather_store.write_climate(data, self)
         self.subset_weather_data(data.start_dt, data.end_dt)
+        weather_cache.climate_cache.put(climate_key, (
+            self.refet_pd, self.weather_pd, self.climate_pd, self.climate))
 
     def set_refet_data(self, refet):
         """Read the ETo/ETr data file for a single station using Pandas
@@ -423,17 +522,11 @@ class ETCell():
                 and values are numpy arrays of the data
         """
         logging.debug('\nRead ETo/ETr data')
-        refet_path = os.path.join(refet['ws'], refet['format'] % self.refet_id)
+        refet_path = station_input.station_path(refet, self.refet_id)
         logging.debug('  {0}'.format(refet_path))
-
-        # Get list of 0 based line numbers to skip
-        # Ignore header but assume header was set as a 1's based index
-        skiprows = [i for i in range(refet['header_lines'])
-                    if i + 1 != refet['names_line']]
         try:
-            self.refet_pd = pd.read_table(
-                refet_path, engine='python', header=refet['names_line'] - 1,
-                skiprows=skiprows, delimiter=refet['delimiter'])
+            self.refet_pd = read_station_table(station_input.station_source(
+                refet_path, refet, self.refet_id), refet)
         except IOError:
             logging.error(('  IOError: RefET data file could not be read ' +
                            'and may not exist\n  {}').format(refet_path))
@@ -454,9 +547,11 @@ class ETCell():
                      '    Check the {2}_field value in the INI file').format(
                         field_name, os.path.basename(refet_path), field_key))
                 sys.exit()
-            # Rename the dataframe fields
-            self.refet_pd = self.refet_pd.rename(
-                columns={field_name: field_key})
+        # Rename the dataframe fields
+        self.refet_pd.rename(
+            columns=dict((field_name, field_key) for field_key, field_name
+                         in refet['fields'].items() if field_name is not None),
+            inplace=True)
         # Check/modify units
         for field_key, field_units in refet['units'].items():
             if field_units is None:
@@ -469,81 +564,39 @@ class ETCell():
 
         # Convert date strings to datetimes
         if refet['fields']['date'] is not None:
-            self.refet_pd['date'] = pd.to_datetime(self.refet_pd['date'])
+            # The date format is inferred from the first date so the
+            #   remaining dates are not each parsed by dateutil
+            self.refet_pd['date'] = pd.to_datetime(
+                self.refet_pd['date'], infer_datetime_format=True)
         else:
-            self.refet_pd['date'] = self.refet_pd[['year', 'month', 'day']].apply(
-                lambda s: datetime.datetime(*s), axis=1)
+            self.refet_pd['date'] = calendar_util.date_from_ymd(
+                self.refet_pd['year'], self.refet_pd['month'], self.refet_pd['day'])
         # self.refet_pd['date'] = pd.to_datetime(self.refet_pd['date'])
         self.refet_pd.set_index('date', inplace=True)
-        self.refet_pd['doy'] = [
-            int(ts.strftime('%j')) for ts in self.refet_pd.index]
-        self.refet_pd['month'] = [
-            int(ts.strftime('%m')) for ts in self.refet_pd.index]
+        calendar = calendar_util.DailyCalendar(self.refet_pd.index)
+        self.refet_pd['doy'] = calendar.doy
+        self.refet_pd['month'] = calendar.month
         return True
 
 
-    def set_refet_ratio_data(self, refet_ratios_path):
-        """Read ETo/ETr ratios static file"""
-        logging.info('  Reading ETo/ETr ratios')
-        # Assume field names are fixed
-        # The other easy approach would be assume the first two columns
-        #   are the ID and name
-        id_field = 'Met Node ID'
-        name_field = 'Met Node Name'
-        month_field = 'month'
-        ratio_field = 'ratio'
-        try:
-            refet_ratios_pd = pd.read_table(refet_ratios_path, dtype='str')
-            del refet_ratios_pd[name_field]
-        except IOError:
-            logging.error(
-                ('  IOError: ETo ratios static file could not be ' +
-                 'read and may not exist\n  {}').format(refet_ratios_path))
-            return False
-        except:
-            logging.error(('  Unknown error reading ETo ratios static ' +
-                           'file\n {}').format(refet_ratios_path))
-            return False
+    def set_refet_ratio_data(self, refet_ratios):
+        """Scale the ETo/ETr values by the monthly ratios of the station
 
-        # Remove duplicates
-        # If there are duplicate station IDs, for now only use first instance
-        # Eventually allow users to tie the station IDs to the cells
-        if refet_ratios_pd.duplicated(subset=id_field).any():
-            logging.warning(
-                '  There are duplicate station IDs in ETo Ratios file\n' +
-                '  Only the first instance of the station ID will be applied')
-            refet_ratios_pd.drop_duplicates(subset=id_field, inplace=True)
-
-        # Flatten/flip the data so the ratio values are in one column
-        refet_ratios_pd = pd.melt(
-            refet_ratios_pd, id_vars=[id_field],
-            var_name=month_field, value_name=ratio_field)
-        refet_ratios_pd[ratio_field] = refet_ratios_pd[ratio_field].astype(np.float)
-        # Set any missing values to 1.0
-        refet_ratios_pd.fillna(value=1.0, inplace=True)
-
-        # Convert the month abbrevations to numbers
-        refet_ratios_pd[month_field] = [
-            datetime.datetime.strptime(m, '%b').month
-            for m in refet_ratios_pd[month_field]]
-
-        # Filter to current station
-        refet_ratios_pd = refet_ratios_pd[
-           refet_ratios_pd[id_field] == self.refet_id]
-        if refet_ratios_pd.empty:
+        Args:
+            refet_ratios (dict): arrays of the 12 monthly ratios by station ID
+                (see CropETData.set_refet_ratios())
+        """
+        try:
+            ratio_array = refet_ratios[self.refet_id]
+        except KeyError:
             logging.warning('  Empty table, ETo/ETr ratios not applied')
             return False
-
-        # Set month as the index
-        refet_ratios_pd.set_index(month_field, inplace=True)
-        logging.info(refet_ratios_pd)
+        logging.info('  ETo/ETr ratios: {}'.format(
+            ', '.join(['{:.2f}'.format(r) for r in ratio_array])))
 
         # Scale ETo/ETr values
-        self.refet_pd = self.refet_pd.join(refet_ratios_pd, 'month')
-        self.refet_pd['etref'] *= self.refet_pd[ratio_field]
-        del self.refet_pd[ratio_field]
-        del self.refet_pd[month_field]
-        del self.refet_pd[id_field]
+        self.refet_pd['etref'] *= ratio_array[
+            self.refet_pd['month'].values - 1]
         return True
 
 
@@ -559,19 +612,11 @@ class ETCell():
         """
         logging.debug('Read meteorological/climate data')
 
-        weather_path = os.path.join(
-            weather['ws'], weather['format'] % self.refet_id)
+        weather_path = station_input.station_path(weather, self.refet_id)
         logging.debug('  {0}'.format(weather_path))
-
-        # Get list of 0 based line numbers to skip
-        # Ignore header but assume header was set as a 1's based index
-        skiprows = [i for i in range(weather['header_lines'])
-                    if i + 1 != weather['names_line']]
         try:
-            self.weather_pd = pd.read_table(
-                weather_path, engine='python',
-                header=weather['names_line'] - 1, skiprows=skiprows,
-                delimiter=weather['delimiter'])
+            self.weather_pd = read_station_table(station_input.station_source(
+                weather_path, weather, self.refet_id), weather)
         except IOError:
             logging.error(('  IOError: Weather data file could not be read ' +
                            'and may not exist\n  {}').format(weather_path))
@@ -594,9 +639,11 @@ class ETCell():
                      '    Check the {2}_field value in the INI file').format(
                     field_name, os.path.basename(weather_path), field_key))
                 sys.exit()
-            # Rename the dataframe fields
-            self.weather_pd = self.weather_pd.rename(
-                columns={field_name: field_key})
+        # Rename the dataframe fields
+        self.weather_pd.rename(
+            columns=dict((field_name, field_key) for field_key, field_name
+                         in weather['fields'].items() if field_name is not None),
+            inplace=True)
         # Check/modify units
         for field_key, field_units in weather['units'].items():
             if field_units is None:
@@ -620,14 +667,17 @@ class ETCell():
 
         # Convert date strings to datetimes
         if weather['fields']['date'] is not None:
-            self.weather_pd['date'] = pd.to_datetime(self.weather_pd['date'])
+            # The date format is inferred from the first date so the
+            #   remaining dates are not each parsed by dateutil
+            self.weather_pd['date'] = pd.to_datetime(
+                self.weather_pd['date'], infer_datetime_format=True)
         else:
-            self.weather_pd['date'] = self.weather_pd[['year', 'month', 'day']].apply(
-                lambda s: datetime.datetime(*s), axis=1)
+            self.weather_pd['date'] = calendar_util.date_from_ymd(
+                self.weather_pd['year'], self.weather_pd['month'], self.weather_pd['day'])
         # self.weather_pd['date'] = pd.to_datetime(self.weather_pd['date'])
         self.weather_pd.set_index('date', inplace=True)
-        self.weather_pd['doy'] = [
-            int(ts.strftime('%j')) for ts in self.weather_pd.index]
+        self.weather_pd['doy'] = calendar_util.DailyCalendar(
+            self.weather_pd.index).doy
 
         # Scale wind height to 2m if necessary
         if weather['wind_height'] != 2:
@@ -693,19 +743,19 @@ class ETCell():
         # Initialize the climate dataframe
         self.climate_pd = self.weather_pd[
             ['doy', 'tmax', 'tmin', 'snow', 'snow_depth']].copy()
+        calendar = calendar_util.DailyCalendar(self.weather_pd.index)
 
         # Adjust T's downward if station is arid
         if self.aridity_rating > 0:
             # Interpolate value for aridity adjustment
             aridity_adj = [0., 0., 0., 0., 1., 1.5, 2., 3.5, 4.5, 3., 0., 0., 0.]
-            month = np.array([dt.month for dt in self.weather_pd.index])
-            day = np.array([dt.day for dt in self.weather_pd.index])
-            moa_frac = np.clip((month + (day - 15) / 30.4), 1, 11)
+            moa_frac = np.clip(
+                (calendar.month + (calendar.day - 15) / 30.4), 1, 11)
             arid_adj = np.interp(moa_frac, range(len(aridity_adj)), aridity_adj)
             arid_adj *= self.aridity_rating / 100.
             self.climate_pd['tmax'] -= arid_adj
             self.climate_pd['tmin'] -= arid_adj
-            del month, day, arid_adj
+            del arid_adj
 
         # T30 stuff, done after temperature adjustments above
         self.climate_pd['tmean'] = self.climate_pd[["tmax", "tmin"]].mean(axis=1)
@@ -731,7 +781,7 @@ class ETCell():
 
         # Compute cumulative GDD for each year
         self.climate_pd['cgdd'] = self.climate_pd[['doy', 'cgdd']].groupby(
-            self.climate_pd.index.map(lambda x: x.year)).cgdd.cumsum()
+            calendar.year).cgdd.cumsum()
         # DEADBEEF - Compute year column then compute cumulative GDD
         # self.climate_pd['year'] = [dt.year for dt in self.climate_pd.index]
         # self.climate_pd['cgdd'] = self.climate_pd[['year', 'doy', 'gdd']].groupby('year').gdd.cumsum()
@@ -752,18 +802,10 @@ class ETCell():
 
         # Calculate an estimated depth of snow on ground using simple melt rate function))
         if np.any(self.climate_pd['snow']):
-            snow_accum = 0
-            for i, doy in self.weather_pd['doy'].iteritems():
-                # Calculate an estimated depth of snow on ground using simple melt rate function
-                snow = self.climate_pd['snow'][i]
-                snow_depth = self.climate_pd['snow_depth'][i]
-                # Assume a settle rate of 2 to 1
-                snow_accum += snow * 0.5  # assume a settle rate of 2 to 1
-                # 4 mm/day melt per degree C
-                snow_melt = max(4 * self.climate_pd['tmax'][i], 0.0)
-                snow_accum = max(snow_accum - snow_melt, 0.0)
-                snow_depth = min(snow_depth, snow_accum)
-                self.weather_pd['snow_depth'][i] = snow_depth
+            self.weather_pd['snow_depth'] = util.snow_depth_from_snow(
+                self.climate_pd['snow'].values,
+                self.climate_pd['snow_depth'].values,
+                self.climate_pd['tmax'].values)
         return True
         # return climate_pd
 
@@ -780,5 +822,53 @@ class ETCell():
             self.climate_pd = self.climate_pd[self.climate_pd.index <= end_dt]
         return True
 
+def read_station_table(file_path, params):
+    """Read a RefET or weather station data file
+
+    Only the columns mapped in the INI file (and columns already named with
+    a field key) are read.  The values are parsed with the pandas C parser
+    and the dates are read as strings and all other fields as floats.
+    Files that can't be read this way (i.e. regular expression delimiters
+    or non-numeric values) are read with the python parser.
+
+    Args:
+        file_path (): file path or buffer of the station data
+            (see station_input.station_source())
+        params (dict): RefET or weather parameters from the INI file
+
+    Returns:
+        pandas data frame with the file column names
+    """
+    # Get list of 0 based line numbers to skip
+    # Ignore header but assume header was set as a 1's based index
+    skiprows = [i for i in range(params['header_lines'])
+                if i + 1 != params['names_line']]
+
+    # Delimiters are read from the INI file without escapes (i.e. "\\t")
+    delimiter = params['delimiter']
+    if delimiter in ['\\t', '\t']:
+        delimiter = '\t'
+    if len(delimiter) == 1:
+        read_columns = set(params['fields'].keys()) | set(
+            name for name in params['fields'].values() if name is not None)
+        dtype = dict(
+            (name, str if key == 'date' else np.float64)
+            for key, name in params['fields'].items()
+            if name is not None and key not in ['year', 'month', 'day'])
+        try:
+            return pd.read_csv(
+                file_path, engine='c', header=params['names_line'] - 1,
+                skiprows=skiprows, sep=delimiter,
+                usecols=lambda x: x in read_columns, dtype=dtype)
+        except (ValueError, TypeError):
+            logging.debug('  Unable to read with the C parser')
+            if hasattr(file_path, 'seek'):
+                file_path.seek(0)
+
+    return pd.read_table(
+        file_path, engine='python', header=params['names_line'] - 1,
+        skiprows=skiprows, delimiter=params['delimiter'])
+
+
 if __name__ == '__main__':
     pass
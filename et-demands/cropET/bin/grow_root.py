@@ -2,16 +2,20 @@ import logging
 import math
 
 
-def grow_root(crop, foo, debug_flag=False):
-    """Determine depth of root zone"""
-
+def root_fraction_time(crop, foo):
+    """Fraction of the root growth period that has elapsed"""
     # dlk - 10/31/2011 - added zero value tests
     fractime = 0
     if crop.curve_type == 1 and crop.end_of_root_growth_fraction_time != 0.0:
         fractime = foo.n_cgdd / crop.end_of_root_growth_fraction_time
     elif crop.curve_type > 1 and crop.end_of_root_growth_fraction_time != 0.0:
         fractime = foo.n_pl_ec / crop.end_of_root_growth_fraction_time
-    fractime = min(max(fractime, 0), 1)
+    return min(max(fractime, 0), 1)
+
+
+def grow_root(crop, foo, debug_flag=False):
+    """Determine depth of root zone"""
+    fractime = root_fraction_time(crop, foo)
 
     # Old linear function
     #zr = initial_rooting_depth() + (maximum_rooting_depth(ctCount) - initial_rooting_depth(ctCount)) * fractime
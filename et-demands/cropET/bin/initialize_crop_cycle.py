@@ -2,11 +2,34 @@ import logging
 
 import numpy as np
 
+import crop_context
+
 # from modCropET.vb
 de_initial = 10.0  # mm initial depletion for first day of crop
 
 
-class InitializeCropCycle:
+class InitializeCropCycle(object):
+    # Crop state is read and written many times per simulated day
+    # Declaring the attributes up front gives fixed slot storage instead of
+    #   an instance __dict__, so new attributes must be added here
+    __slots__ = (
+        'T2Days', 'ad', 'aw', 'aw3', 'cgdd', 'cgdd_at_planting',
+        'cgdd_penalty', 'cn2', 'co2', 'context', 'crop_pd', 'crop_setup_flag',
+        'cum_evap', 'cum_evap_prev', 'cutting', 'cycle', 'density',
+        'depl_root', 'depl_surface', 'depl_ze', 'depl_zep',
+        'dormant_setup_flag', 'doy_start_cycle', 'dperc', 'dperc_ze',
+        'etc_act', 'etc_bas', 'etc_pot', 'etref_30', 'fc', 'fw', 'fw_irr',
+        'fw_spec', 'fw_std', 'gdd', 'gdd_penalty', 'height', 'height_max',
+        'height_min', 'in_season', 'irr_auto', 'irr_flag', 'irr_min',
+        'irr_sim', 'kc_act', 'kc_bas', 'kc_bas_mid', 'kc_bas_prev',
+        'kc_bas_wscc', 'kc_max', 'kc_min', 'kc_pot', 'ke', 'ke_irr', 'ke_ppt',
+        'kr2', 'ks', 'kt_reducer', 'longterm_pl', 'mad', 'mad_ini', 'mad_mid',
+        'max_lines_in_crop_curve_table', 'n_cgdd', 'n_pl_ec', 'niwr',
+        'ppt_inf', 'ppt_inf_prev', 'real_start', 'rew', 's', 's1', 's2', 's3',
+        's4', 'sro', 'stress_event', 'tew', 'tew2', 'tew3', 'totwatin_ze',
+        'water_balance_flag', 'wt_irr', 'z', 'zr', 'zr_max', 'zr_min'
+    )
+
     def __init__(self):
         """Initialize for crops cycle"""
         self.ad = 0.
@@ -86,6 +109,10 @@ class InitializeCropCycle:
         self.dormant_setup_flag = False
         self.crop_setup_flag = True  # flag to setup crop parameter information
 
+        # Set false when the soil water balance is computed outside this object
+        #   so setup_crop() and setup_dormant() only set the phenology values
+        self.water_balance_flag = True
+
         # TP - Looks like its value comes from compute_crop_et(),
         # but needed for setup_dormant() below...
         self.totwatin_ze = 0.
@@ -130,12 +157,22 @@ class InitializeCropCycle:
         # self.kt_prop = 1
         # self.ze = 0.
 
-    def crop_load(self, et_cell, crop):
+    def __getstate__(self):
+        """Slotted objects need explicit state for pickling and copying"""
+        return dict(
+            (k, getattr(self, k)) for k in self.__slots__ if hasattr(self, k))
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    def crop_load(self, data, et_cell, crop):
         """Assign characteristics for crop from crop Arrays
 
         Called by crop_cycle.crop_cycle() just before time loop
 
         Args:
+            data ():
             et_cell ():
             crop ():
         """
@@ -251,6 +288,10 @@ class InitializeCropCycle:
                      '  Setting longerm_pl = 0').format(
                         crop.class_number, et_cell.cell_id))
 
+        # Constants and curve arrays used by the daily kernels
+        self.context = crop_context.CropCellContext(
+            data, et_cell, crop, self.rew)
+
         #
         self.setup_crop(crop)
 
@@ -261,14 +302,23 @@ class InitializeCropCycle:
         Called in crop_cycle if not in season and crop setup flag is true
         Called in kcb_daily for startup/greenup type 1, 2, and 3 when startup conditions are met
         """
-        # zr_dormant was never assigned a value - what's its purpose - dlk 10/26/2011 ???????????????????
-        zr_dormant = 0.0
-
         self.height_min = crop.height_initial
         self.height_max = crop.height_max
         self.zr_min = crop.rooting_depth_initial
         self.zr_max = crop.rooting_depth_max
         self.height = self.height_min
+        if self.water_balance_flag:
+            self.setup_crop_soil_water()
+        self.crop_setup_flag = False
+
+    def setup_crop_soil_water(self):
+        """Initialize the soil water balance for beginning of crop seasons
+
+        Called by setup_crop()
+        """
+        # zr_dormant was never assigned a value - what's its purpose - dlk 10/26/2011 ???????????????????
+        zr_dormant = 0.0
+
         self.tew = self.tew2  # find total evaporable water
         if self.tew < self.tew3:
             self.tew = self.tew3
@@ -323,7 +373,6 @@ class InitializeCropCycle:
             self.depl_root = 0.
         # Initialize rooting depth at beginning of time  <----DO??? Need recalc on Reserve?
         self.zr = self.zr_min
-        self.crop_setup_flag = False
 
     def setup_dormant(self,  et_cell, crop):
         """Start of dormant season
@@ -357,6 +406,21 @@ class InitializeCropCycle:
             self.kc_bas = 0.2    # was 0.3
             self.fc = 0.7     # was 0.6
 
+        if self.water_balance_flag:
+            self.setup_dormant_soil_water(et_cell, crop)
+        self.dormant_setup_flag = False
+
+        # Clear cutting flag (just in case)
+        self.cutting = 0
+
+    def setup_dormant_soil_water(self, et_cell, crop):
+        """Set up the soil water reservoir for the dormant season
+
+        Called by setup_dormant() after fc has been set for the
+          winter surface cover class
+        """
+        wscc = crop.winter_surface_cover_class
+
         # Setup curve number for antecedent II condition for winter covers
         # Crop params dictionary uses crop number as key
         # Don't subtract 1 to convert to an index
@@ -446,26 +510,21 @@ class InitializeCropCycle:
         self.fw_irr = self.fw_std  # fw changed to fw_irr 8/10/06
         self.irr_auto = 0
         self.irr_sim = 0
-        self.dormant_setup_flag = False
 
-        # Clear cutting flag (just in case)
-        self.cutting = 0
+    def setup_dataframe(self, et_cell, output_arrays):
+        """Build output dataframe from the daily output arrays
 
-    def setup_dataframe(self, et_cell):
-        """Initialize output dataframe"""
+        Args:
+            et_cell ():
+            output_arrays (dict): daily output arrays keyed by column name
+        """
         self.crop_pd = et_cell.refet_pd[['doy', 'etref']].copy()
         # self.crop_pd = et_cell.refet_pd[['doy']].copy()
-        self.crop_pd['et_act'] = np.nan
-        self.crop_pd['et_pot'] = np.nan
-        self.crop_pd['et_bas'] = np.nan
-        self.crop_pd['kc_act'] = np.nan
-        self.crop_pd['kc_bas'] = np.nan
-        self.crop_pd['irrigation'] = np.nan
-        self.crop_pd['runoff'] = np.nan
-        self.crop_pd['dperc'] = np.nan
-        self.crop_pd['niwr'] = np.nan
-        self.crop_pd['season'] = 0
-        self.crop_pd['cutting'] = 0
+        for field_name in [
+                'et_act', 'et_pot', 'et_bas', 'kc_act', 'kc_bas',
+                'irrigation', 'runoff', 'dperc', 'niwr', 'season',
+                'cutting']:
+            self.crop_pd[field_name] = output_arrays[field_name]
 
     def setup_co2(self, et_cell, crop):
         """Get the CO2 correction factor dataframe for the target cell/crop
@@ -27,6 +27,11 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
     # Procedure for deciding start and return false of season.
     curve_number = crop.curve_number
 
+    # Kcb curves and refet type flag are looked up once in crop_load()
+    # Curves are interpolated from their precomputed values and slopes
+    context = foo.context
+    kc_curves = context.kc_curves
+
     # Determination of start of season was rearranged April 12 2009 by R.Allen
     # To correct computation error in limiting first and latest starts of season
     #   that caused a complete loss of crop start turnon.
@@ -137,10 +142,11 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                 # Delay start ' set to Doy on 4/29/09 (nuts)
                 foo.doy_start_cycle = foo_day.doy
                 foo.real_start = True     # Harleys Rule
-                logging.debug(
-                    ('kcb_daily(): doy_start_cycle %d  ' +
-                     'It is unseasonably warm (too warm) Harleys Rule') %
-                    (foo.doy_start_cycle))
+                if debug_flag:
+                    logging.debug(
+                        ('kcb_daily(): doy_start_cycle %d  ' +
+                         'It is unseasonably warm (too warm) Harleys Rule') %
+                        (foo.doy_start_cycle))
 
             # Start of season has not yet been determined.
             # Look for it in normal fashion:
@@ -150,9 +156,10 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                     if foo.longterm_pl > 0 and foo_day.doy < (foo.longterm_pl - 40):
                         foo.real_start = False  # too early to start season
                         foo.doy_start_cycle = foo.longterm_pl - 40
-                        logging.debug(
-                            'kcb_daily(): doy_start_cycle %d  Start is too early' %
-                            (foo.doy_start_cycle))
+                        if debug_flag:
+                            logging.debug(
+                                'kcb_daily(): doy_start_cycle %d  Start is too early' %
+                                (foo.doy_start_cycle))
                         if foo.doy_start_cycle < 1:
                             foo.doy_start_cycle += 365
                     else:
@@ -210,7 +217,8 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
             foo.stress_event = False
             foo.dormant_setup_flag = True
             foo.setup_crop(crop)
-        logging.debug('kcb_daily(): in_season %d' % (foo.in_season))
+        if debug_flag:
+            logging.debug('kcb_daily(): in_season %d' % (foo.in_season))
 
     # Flag_for_means_to_estimate_pl_or_gu Case 4
     elif crop.flag_for_means_to_estimate_pl_or_gu == 4:
@@ -219,7 +227,8 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
         if foo_day.doy == crop.gdd_trigger_doy:
             foo.stress_event = False
         foo.dormant_setup_flag = True
-        logging.debug('kcb_daily(): in_season %d' % (foo.in_season))
+        if debug_flag:
+            logging.debug('kcb_daily(): in_season %d' % (foo.in_season))
 
     else:
         logging.error(
@@ -300,11 +309,12 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                         else:  # R.Allen 4/1/08
                             # Increment alfalfa curve to fall/winter cycle
                             curve_number = crop.curve_number + 2
-                        logging.debug(
-                            ('kcb_daily(): dairy_cuttings %d  cycle %d  ' +
-                             'crop_curve_number %d  curve_number %d') %
-                            (et_cell.dairy_cuttings, foo.cycle,
-                             crop.curve_number, curve_number))
+                        if debug_flag:
+                            logging.debug(
+                                ('kcb_daily(): dairy_cuttings %d  cycle %d  ' +
+                                 'crop_curve_number %d  curve_number %d') %
+                                (et_cell.dairy_cuttings, foo.cycle,
+                                 crop.curve_number, curve_number))
                     elif (crop.class_number == 1 or crop.class_number == 3 or
                           (crop.class_number >= 4 and
                            crop.curve_name.upper() == "ALFALFA 1ST CYCLE")):
@@ -319,26 +329,21 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                         else:
                             # increment alfalfa curve to fall/winter cycle
                             curve_number = crop.curve_number + 2
-                        logging.debug(
-                            ('kcb_daily(): beef_cuttings %d  cycle %d  ' +
-                            'crop_curve_number %d  curve_number %d') %
-                            (et_cell.beef_cuttings, foo.cycle,
-                             crop.curve_number, curve_number))
+                        if debug_flag:
+                            logging.debug(
+                                ('kcb_daily(): beef_cuttings %d  cycle %d  ' +
+                                'crop_curve_number %d  curve_number %d') %
+                                (et_cell.beef_cuttings, foo.cycle,
+                                 crop.curve_number, curve_number))
 
             if cgdd_in_season < cgdd_efc:
                 foo.n_cgdd = cgdd_in_season / cgdd_efc
-                int_cgdd = min(
-                    foo.max_lines_in_crop_curve_table - 1,
-                    int(foo.n_cgdd * 10))
-                foo.kc_bas = (
-                    et_cell.crop_coeffs[curve_number].data[int_cgdd] +
-                    (foo.n_cgdd * 10 - int_cgdd) *
-                    (et_cell.crop_coeffs[curve_number].data[int_cgdd+1] -
-                     et_cell.crop_coeffs[curve_number].data[int_cgdd]))
+                foo.kc_bas = kc_curves[curve_number].interpolate(
+                    foo.n_cgdd * 10, foo.max_lines_in_crop_curve_table - 1)
                 if debug_flag:
                     logging.debug(
-                        'kcb_daily(): kcb %.6f  ncumGDD %d  int_cgdd %d' %
-                        (foo.kc_bas, foo.n_cgdd, int_cgdd))
+                        'kcb_daily(): kcb %.6f  ncumGDD %d' %
+                        (foo.kc_bas, foo.n_cgdd))
                     logging.debug(
                         'kcb_daily(): cgdd_in_season %d  cgdd_efc %.6f' %
                         (cgdd_in_season, cgdd_efc))
@@ -367,18 +372,16 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                         foo.max_lines_in_crop_curve_table - 1,
                         int(foo.n_cgdd * 10))
                     foo.mad = foo.mad_mid
-                    lentry = et_cell.crop_coeffs[curve_number].lentry
+                    lentry = kc_curves[curve_number].lentry
                     # more entries in kcb array
                     if int_cgdd < lentry:
-                        foo.kc_bas = (
-                            et_cell.crop_coeffs[curve_number].data[int_cgdd] +
-                            (foo.n_cgdd * 10 - int_cgdd) *
-                            (et_cell.crop_coeffs[curve_number].data[int_cgdd+1] -
-                             et_cell.crop_coeffs[curve_number].data[int_cgdd]))
+                        foo.kc_bas = kc_curves[curve_number].interpolate(
+                            foo.n_cgdd * 10,
+                            foo.max_lines_in_crop_curve_table - 1)
                     else:
                         # Hold kcb equal to last entry until either cumGDD
                         #   terminations exceeded or killing frost
-                        foo.kc_bas = et_cell.crop_coeffs[curve_number].data[lentry]
+                        foo.kc_bas = kc_curves[curve_number].values[lentry]
                     if debug_flag:
                         logging.debug(
                             ('kcb_daily(): kc_bas %.6f  int_cgdd %d  ' +
@@ -390,9 +393,10 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                     #   there is no extension past computed end
                     foo.in_season = False
                     foo.stress_event = False
-                    logging.debug(
-                        'kcb_daily(): curve_type 1  in_season %d' %
-                        (foo.in_season))
+                    if debug_flag:
+                        logging.debug(
+                            'kcb_daily(): curve_type 1  in_season %d' %
+                            (foo.in_season))
 
                     if crop.cutting_crop:
                         # (three curves for cycles, two cumGDD's for first and other cycles)
@@ -405,8 +409,9 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                         # Increment and reset for next cycle
                         foo.cycle += 1
                         foo.in_season = True
-                        logging.debug(
-                            'kcb_daily(): in_season %d' % (foo.in_season))
+                        if debug_flag:
+                            logging.debug(
+                                'kcb_daily(): in_season %d' % (foo.in_season))
                         # Set basis for next cycle
                         foo.cgdd_at_planting = foo.cgdd
 
@@ -414,7 +419,7 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                         #   alfalfa height to minimum each new cycle
                         #   and to set kcb to initial kcb value for first day following cutting.
                         foo.height = foo.height_min
-                        foo.kc_bas = et_cell.crop_coeffs[curve_number].data[0]
+                        foo.kc_bas = kc_curves[curve_number].values[0]
                         if debug_flag:
                             logging.debug(
                                 'kcb_daily(): kc_bas %.6f  cgdd_at_planting %.6f  cutting %d' %
@@ -425,7 +430,8 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                 if (crop.class_number == 1 and data.crop_one_flag):
                     # xxx...apply only if cropOneToggle is set (4/09)
                     foo.kc_bas *= data.crop_one_reducer
-                    logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
+                    if debug_flag:
+                        logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
 
             # Use this here only to invoke a total length limit
             days_into_season = foo_day.doy - foo.doy_start_cycle + 1
@@ -439,8 +445,9 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                 # End season
                 foo.in_season = False  # This section added Jan. 2007
                 foo.stress_event = False
-                logging.debug(
-                    'kcb_daily(): curve_type 1  in_season %d' % (foo.in_season))
+                if debug_flag:
+                    logging.debug(
+                        'kcb_daily(): curve_type 1  in_season %d' % (foo.in_season))
 
         # crop.curve_type Case 2
         elif crop.curve_type == 2:
@@ -449,18 +456,18 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
             if days_into_season < 1:
                 days_into_season += 365
             # Deal with values of zero or null - added Dec. 29, 2011, rga
-            crop.time_for_efc = max(crop.time_for_efc, 1.)
+            time_for_efc = context.time_for_efc
 
             # DEADBEEF - Perform division with singles/float32 to mimic VB code
             if vb_flag:
                 foo.n_pl_ec = float(
                     np.array(days_into_season, dtype=np.float32) /
-                    np.array(crop.time_for_efc, dtype=np.float32))
+                    np.array(time_for_efc, dtype=np.float32))
                 npl_ec100 = float(
                     np.array(days_into_season, dtype=np.float32) /
-                    np.array(crop.time_for_efc, dtype=np.float32) * 100)
+                    np.array(time_for_efc, dtype=np.float32) * 100)
             else:
-                foo.n_pl_ec = float(days_into_season) / crop.time_for_efc
+                foo.n_pl_ec = float(days_into_season) / time_for_efc
                 npl_ec100 = foo.n_pl_ec * 100
 
             if foo.n_pl_ec < 1:
@@ -472,31 +479,27 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
             #   exact value for time_for_harvest() and that it is taking absolute value.
             # Use absolute value for time_for_harvest since neg means to run
             #   until frost (Jan. 2007). also changed to <= from <
-            logging.debug(
-                ('kcb_daily(): npl_ec100 %s  time_for_harvest %.6f  ' +
-                 'abs_time_for_harvest %.6f') %
-                (npl_ec100, crop.time_for_harvest, abs(crop.time_for_harvest)))
+            if debug_flag:
+                logging.debug(
+                    ('kcb_daily(): npl_ec100 %s  time_for_harvest %.6f  ' +
+                     'abs_time_for_harvest %.6f') %
+                    (npl_ec100, crop.time_for_harvest, abs(crop.time_for_harvest)))
             # Reverting code to match VB version.
             # Problem is coming from n_pl_ec and npl_ec100 calculation above
             if npl_ec100 <= abs(crop.time_for_harvest):
             # if round(npl_ec100, 4) <= abs(crop.time_for_harvest):
-                int_pl_ec = min(
-                    foo.max_lines_in_crop_curve_table - 1., int(foo.n_pl_ec * 10.))
-                foo.kc_bas = (
-                    et_cell.crop_coeffs[curve_number].data[int_pl_ec] +
-                    (foo.n_pl_ec * 10. - int_pl_ec) *
-                    (et_cell.crop_coeffs[curve_number].data[int_pl_ec + 1] -
-                     et_cell.crop_coeffs[curve_number].data[int_pl_ec]))
+                foo.kc_bas = kc_curves[curve_number].interpolate(
+                    foo.n_pl_ec * 10., foo.max_lines_in_crop_curve_table - 1)
                 if debug_flag:
                     logging.debug(
                         'kcb_daily(): n_pl_ec0 %d  max_lines_in_crop_curve_table %d' %
                         (foo.n_pl_ec, foo.max_lines_in_crop_curve_table))
                     logging.debug(
-                        'kcb_daily(): kc_bas %.6f  int_pl_ec %d  n_pl_ec %d' %
-                        (foo.kc_bas, int_pl_ec, foo.n_pl_ec))
+                        'kcb_daily(): kc_bas %.6f  n_pl_ec %d' %
+                        (foo.kc_bas, foo.n_pl_ec))
                     logging.debug(
                         'kcb_daily(): days_into_season %d  time_for_EFC %.6f' %
-                        (days_into_season, crop.time_for_efc))
+                        (days_into_season, time_for_efc))
             else:
                 # beyond stated end of season
                 # ------need provision to extend until frost termination
@@ -508,12 +511,14 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                     # use yesterday's kcb which should trace back to
                     # last valid day of stated growing season
                     foo.kc_bas = foo.kc_bas_prev
-                    logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
+                    if debug_flag:
+                        logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
                 else:
                     foo.in_season = False
                     foo.stress_event = False  # reset severe stress event flag
-                    logging.debug(
-                        'kcb_daily(): curve_type 2  in_season %d' % (foo.in_season))
+                    if debug_flag:
+                        logging.debug(
+                            'kcb_daily(): curve_type 2  in_season %d' % (foo.in_season))
 
         # crop.curve_type Case 3
         elif crop.curve_type == 3:
@@ -522,34 +527,30 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
             if days_into_season < 1:
                 days_into_season += 365
             # Deal with values of zero or null - added Dec. 29, 2011, rga
-            crop.time_for_efc = max(crop.time_for_efc, 1.)
+            time_for_efc = context.time_for_efc
 
             # DEADBEEF - Perform division with singles/float32 to mimic VB code
             if vb_flag:
                 foo.n_pl_ec = float((
                     np.array(days_into_season, dtype=np.float32) /
-                    np.array(crop.time_for_efc, dtype=np.float32)))
+                    np.array(time_for_efc, dtype=np.float32)))
             else:
-                foo.n_pl_ec = float(days_into_season) / crop.time_for_efc
+                foo.n_pl_ec = float(days_into_season) / time_for_efc
             # foo.n_pl_ec = float(days_into_season) / crop.time_for_efc
 
             if foo.n_pl_ec < 1:
-                int_pl_ec = min(
-                    int(foo.n_pl_ec * 10.), foo.max_lines_in_crop_curve_table - 1)
-                foo.kc_bas = (
-                    et_cell.crop_coeffs[curve_number].data[int_pl_ec] +
-                    (foo.n_pl_ec * 10 - int_pl_ec) *
-                    (et_cell.crop_coeffs[curve_number].data[int_pl_ec + 1] -
-                     et_cell.crop_coeffs[curve_number].data[int_pl_ec]))
-                logging.debug(
-                    ('kcb_daily(): kc_bas %.6f  n_pl_ec %.6f  ' +
-                     'max_lines_in_crop_curve_table %d  int_pl_ec %d') %
-                    (foo.kc_bas, foo.n_pl_ec,
-                     foo.max_lines_in_crop_curve_table, int_pl_ec))
+                foo.kc_bas = kc_curves[curve_number].interpolate(
+                    foo.n_pl_ec * 10, foo.max_lines_in_crop_curve_table - 1)
+                if debug_flag:
+                    logging.debug(
+                        ('kcb_daily(): kc_bas %.6f  n_pl_ec %.6f  ' +
+                         'max_lines_in_crop_curve_table %d') %
+                        (foo.kc_bas, foo.n_pl_ec,
+                         foo.max_lines_in_crop_curve_table))
                 foo.mad = foo.mad_ini
             else:
                 foo.mad = foo.mad_mid
-                DaysafterEFC = days_into_season - crop.time_for_efc
+                DaysafterEFC = days_into_season - time_for_efc
 
                 # In next line, make sure that "System.Math.Abs()" does not
                 #   change exact value for time_for_harvest() and that it is
@@ -559,17 +560,13 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                 if DaysafterEFC <= abs(crop.time_for_harvest):
                     # Start at array index = 11 for 0 days into full cover
                     nDaysafterEFC = float(DaysafterEFC) / 10 + 11
-                    int_pl_ec = min(
-                        int(nDaysafterEFC), foo.max_lines_in_crop_curve_table - 1)
-                    foo.kc_bas = (
-                        et_cell.crop_coeffs[curve_number].data[int_pl_ec] +
-                        (nDaysafterEFC - int_pl_ec) *
-                        (et_cell.crop_coeffs[curve_number].data[int_pl_ec + 1] -
-                         et_cell.crop_coeffs[curve_number].data[int_pl_ec]))
-                    logging.debug(
-                        ('kcb_daily(): kc_bas %.6f  n_pl_ec %.6f  '
-                         'nDaysafterEFC %.6f  int_pl_ec %.6f') %
-                        (foo.kc_bas, foo.n_pl_ec, nDaysafterEFC, int_pl_ec))
+                    foo.kc_bas = kc_curves[curve_number].interpolate(
+                        nDaysafterEFC, foo.max_lines_in_crop_curve_table - 1)
+                    if debug_flag:
+                        logging.debug(
+                            ('kcb_daily(): kc_bas %.6f  n_pl_ec %.6f  '
+                             'nDaysafterEFC %.6f') %
+                            (foo.kc_bas, foo.n_pl_ec, nDaysafterEFC))
                 elif crop.time_for_harvest < -0.5:
                     # beyond stated end of season
                     # ------need provision to extend until frost termination
@@ -580,13 +577,15 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                     # use yesterday's kcb which should trace back to
                     # last valid day of stated growing season
                     foo.kc_bas = foo.kc_bas_prev
-                    logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
+                    if debug_flag:
+                        logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
                 else:
                     foo.in_season = False
                     foo.stress_event = False  # reset severe stress event flag
-                    logging.debug(
-                        'kcb_daily(): curve_type 3  in_season %d' %
-                        (foo.in_season))
+                    if debug_flag:
+                        logging.debug(
+                            'kcb_daily(): curve_type 3  in_season %d' %
+                            (foo.in_season))
 
         # crop.curve_type Case 4
         elif crop.curve_type == 4:
@@ -637,23 +636,18 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                 foo.mad = foo.mad_mid
 
             if foo.n_pl_ec <= 1:
-                int_pl_ec = min(
-                    foo.max_lines_in_crop_curve_table - 1,
-                    int(foo.n_pl_ec * 10))
-                et_cell.crop_coeffs[curve_number].data[int_pl_ec]
-                foo.kc_bas = (
-                    et_cell.crop_coeffs[curve_number].data[int_pl_ec] +
-                    (foo.n_pl_ec * 10 - int_pl_ec) *
-                    (et_cell.crop_coeffs[curve_number].data[int_pl_ec + 1] -
-                     et_cell.crop_coeffs[curve_number].data[int_pl_ec]))
-                logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
+                foo.kc_bas = kc_curves[curve_number].interpolate(
+                    foo.n_pl_ec * 10, foo.max_lines_in_crop_curve_table - 1)
+                if debug_flag:
+                    logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
             else:
                 # Beyond end of season
                 foo.in_season = False
                 foo.stress_event = False  # reset severe stress event flag
-                logging.debug(
-                    'kcb_daily(): curve_type 4  in_season %d' %
-                    (foo.in_season))
+                if debug_flag:
+                    logging.debug(
+                        'kcb_daily(): curve_type 4  in_season %d' %
+                        (foo.in_season))
         # crop.curve_type end if
 
 
@@ -673,10 +667,12 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                 foo.T2Days = 0 ## Reset discount timer if prior to August
             if foo.T2Days > 0:
                 foo.kc_bas -= foo.T2Days * 0.005  #  was 0.01
-                logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
+                if debug_flag:
+                    logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
                 if foo.kc_bas < 0.1:
                     foo.kc_bas = 0.1
-                    logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
+                    if debug_flag:
+                        logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
                 foo.T2Days += 1
 
         # Determine if killing frost to cut short - begin to check after August 1.
@@ -691,7 +687,8 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
                      foo_day.doy, foo_day.year))
                 foo.in_season = False
                 foo.stress_event = False
-                logging.debug('kcb_daily(): in_season %d' % (foo.in_season))
+                if debug_flag:
+                    logging.debug('kcb_daily(): in_season %d' % (foo.in_season))
 
                 # DEADBEEF - Not currently implemented
                 # # Print cutting information to a review file if alfalfa hay
@@ -769,7 +766,8 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
         elif crop.class_number == 46:
             foo.kc_bas = 0.1  # was 0.3
             # foo.kc_bas_wscc[3] = foo.kc_bas
-        logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
+        if debug_flag:
+            logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
 
     # Open water evaporation "crops"
     #   55: Open water shallow systems (large ponds, streams)
@@ -777,22 +775,15 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
     #   57: Open water small stock ponds
     #   This section for WATER only
     elif crop.class_number in [55, 56, 57]:
-        if crop.class_number == 55:
-            if data.refet['type'] == 'eto':
-                # Note that these values are substantially different from FAO56
-                foo.kc_bas = 1.05
-            elif data.refet['type'] == 'etr':
-                foo.kc_bas = 0.6
-        elif crop.class_number == 56:
+        if crop.class_number == 56:
             # This is a place holder, since an aerodynamic function is used
             # foo.kc_bas = 0.3
             foo.kc_bas = open_water_evap.open_water_evap(et_cell, foo_day)
-        elif crop.class_number == 57:
-            if data.refet['type'] == 'eto':
-                foo.kc_bas = 0.85
-            elif data.refet['type'] == 'etr':
-                foo.kc_bas = 0.7
-        logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
+        else:
+            # Note that these values are substantially different from FAO56
+            foo.kc_bas = context.kc_bas_water
+        if debug_flag:
+            logging.debug('kcb_daily(): kc_bas %.6f' % foo.kc_bas)
 
         # Water has only 'kcb'
         foo.kc_act = foo.kc_bas
@@ -808,9 +799,10 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
     elif (data.co2_flag and
           crop.class_number not in [44, 45, 46, 55, 56, 57]):
         foo.kc_bas *= foo_day.co2
-        logging.debug(
-            ('compute_crop_et(): co2 %.6f  kc_bas %.6f') %
-            (foo_day.co2, foo.kc_bas))
+        if debug_flag:
+            logging.debug(
+                ('compute_crop_et(): co2 %.6f  kc_bas %.6f') %
+                (foo_day.co2, foo.kc_bas))
 
     # Save kcb value for use tomorrow in case curve needs to be extended until frost
     foo.kc_bas_prev = foo.kc_bas
@@ -821,14 +813,13 @@ def kcb_daily(data, et_cell, crop, foo, foo_day,
 
     # RHmin and U2 are computed in ETCell.set_weather_data()
     # Allen 3/26/08
-    if data.refet['type'] == 'eto':
+    if context.eto_flag:
         # ******'12/26/07
         foo.kc_bas = (
             foo.kc_bas + (0.04 * (foo_day.u2 - 2) - 0.004 * (foo_day.rh_min - 45)) *
             (foo.height / 3) ** 0.3)
-        logging.debug(
-            'kcb_daily(): kcb %.6f  u2 %.6f  rh_min %.6f  height %.6f' %
-            (foo.kc_bas, foo_day.u2, foo_day.rh_min, foo.height))
+        if debug_flag:
+            logging.debug(
+                'kcb_daily(): kcb %.6f  u2 %.6f  rh_min %.6f  height %.6f' %
+                (foo.kc_bas, foo_day.u2, foo_day.rh_min, foo.height))
     # ETr basis, therefore, no adjustment to kcb
-    elif data.refet['type'] == 'etr':
-        pass
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 import argparse
+import copy
 import datetime
 import logging
 import multiprocessing as mp
@@ -13,11 +14,22 @@ import pandas as pd
 import crop_et_data
 import crop_cycle
 import et_cell
+import prefetch
+import scheduler
+import shared_weather
 import util
+import weather_cache
+
+
+# Static data of the multiprocessing workers (see init_worker())
+worker_data = None
+worker_cells = None
+worker_weather = None
 
 
 def main(ini_path, log_level=logging.WARNING,
-         debug_flag=False, cal_flag=False, vb_flag=False, mp_procs=1):
+         debug_flag=False, cal_flag=False, vb_flag=False, mp_procs=1,
+         engine='crop', trace_flag=False, shared_flag=False):
     """ Main function for running the Crop ET model
 
     Args:
@@ -26,6 +38,14 @@ def main(ini_path, log_level=logging.WARNING,
         debug_flag (bool): If True, write debug level comments to debug.txt
         vb_flag (bool): If True, mimic calculations in VB version of code
         mp_procs (int): number of cores to use for multiprocessing
+        engine (str): 'crop' to run each crop through its own day loop,
+            'cell' to run all crops of a cell through one day loop,
+            or 'station' to run each crop for all cells of a weather
+            station through one day loop
+        trace_flag (bool): If True, save a daily trace of the crop cycle
+            variables for each cell and crop to the trace folder
+        shared_flag (bool): If True, read the weather data of each station
+            once into shared memory for the multiprocessing workers
 
     Returns:
         None
@@ -40,8 +60,19 @@ def main(ini_path, log_level=logging.WARNING,
     if debug_flag and mp_procs > 1:
         logging.warning('  Debug mode, disabling multiprocessing')
         mp_procs = 1
+    if debug_flag and engine != 'crop':
+        logging.warning('  Debug mode, using crop engine')
+        engine = 'crop'
+    if trace_flag and engine != 'crop':
+        logging.warning('  Trace mode, using crop engine')
+        engine = 'crop'
+    if engine != 'crop':
+        logging.warning('  Using {} engine'.format(engine))
     if mp_procs > 1:
         logging.warning('  Multiprocessing mode, {0} cores'.format(mp_procs))
+    if shared_flag and mp_procs == 1:
+        logging.warning('  Not multiprocessing, ignoring shared weather')
+        shared_flag = False
     if cal_flag:
         logging.warning('  Displaying additional calibration information')
 
@@ -57,6 +88,13 @@ def main(ini_path, log_level=logging.WARNING,
         logger = util.file_logger(
             logger, log_level=logging.DEBUG, output_ws=data.project_ws)
 
+    # Crop traces are written to a trace folder in the project folder
+    if trace_flag:
+        data.trace_ws = os.path.join(data.project_ws, 'trace')
+        logging.warning('  Saving crop traces to: {}'.format(data.trace_ws))
+        if not os.path.isdir(data.trace_ws):
+            os.makedirs(data.trace_ws)
+
     # Growing season summary CSV files must be written
     if cal_flag:
         logging.warning('  Setting growing_season_stats_flag = True')
@@ -68,6 +106,7 @@ def main(ini_path, log_level=logging.WARNING,
     data.set_crop_coeffs()
     if data.co2_flag:
         data.set_crop_co2()
+    data.set_refet_ratios()
 
     # Read in cell properties, crops and cuttings
     # Could these be called directly from the CropETData class
@@ -87,54 +126,79 @@ def main(ini_path, log_level=logging.WARNING,
 
     # Read in spatially varying crop parameters
     if data.spatial_cal_flag:
-        cells.set_spatial_crop_params(data.spatial_cal_ws)
+        cells.set_spatial_crop_params(
+            data.spatial_cal_ws, data.spatial_cal_table)
 
     # Multiprocessing logic
-    # If cell count is low, process crops in parallel
-    # If cell count is high, process cells in parallel (crops in serial)
-    cell_mp_list, cell_mp_flag, crop_mp_flag = [], False, False
+    # The run is split into cell/crop tasks that are dispatched to the
+    #   worker pool longest first (see scheduler.build_tasks())
+    task_list = []
     if mp_procs > 1:
-        logging.warning("\nSetting multiprocessing logic")
-        cell_count = len(cells.et_cells_dict.keys())
-        crop_count = len(cells.crop_num_list)
-        logging.warning('  Cell count: {}'.format(cell_count))
-        logging.warning('  Crop count: {}'.format(crop_count))
-        # The 0.5 multiplier is to prefer multiprocessing by cell
-        # because of 1 CPU time spent loading/processing weather data
-        # when multiprocessing by crop
-        if (0.5 * cell_count) > crop_count:
-            logging.warning("  Multiprocessing by cell")
-            cell_mp_flag = True
-        else:
-            logging.warning("  Multiprocessing by crop")
-            crop_mp_flag = True
+        logging.warning("\nScheduling multiprocessing tasks")
+        logging.warning('  Cell count: {}'.format(
+            len(cells.et_cells_dict.keys())))
+        logging.warning('  Crop count: {}'.format(len(cells.crop_num_list)))
+        task_list = scheduler.build_tasks(
+            data, cells.et_cells_dict, mp_procs, engine, shared_flag)
 
     # Process each cell/station
+    # Don't read ahead in debug mode so the debug log stays in order
+    if debug_flag:
+        prefetch_depth = 0
+    else:
+        prefetch_depth = prefetch.prefetch_depth
+    weather_dict = None
+    if task_list and shared_flag:
+        logging.warning("\nReading weather data into shared memory")
+        weather_dict = shared_weather.share_weather(data, cells.et_cells_dict)
     logging.warning("")
-    for cell_id, cell in sorted(cells.et_cells_dict.items()):
-        if cell_mp_flag:
-            # Multiprocessing by cell
-            cell_mp_list.append([data, cell, vb_flag, mp_procs])
-        elif crop_mp_flag:
-            # Multiprocessing by crop
-            logging.warning('CellID: {}'.format(cell_id))
-            cell.initialize_weather(data)
-            crop_cycle.crop_cycle_mp(data, cell, vb_flag=vb_flag,
-                                     mp_procs=mp_procs)
-        else:
-            logging.warning('CellID: {}'.format(cell_id))
-            cell.initialize_weather(data)
-            crop_cycle.crop_cycle(data, cell, debug_flag=debug_flag,
-                                  vb_flag=vb_flag)
-
-    # Process all cells
-    results = []
-    if cell_mp_list:
-        pool = mp.Pool(mp_procs)
-        results = pool.imap(cell_mp, cell_mp_list, chunksize=1)
+    if task_list:
+        # Idle workers pull the next task from the pool, one at a time
+        # The static data and cells are only sent once to each worker,
+        #   the tasks are just the cell IDs and crop numbers
+        task_mp_list = [
+            [task.cell_id_list, task.crop_num_list, vb_flag, mp_procs, engine]
+            for task in task_list]
+        pool = mp.Pool(
+            mp_procs, initializer=init_worker,
+            initargs=(data, cells, weather_dict))
+        results = pool.imap_unordered(task_mp, task_mp_list, chunksize=1)
         pool.close()
         pool.join()
         del pool, results
+    elif engine == 'station':
+        # Group the cells by weather station
+        station_cells = {}
+        for cell_id, cell in sorted(cells.et_cells_dict.items()):
+            station_cells.setdefault(cell.refet_id, []).append(cell)
+
+        # The weather of the next stations is read in a background thread
+        def station_weather(cell_list):
+            for cell in cell_list:
+                cell.initialize_weather(data)
+
+        for cell_list in prefetch.prefetch(
+                [cell_list for refet_id, cell_list in
+                 sorted(station_cells.items())],
+                station_weather, depth=prefetch_depth):
+            station_sp(data, cell_list, vb_flag, weather_flag=False)
+        del station_cells
+    else:
+        # Process the cells grouped by station to reuse the cached weather
+        # The weather of the next cells is read in a background thread
+        cell_list = [
+            cell for cell_id, cell in sorted(
+                cells.et_cells_dict.items(),
+                key=lambda x: (x[1].refet_id, x[0]))]
+        for cell in prefetch.prefetch(
+                cell_list, lambda cell: cell.initialize_weather(data),
+                depth=prefetch_depth):
+            logging.warning('CellID: {}'.format(cell.cell_id))
+            if engine == 'cell':
+                crop_cycle.crop_cycle_cell(data, cell, vb_flag=vb_flag)
+            else:
+                crop_cycle.crop_cycle(data, cell, debug_flag=debug_flag,
+                                      vb_flag=vb_flag)
 
     logging.info('\n{} seconds'.format(clock()-clock_start))
 
@@ -170,29 +234,84 @@ def main(ini_path, log_level=logging.WARNING,
                         crop=crop_num, start_dt=gs_start_dt, end_dt=gs_end_dt))
 
 
-def cell_mp(tup):
+def init_worker(data, cells, weather_dict=None):
+    """Pool initializer, keep the static data for all tasks of the worker
+
+    Args:
+        data (): CropETData object
+        cells (): ETCellData object
+        weather_dict (dict): SharedWeather objects by climate key,
+            None if the workers read the weather data
+    """
+    global worker_data, worker_cells, worker_weather
+    worker_data = data
+    worker_cells = cells
+    worker_weather = weather_dict
+
+
+def task_mp(tup):
     """Pool multiprocessing friendly function
 
     mp.Pool needs all inputs are packed into a single tuple
     Tuple is unpacked and and single processing version of function is called
+    The data and cells are set once for each worker by init_worker()
 
     Args:
-        data ():
-        et_cell ():
+        cell_id_list (list): ET cell IDs with the same refet_id
+        crop_num_list (list): crop numbers to run, None for all active crops
         vb_flag (bool): If True, mimic calculations in VB version of code
+        mp_procs (int): number of cores to use for multiprocessing
+        engine (str): crop cycle engine name
     """
-    return cell_sp(*tup)
+    cell_id_list, crop_num_list, vb_flag, mp_procs, engine = tup
+    # Copy the cells so the weather read by the task isn't kept by the worker
+    cell_list = [
+        copy.copy(worker_cells.et_cells_dict[cell_id])
+        for cell_id in cell_id_list]
+    if worker_weather is not None:
+        for cell in cell_list:
+            worker_weather[weather_cache.climate_key(cell)].attach(cell)
+    return task_sp(
+        worker_data, cell_list, crop_num_list, vb_flag, mp_procs, engine,
+        weather_flag=worker_weather is None)
+
+
+def task_sp(data, cell_list, crop_num_list, vb_flag, mp_procs=1,
+            engine='crop', weather_flag=True):
+    """Compute crop cycle for a scheduler task"""
+    if engine == 'station':
+        station_sp(data, cell_list, vb_flag, mp_procs, weather_flag)
+        return
+    cell = cell_list[0]
+    if crop_num_list is None:
+        print('CellID: {}'.format(cell.cell_id))
+    else:
+        print('CellID: {}  Crops: {}'.format(
+            cell.cell_id, ', '.join(map(str, crop_num_list))))
+    if weather_flag:
+        cell.initialize_weather(data)
+    if engine == 'cell':
+        crop_cycle.crop_cycle_cell(
+            data, cell, vb_flag=vb_flag, crop_num_list=crop_num_list)
+    else:
+        # Force debug_flag false when multiprocessing
+        crop_cycle.crop_cycle(
+            data, cell, debug_flag=False, vb_flag=vb_flag,
+            mp_procs=mp_procs, crop_num_list=crop_num_list)
 
-def cell_sp(data, cell, vb_flag, mp_procs=1):
-    """Compute crop cycle for each cell"""
+
+def station_sp(data, cell_list, vb_flag, mp_procs=1, weather_flag=True):
+    """Compute crop cycle for all cells of a weather station"""
     if mp_procs == 1:
-        logging.warning('CellID: {}'.format(cell.cell_id))
+        logging.warning('RefET ID: {}'.format(cell_list[0].refet_id))
     else:
-        print('CellID: {}'.format(cell.cell_id))
-    cell.initialize_weather(data)
-    # Force debug_flag false when multiprocessing
-    crop_cycle.crop_cycle(data, cell, debug_flag=False, vb_flag=vb_flag,
-                          mp_procs=mp_procs)
+        print('RefET ID: {}'.format(cell_list[0].refet_id))
+    for cell in cell_list:
+        if mp_procs == 1:
+            logging.warning('CellID: {}'.format(cell.cell_id))
+        if weather_flag:
+            cell.initialize_weather(data)
+    crop_cycle.crop_cycle_station(data, cell_list, vb_flag=vb_flag)
 
 
 def is_valid_file(parser, arg):
@@ -234,6 +353,16 @@ def parse_args():
     parser.add_argument(
         '--cal', action='store_true', default=False,
         help="Display mean annual start/end dates to screen")
+    parser.add_argument(
+        '--engine', default='crop', choices=['crop', 'cell', 'station'],
+        help=("Run each crop separately, all crops of a cell together, " +
+              "or each crop for all cells of a station together"))
+    parser.add_argument(
+        '--trace', action='store_true', default=False,
+        help="Save daily crop cycle variables to the trace folder")
+    parser.add_argument(
+        '--shared', action='store_true', default=False,
+        help="Read the weather data once into memory shared by the cores")
     args = parser.parse_args()
 
     # Convert INI path to an absolute path if necessary
@@ -246,4 +375,6 @@ if __name__ == '__main__':
     args = parse_args()
 
     main(ini_path=args.ini, log_level=args.log_level, debug_flag=args.debug,
-         cal_flag=args.cal, vb_flag=args.vb, mp_procs=args.multiprocessing)
+         cal_flag=args.cal, vb_flag=args.vb, mp_procs=args.multiprocessing,
+         engine=args.engine, trace_flag=args.trace,
+         shared_flag=args.shared)
@@ -9,7 +9,7 @@ def open_water_evap(cell, foo_day):
     Called by kcb_daily.kcb_daily()
     Air pressure was coming from foo.pressure,
         but foo.pressure is initialized to 0 and never computed
-    Air pressure is now computed once in et_cell.init_properties_from_row()
+    Air pressure is now computed once in ETCellData.set_properties()
         for each station/cell
 
     """
@@ -0,0 +1,84 @@
+import sys
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# Number of items that are loaded ahead of the item being processed
+prefetch_depth = 2
+
+# Re-raise an exception from sys.exc_info() with its original traceback
+# The three argument raise is a syntax error in Python 3
+if sys.version_info[0] >= 3:
+    def reraise(exc_type, exc_value, exc_tb):
+        raise exc_value.with_traceback(exc_tb)
+else:
+    exec('def reraise(exc_type, exc_value, exc_tb):\n'
+         '    raise exc_type, exc_value, exc_tb\n')
+
+
+def prefetch(item_list, load_func, depth=prefetch_depth):
+    """Load the items in a background thread ahead of the consumer
+
+    The items are loaded in order by a single thread, so the weather
+    caches (see weather_cache.py) are only used by one thread and
+    cells of the same station still reuse the cached station data.
+    The queue depth limits the number of loaded items held in memory.
+
+    Args:
+        item_list (list): items to load (i.e. ETCell objects)
+        load_func (function): function that loads an item
+        depth (int): number of items to load ahead,
+            if less than 1 the items are loaded without a thread
+
+    Yields:
+        items in order after load_func has been called on them
+    """
+    if depth < 1:
+        for item in item_list:
+            load_func(item)
+            yield item
+        return
+
+    item_queue = queue.Queue(maxsize=depth)
+    stop_event = threading.Event()
+
+    def put(value):
+        # Stop waiting for space in the queue if the consumer has stopped
+        while not stop_event.is_set():
+            try:
+                item_queue.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for item in item_list:
+                load_func(item)
+                if not put((item, None)):
+                    return
+        except BaseException:
+            # Errors (including sys.exit()) are raised by the consumer
+            #   with the traceback of the loader thread
+            put((None, sys.exc_info()))
+            return
+        put((None, None))
+
+    thread = threading.Thread(target=producer)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, exc_info = item_queue.get()
+            if exc_info is not None:
+                reraise(*exc_info)
+            elif item is None:
+                break
+            yield item
+    finally:
+        stop_event.set()
+        thread.join()
@@ -6,26 +6,12 @@ def runoff(foo, foo_day, debug_flag=False):
     # logging.debug('runoff()')
 
     # Bring in CNII for antecedent condition II from crop-soil combination
-    # Check to insure CNII is within limits
-    CNII = min(max(foo.cn2, 10), 100)
-
-    # Compute CN's for other antecedent conditions
-    # Hawkins et al., 1985, ASCE Irr.Drn. 11(4):330-340
-    CNI = CNII / (2.281 - 0.01281 * CNII)
-    CNIII = CNII / (0.427 + 0.00573 * CNII)
-
-    # Determine antecedent condition
-    # Presume that AWCIII is quite moist (when only 1/2 of REW is evaporated)
-    # Be sure that REW and TEW are shared
-    AWCIII = 0.5 * foo.rew
-
-    # Presume that dry AWCI condition occurs somewhere between REW and TEW
-    AWCI = 0.7 * foo.rew + 0.3 * foo.tew
+    # CNI and CNIII for the other antecedent conditions and
+    #   the AWCI and AWCIII soil moisture limits only depend on CNII and TEW
+    #   and are computed once per crop and cell (see crop_context.py)
+    CNI, CNIII, AWCI, AWCIII = foo.context.runoff_constants(foo.cn2, foo.tew)
 
     # Value for CN adjusted for soil moisture
-    # Make sure AWCI>AWCIII
-    if AWCI <= AWCIII:
-        AWCI = AWCIII + 0.01
     if foo.depl_surface < AWCIII:
         cn = CNIII
     else:
@@ -46,8 +32,9 @@ def runoff(foo, foo_day, debug_flag=False):
 
     # If irrigations are automatically scheduled, base runoff on an average of
     #   conditions for prior four days to smooth results.
-    logging.debug('runoff(): SRO %.6f  irr_flag %d  S %.6f' % (
-        foo.sro, foo.irr_flag, foo.s))
+    if debug_flag:
+        logging.debug('runoff(): SRO %.6f  irr_flag %d  S %.6f' % (
+            foo.sro, foo.irr_flag, foo.s))
     if foo.irr_flag:
         # Initial abstraction
         ppt_net4 = max(foo_day.precip - 0.2 * foo.s4, 0)
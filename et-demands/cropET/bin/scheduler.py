@@ -0,0 +1,249 @@
+import heapq
+import logging
+import os
+
+import station_input
+
+# Relative cost of simulating one day of a crop
+# Open water "crops" don't have a soil water balance and the bare soil,
+#   mulch and dormant turf covers (44-46) don't have a Kcb curve
+water_crop_cost = 0.5
+cover_crop_cost = 0.8
+cutting_crop_cost = 1.2
+crop_cost = 1.0
+
+# Relative cost of reading and processing one byte of the RefET file
+#   (one simulated crop day costs about 100 bytes of weather)
+weather_byte_cost = 0.01
+
+
+class CropETTask(object):
+    """Unit of work for the multiprocessing pool
+
+    Attributes:
+        cell_id_list (list): ET cell IDs, all with the same weather station
+        crop_num_list (list): crop numbers to run, None for all active crops
+        cost (float): estimated relative cost of the task
+    """
+    __slots__ = ('cell_id_list', 'crop_num_list', 'cost')
+
+    def __init__(self, cell_id_list, crop_num_list, cost):
+        """ """
+        self.cell_id_list = cell_id_list
+        self.crop_num_list = crop_num_list
+        self.cost = cost
+
+
+def crop_day_cost(crop):
+    """Relative cost of simulating one day of a crop
+
+    Args:
+        crop (): CropParameters object
+
+    Returns:
+        float
+    """
+    if crop.class_number in [55, 56, 57]:
+        return water_crop_cost
+    elif crop.class_number in [44, 45, 46]:
+        return cover_crop_cost
+    elif crop.cutting_crop:
+        return cutting_crop_cost
+    else:
+        return crop_cost
+
+
+def refet_record_length(data, refet_id):
+    """Estimate the number of days and the size of a RefET file
+
+    The file is not read, the number of days is estimated from the length
+    of the first data lines and is limited to the INI start and end dates.
+    For consolidated input files the station lines are counted in the
+    station index (see station_input.py).
+
+    Args:
+        data (): CropETData object
+        refet_id (str): RefET station ID
+
+    Returns:
+        tuple of the number of days and the file size in bytes
+    """
+    refet_path = station_input.station_path(data.refet, refet_id)
+    if data.refet.get('station_field'):
+        # The number of lines of a station in a consolidated file is known
+        #   after the file is indexed
+        try:
+            days, file_size = station_input.station_index(
+                refet_path, data.refet).station_size(refet_id)
+        except (IOError, OSError, ValueError):
+            return 0, 0
+        if data.start_dt is not None and data.end_dt is not None:
+            days = min(days, (data.end_dt - data.start_dt).days + 1)
+        return days, file_size
+    try:
+        file_size = os.path.getsize(refet_path)
+        with open(refet_path, 'r') as f:
+            line_list = [
+                f.readline() for i in range(data.refet['header_lines'] + 10)]
+    except (IOError, OSError):
+        # Missing files are reported when the cell weather is read
+        return 0, 0
+    line_list = [
+        l for l in line_list[data.refet['header_lines']:] if l.strip()]
+    if not line_list:
+        return 0, file_size
+    line_size = float(sum(len(l) for l in line_list)) / len(line_list)
+    days = int(file_size / line_size)
+    if data.start_dt is not None and data.end_dt is not None:
+        days = min(days, (data.end_dt - data.start_dt).days + 1)
+    return days, file_size
+
+
+def split_crops(crop_costs, split_count):
+    """Split the crops of a cell into groups with similar costs
+
+    Crops are added longest first to the group with the lowest cost
+
+    Args:
+        crop_costs (list): tuples of the crop number and crop cost
+        split_count (int): number of groups
+
+    Returns:
+        list of tuples of the group cost and list of crop numbers
+    """
+    group_list = [[0., []] for i in range(split_count)]
+    for crop_num, cost in sorted(crop_costs, key=lambda x: (-x[1], x[0])):
+        group = min(group_list, key=lambda g: g[0])
+        group[0] += cost
+        group[1].append(crop_num)
+    return [(cost, sorted(crop_nums)) for cost, crop_nums in group_list
+            if crop_nums]
+
+
+def lpt_makespan(cost_list, mp_procs):
+    """Estimate the run time of the tasks dispatched longest first
+
+    Args:
+        cost_list (list): task costs
+        mp_procs (int): number of worker processes
+
+    Returns:
+        float of the cost of the busiest worker
+    """
+    proc_costs = [0.] * mp_procs
+    for cost in sorted(cost_list, reverse=True):
+        heapq.heapreplace(proc_costs, proc_costs[0] + cost)
+    return max(proc_costs)
+
+
+def build_tasks(data, et_cells_dict, mp_procs, engine='crop',
+                shared_flag=False):
+    """Split the run into tasks sorted by estimated cost, longest first
+
+    Each cell is a task unless splitting the crops of the cell into several
+    tasks shortens the estimated run time.  Each piece is charged the cost
+    of reading the cell weather, so cells are only split when there are
+    fewer (or more uneven) cells than worker processes.
+    The station engine tasks are all of the cells of a weather station
+    and are never split.
+
+    The tasks should be dispatched one at a time (i.e. chunksize=1)
+    so that idle workers pick up the remaining tasks.
+
+    Args:
+        data (): CropETData object
+        et_cells_dict (dict): ETCell objects by cell ID
+        mp_procs (int): number of worker processes
+        engine (str): crop cycle engine name
+        shared_flag (bool): If True, the weather data is read before the
+            tasks are run (see shared_weather.py) and is not a task cost
+
+    Returns:
+        list of CropETTask objects
+    """
+    # The record length and weather cost only depend on the station
+    station_length = {}
+    cell_costs = []
+    for cell_id, cell in sorted(et_cells_dict.items()):
+        if cell.refet_id not in station_length.keys():
+            station_length[cell.refet_id] = refet_record_length(
+                data, cell.refet_id)
+        days, file_size = station_length[cell.refet_id]
+        crop_costs = [
+            (crop_num, days * crop_day_cost(crop))
+            for crop_num, crop in sorted(cell.crop_params.items())
+            if cell.crop_flags[crop_num] != 0]
+        if shared_flag:
+            weather_cost = 0.
+        else:
+            weather_cost = weather_byte_cost * file_size
+        cell_costs.append((cell_id, cell.refet_id, weather_cost, crop_costs))
+
+    task_list = []
+    if engine == 'station':
+        station_tasks = {}
+        for cell_id, refet_id, weather_cost, crop_costs in cell_costs:
+            task = station_tasks.setdefault(
+                refet_id, CropETTask([], None, 0.))
+            task.cell_id_list.append(cell_id)
+            task.cost += weather_cost + sum(c for n, c in crop_costs)
+        task_list = list(station_tasks.values())
+    else:
+        # Start with one task per cell and keep splitting the cell with the
+        #   most expensive pieces, keeping the split with the shortest
+        #   estimated run time
+        # Stop once a few more splits have not shortened the run time
+        split_counts = [1] * len(cell_costs)
+        cell_pieces = [
+            [weather_cost + sum(c for n, c in crop_costs)]
+            for cell_id, refet_id, weather_cost, crop_costs in cell_costs]
+        best_time = lpt_makespan(
+            [c for pieces in cell_pieces for c in pieces], mp_procs)
+        best_counts = list(split_counts)
+        miss_count = 0
+        while miss_count < mp_procs:
+            split_list = [
+                cell_i for cell_i in range(len(cell_costs))
+                if split_counts[cell_i] < min(
+                    len(cell_costs[cell_i][3]), mp_procs)]
+            if not split_list:
+                break
+            cell_i = max(split_list, key=lambda i: max(cell_pieces[i]))
+            split_counts[cell_i] += 1
+            weather_cost, crop_costs = cell_costs[cell_i][2:]
+            cell_pieces[cell_i] = [
+                weather_cost + cost for cost, crop_num_list in
+                split_crops(crop_costs, split_counts[cell_i])]
+            split_time = lpt_makespan(
+                [c for pieces in cell_pieces for c in pieces], mp_procs)
+            if split_time < best_time:
+                best_time = split_time
+                best_counts = list(split_counts)
+                miss_count = 0
+            else:
+                miss_count += 1
+
+        for cell_i, (cell_id, refet_id, weather_cost, crop_costs) in \
+                enumerate(cell_costs):
+            if best_counts[cell_i] == 1:
+                task_list.append(CropETTask(
+                    [cell_id], None,
+                    weather_cost + sum(c for n, c in crop_costs)))
+                continue
+            for cost, crop_num_list in split_crops(
+                    crop_costs, best_counts[cell_i]):
+                task_list.append(CropETTask(
+                    [cell_id], crop_num_list, weather_cost + cost))
+
+    # Longest first, then grouped by station for the worker weather caches
+    task_list = sorted(task_list, key=lambda t: (
+        -t.cost, et_cells_dict[t.cell_id_list[0]].refet_id,
+        t.cell_id_list, t.crop_num_list or []))
+    logging.warning('  Task count: {}'.format(len(task_list)))
+    for task in task_list:
+        logging.info('  Cells: {}  Crops: {}  Cost: {:.0f}'.format(
+            ', '.join(task.cell_id_list),
+            'all' if task.crop_num_list is None else
+            ', '.join(map(str, task.crop_num_list)),
+            task.cost))
+    return task_list
@@ -0,0 +1,139 @@
+import copy
+import ctypes
+import logging
+from multiprocessing import sharedctypes
+
+import numpy as np
+import pandas as pd
+
+import weather_cache
+
+# ETCell data frames that are shared with the multiprocessing workers
+weather_frames = ['refet_pd', 'weather_pd', 'climate_pd']
+
+
+def share_weather(data, et_cells_dict):
+    """Read the weather data of each station once into shared memory
+
+    This must be called before the multiprocessing pool is started,
+    the SharedWeather objects are then passed to the pool initializer.
+
+    Args:
+        data (): CropETData object
+        et_cells_dict (dict): ETCell objects by cell ID
+
+    Returns:
+        dict of SharedWeather objects by climate key
+            (see weather_cache.climate_key())
+    """
+    weather_dict = {}
+    for cell_id, cell in sorted(
+            et_cells_dict.items(), key=lambda x: (x[1].refet_id, x[0])):
+        key = weather_cache.climate_key(cell)
+        if key in weather_dict.keys():
+            continue
+        logging.warning('  RefET ID: {}  CellID: {}'.format(
+            cell.refet_id, cell_id))
+        # Read the weather into a copy so the cell view doesn't keep it
+        weather_cell = copy.copy(cell)
+        weather_cell.initialize_weather(data)
+        weather_dict[key] = SharedWeather(weather_cell)
+        del weather_cell
+
+    # Don't copy the cached weather data frames to the workers
+    weather_cache.clear()
+    return weather_dict
+
+
+class SharedFrame(object):
+    """Numeric data frame with the float columns in shared memory
+
+    The float columns are stored in a single RawArray that becomes the
+    float block of the data frame without a copy.  The other numeric
+    columns (DOY, month, etc.) are small and are copied to each worker.
+    Non-numeric columns are not used by the crop cycle and are dropped.
+
+    Attributes:
+        index (RawArray): datetime index as int64 nanoseconds
+        index_name (str): name of the index
+        float_columns (list): names of the float columns
+        float_values (RawArray): float column values [column, day]
+        other_columns (list): tuples of the name and values of the
+            other numeric columns
+    """
+
+    def __init__(self, df):
+        """Copy the numeric columns of a data frame into shared memory
+
+        Args:
+            df (): pandas data frame with a datetime index
+        """
+        self.index_name = df.index.name
+        self.index = sharedctypes.RawArray(ctypes.c_int64, len(df.index))
+        np.frombuffer(self.index, dtype=np.int64)[:] = (
+            df.index.values.astype('datetime64[ns]').view(np.int64))
+
+        self.float_columns = [
+            c for c in df.columns if df[c].dtype == np.float64]
+        self.other_columns = [
+            (c, df[c].values.copy()) for c in df.columns
+            if (df[c].dtype != np.float64 and
+                np.issubdtype(df[c].dtype, np.number))]
+        self.float_values = sharedctypes.RawArray(
+            ctypes.c_double, len(self.float_columns) * len(df.index))
+        if self.float_columns:
+            self.values()[:] = df[self.float_columns].values.T
+
+    def values(self):
+        """NumPy view of the shared float values [column, day]"""
+        return np.frombuffer(self.float_values, dtype=np.float64).reshape(
+            len(self.float_columns), len(self.index))
+
+    def frame(self):
+        """Build the data frame on top of the shared memory
+
+        Returns:
+            pandas data frame
+        """
+        index = pd.DatetimeIndex(
+            np.frombuffer(self.index, dtype=np.int64).view('datetime64[ns]'),
+            name=self.index_name)
+        df = pd.DataFrame(
+            self.values().T, index=index, columns=self.float_columns,
+            copy=False)
+        for column, values in self.other_columns:
+            df[column] = values
+        return df
+
+
+class SharedWeather(object):
+    """Weather data frames and climate arrays of one climate key
+
+    Attributes:
+        frames (dict): SharedFrame objects by ETCell attribute name
+        climate (dict): long term climate arrays (see process_climate())
+    """
+
+    def __init__(self, et_cell):
+        """Share the weather of a cell after initialize_weather()
+
+        Args:
+            et_cell (): ETCell object
+        """
+        self.frames = dict(
+            (name, SharedFrame(getattr(et_cell, name)))
+            for name in weather_frames)
+        self.climate = et_cell.climate
+
+    def attach(self, et_cell):
+        """Set the weather data frames and climate arrays of a cell
+
+        The data frames are views of the shared memory and must not be
+        modified in place.
+
+        Args:
+            et_cell (): ETCell object
+        """
+        for name, shared_frame in self.frames.items():
+            setattr(et_cell, name, shared_frame.frame())
+        et_cell.climate = self.climate
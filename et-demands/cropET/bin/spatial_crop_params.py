@@ -0,0 +1,215 @@
+import os
+import re
+import struct
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+cell_id_field = 'CELL_ID'
+# Crop number field of the consolidated cell/crop parameter table
+crop_num_field = 'CROP_NUM'
+crop_dbf_re = re.compile('crop_\d{2}_\w+.dbf$', re.I)
+
+# DEADBEEF - This really shouldn't be hard coded here
+# Dictionary to convert shapefile field names to crop parameters
+param_field_dict = {
+    'Name':      'name',
+    'ClassNum':  'class_number',
+    'IsAnnual':  'is_annual',
+    'IrrigFlag': 'irrigation_flag',
+    'IrrigDays': 'days_after_planting_irrigation',
+    'Crop_FW':   'crop_fw',
+    'WinterCov': 'winter_surface_cover_class',
+    'CropKcMax': 'kc_max',
+    'MAD_Init':  'mad_initial',
+    'MAD_Mid':   'mad_midseason',
+    'RootDepIni':'rooting_depth_initial',
+    'RootDepMax':'rooting_depth_max',
+    'EndRootGrw':'end_of_root_growth_fraction_time',
+    'HeightInit':'height_initial',
+    'HeightMax': 'height_max',
+    'CurveNum':  'curve_number',
+    'CurveName': 'curve_name',
+    'CurveType': 'curve_type',
+    'PL_GU_Flag':'flag_for_means_to_estimate_pl_or_gu',
+    'T30_CGDD':  't30_for_pl_or_gu_or_cgdd',
+    'PL_GU_Date':'date_of_pl_or_gu',
+    'CGDD_Tbase':'tbase',
+    'CGDD_EFC':  'cgdd_for_efc',
+    'CGDD_Term': 'cgdd_for_termination',
+    'Time_EFC':  'time_for_efc',
+    'Time_Harv': 'time_for_harvest',
+    'KillFrostC':'killing_frost_temperature',
+    'InvokeStrs':'invoke_stress',
+    'CN_Coarse': 'cn_coarse_soil',
+    'CN_Medium': 'cn_medium_soil',
+    'CN_Fine':   'cn_fine_soil'}
+# Cuttings values can also be updated spatially
+cutting_field_dict = {
+    'Beef_Cut':  'beef_cuttings',
+    'Dairy_Cur': 'dairy_cuttings'}
+
+
+def crop_dbf_paths(calibration_ws):
+    """Find the crop parameter shapefile DBFs in a folder
+
+    Args:
+        calibration_ws (str): spatial calibration folder path
+
+    Returns:
+        dict of DBF paths by crop number
+    """
+    return dict([
+        (int(item.split('_')[1]), os.path.join(calibration_ws, item))
+        for item in os.listdir(calibration_ws)
+        if crop_dbf_re.match(item)])
+
+
+def text_values(values):
+    """Strip a byte string array and decode it to text (Python 3 only)"""
+    values = np.char.strip(values)
+    if sys.version_info[0] >= 3:
+        values = np.char.decode(values, 'latin-1')
+    return values
+
+
+def float_values(values):
+    """Convert an array of numbers or number strings to floats
+
+    Values that can't be converted are set to NaN
+
+    Args:
+        values (): numpy array
+
+    Returns:
+        numpy float array
+    """
+    if values.dtype.kind == 'f':
+        return values
+    try:
+        return values.astype(np.float64)
+    except (TypeError, ValueError):
+        pass
+    output = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            output[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return output
+
+
+def read_dbf_columns(dbf_path):
+    """Read the fields of a dBASE file into column arrays
+
+    All of the records are read with a single NumPy structured array,
+    then each field is converted as a whole column.
+    Numeric (N, F) fields are floats with NaN for missing values
+        (N fields without decimals are truncated like pyshp does),
+    logical (L) fields are 1.0, 0.0 or NaN,
+    and all other fields are stripped strings.
+
+    Args:
+        dbf_path (str): file path of the DBF
+
+    Returns:
+        OrderedDict of numpy arrays by field name
+    """
+    with open(dbf_path, 'rb') as dbf_f:
+        dbf_bytes = dbf_f.read()
+    record_count, header_size, record_size = struct.unpack(
+        '<IHH', dbf_bytes[4:12])
+
+    # Field descriptors are 32 bytes each and end with a carriage return
+    field_list = []
+    for offset in range(32, header_size - 1, 32):
+        if dbf_bytes[offset:offset + 1] == b'\r':
+            break
+        field_name = dbf_bytes[offset:offset + 11].split(b'\0')[0]
+        if sys.version_info[0] >= 3:
+            field_name = field_name.decode('latin-1')
+        field_type = dbf_bytes[offset + 11:offset + 12].decode('ascii')
+        field_size, field_decimals = struct.unpack(
+            'BB', dbf_bytes[offset + 16:offset + 18])
+        field_list.append(
+            (str(field_name), field_type.upper(), field_size, field_decimals))
+
+    # Each record starts with the deletion flag
+    field_offsets = np.cumsum([1] + [size for n, t, size, d in field_list])
+    record_dtype = np.dtype({
+        'names': ['DeletionFlag'] + [name for name, t, s, d in field_list],
+        'formats': ['S1'] + [
+            'S{}'.format(size) for n, t, size, d in field_list],
+        'offsets': [0] + list(field_offsets[:-1]),
+        'itemsize': record_size})
+    record_count = min(
+        record_count, (len(dbf_bytes) - header_size) // record_size)
+    record_array = np.frombuffer(
+        dbf_bytes, dtype=record_dtype, count=record_count, offset=header_size)
+    record_array = record_array[record_array['DeletionFlag'] != b'*']
+
+    column_dict = OrderedDict()
+    for name, field_type, size, decimals in field_list:
+        values = record_array[name]
+        if field_type in ['N', 'F']:
+            # QGIS writes missing values as all '*' characters
+            values = np.char.strip(np.char.replace(values, b'*', b''))
+            values[values == b''] = b'nan'
+            values = float_values(values)
+            if field_type == 'N' and decimals == 0:
+                values = np.trunc(values)
+        elif field_type == 'L':
+            values = np.char.upper(np.char.strip(values))
+            values = np.where(
+                np.in1d(values, [b'T', b'Y']), 1.0,
+                np.where(np.in1d(values, [b'F', b'N']), 0.0, np.nan))
+        else:
+            values = text_values(values)
+        column_dict[name] = values
+    return column_dict
+
+
+def read_table_columns(table_path):
+    """Read a consolidated cell/crop parameter table into column arrays
+
+    The table has one row per cell and crop, with CELL_ID and CROP_NUM
+    fields and the same parameter fields as the crop shapefiles.
+    DBF, comma separated (.csv), or tab separated files can be read.
+
+    Args:
+        table_path (str): file path of the table
+
+    Returns:
+        OrderedDict of numpy arrays by field name
+    """
+    if table_path.lower().endswith('.dbf'):
+        return read_dbf_columns(table_path)
+    elif table_path.lower().endswith('.csv'):
+        table_pd = pd.read_csv(table_path, dtype=str)
+    else:
+        table_pd = pd.read_table(table_path, dtype=str)
+    return OrderedDict(
+        (str(field).strip(), table_pd[field].fillna('').str.strip().values)
+        for field in table_pd.columns)
+
+
+def crop_columns(column_dict):
+    """Split a consolidated table into the columns of each crop
+
+    Args:
+        column_dict (dict): table column arrays by field name
+
+    Returns:
+        dict of column dictionaries by crop number
+    """
+    crop_nums = float_values(column_dict[crop_num_field])
+    crop_dict = {}
+    for crop_num in np.unique(crop_nums[np.isfinite(crop_nums)]):
+        crop_mask = crop_nums == crop_num
+        crop_dict[int(crop_num)] = OrderedDict(
+            (field, values[crop_mask])
+            for field, values in column_dict.items()
+            if field != crop_num_field)
+    return crop_dict
@@ -0,0 +1,200 @@
+import io
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+# Number of bytes that are searched for line endings at a time
+block_size = 2 ** 26
+
+# Station indices of the consolidated input files by file path
+index_cache = {}
+
+
+def station_path(params, refet_id):
+    """File path of the RefET or weather data of a station
+
+    If the station_field is set in the INI file, the data of all stations
+    is in a single consolidated file and name_format is the file name.
+
+    Args:
+        params (dict): RefET or weather parameters from the INI file
+        refet_id (str): RefET station ID
+
+    Returns:
+        str
+    """
+    if params.get('station_field'):
+        return os.path.join(params['ws'], params['format'])
+    else:
+        return os.path.join(params['ws'], params['format'] % refet_id)
+
+
+def station_source(file_path, params, refet_id):
+    """File path or buffer that read_station_table() reads for a station
+
+    Args:
+        file_path (str): station or consolidated file path
+        params (dict): RefET or weather parameters from the INI file
+        refet_id (str): RefET station ID
+
+    Returns:
+        the file path or a buffer of the consolidated file header and the
+            lines of the station
+    """
+    if params.get('station_field'):
+        return station_index(file_path, params).read(refet_id)
+    else:
+        return file_path
+
+
+def station_index(file_path, params):
+    """Return the (cached) station index of a consolidated file
+
+    The index is rebuilt if the file size or modification time changes.
+
+    Args:
+        file_path (str): consolidated file path
+        params (dict): RefET or weather parameters from the INI file
+
+    Returns:
+        StationIndex object
+    """
+    file_stat = (os.path.getsize(file_path), os.path.getmtime(file_path))
+    index_key = (file_path, params['station_field'], params['header_lines'])
+    try:
+        cached_stat, index = index_cache[index_key]
+        if cached_stat == file_stat:
+            return index
+    except KeyError:
+        pass
+    index = StationIndex(file_path, params)
+    index_cache[index_key] = (file_stat, index)
+    return index
+
+
+class StationIndex(object):
+    """Byte ranges of the lines of each station in a consolidated file
+
+    The file is read once to find the line offsets and the station IDs.
+    The lines of a station are then read directly from the memory mapped
+    file, so each station is parsed on its own like a separate file.
+    Files sorted by station have a single range per station.
+
+    Attributes:
+        file_path (str): consolidated file path
+        header (bytes): header lines of the file
+        ranges (dict): arrays of the start and end byte of each block of
+            lines by station ID
+        line_counts (dict): number of lines by station ID
+    """
+
+    def __init__(self, file_path, params):
+        """Index the lines of each station
+
+        Args:
+            file_path (str): consolidated file path
+            params (dict): RefET or weather parameters from the INI file
+        """
+        logging.info('  Indexing stations in {}'.format(
+            os.path.basename(file_path)))
+        self.file_path = file_path
+        file_array = np.memmap(file_path, dtype=np.uint8, mode='r')
+
+        # Byte offsets of the start and end of each line
+        line_ends = np.concatenate([
+            np.flatnonzero(file_array[i:i + block_size] == ord('\n')) + i + 1
+            for i in range(0, len(file_array), block_size)] + [[]]).astype(
+                np.int64)
+        if len(file_array) and file_array[-1] != ord('\n'):
+            line_ends = np.append(line_ends, len(file_array))
+        line_starts = np.insert(line_ends[:-1], 0, 0)
+        header_lines = params['header_lines']
+        header_end = line_ends[header_lines - 1] if header_lines else 0
+        self.header = file_array[:header_end].tobytes()
+        line_starts = line_starts[header_lines:]
+        line_ends = line_ends[header_lines:]
+
+        # Blank lines are kept so the values line up with the line offsets
+        skiprows = [i for i in range(header_lines)
+                    if i + 1 != params['names_line']]
+        delimiter = params['delimiter']
+        if delimiter in ['\\t', '\t']:
+            delimiter = '\t'
+        station_pd = pd.read_csv(
+            file_path, engine='c' if len(delimiter) == 1 else 'python',
+            header=params['names_line'] - 1, skiprows=skiprows,
+            sep=delimiter, usecols=[params['station_field']], dtype=str,
+            skip_blank_lines=False)
+        station_array = station_pd[params['station_field']].fillna('').values
+        if len(station_array) != len(line_starts):
+            raise IOError('The station lines could not be indexed')
+        station_codes, station_ids = pd.factorize(
+            pd.Series(station_array).str.strip())
+
+        # Group the blocks of consecutive lines of the same station
+        self.ranges = {}
+        self.line_counts = {}
+        if not len(station_codes):
+            return
+        block_starts = np.insert(
+            np.flatnonzero(np.diff(station_codes)) + 1, 0, 0)
+        block_ends = np.append(block_starts[1:], len(station_codes))
+        block_codes = station_codes[block_starts]
+        block_order = np.argsort(block_codes, kind='mergesort')
+        code_bounds = np.flatnonzero(np.diff(block_codes[block_order])) + 1
+        for block_i in np.split(block_order, code_bounds):
+            if not len(block_i):
+                continue
+            station_id = station_ids[block_codes[block_i[0]]]
+            if not station_id:
+                continue
+            self.ranges[station_id] = (
+                line_starts[block_starts[block_i]],
+                line_ends[block_ends[block_i] - 1])
+            self.line_counts[station_id] = int(
+                (block_ends[block_i] - block_starts[block_i]).sum())
+        if len(block_starts) > 2 * len(self.ranges):
+            logging.warning(
+                '  {} is not sorted by station, reading may be slow'.format(
+                    os.path.basename(file_path)))
+
+    def read(self, refet_id):
+        """Return the header and the lines of a station
+
+        Args:
+            refet_id (str): RefET station ID
+
+        Returns:
+            BytesIO buffer
+        """
+        try:
+            start_array, end_array = self.ranges[refet_id]
+        except KeyError:
+            raise IOError('Station {} is not in {}'.format(
+                refet_id, self.file_path))
+        file_array = np.memmap(self.file_path, dtype=np.uint8, mode='r')
+        chunk_list = [self.header]
+        for start, end in zip(start_array, end_array):
+            chunk_list.append(file_array[start:end].tobytes())
+            # The last line of the file may not end with a newline
+            if not chunk_list[-1].endswith(b'\n'):
+                chunk_list.append(b'\n')
+        return io.BytesIO(b''.join(chunk_list))
+
+    def station_size(self, refet_id):
+        """Return the number of lines and bytes of a station
+
+        Args:
+            refet_id (str): RefET station ID
+
+        Returns:
+            tuple of the number of lines and bytes, zeros if not found
+        """
+        try:
+            start_array, end_array = self.ranges[refet_id]
+        except KeyError:
+            return 0, 0
+        return (self.line_counts[refet_id],
+                int((end_array - start_array).sum()))
@@ -5,6 +5,52 @@ import os
 import numpy as np
 
 
+def snow_depth_from_snow(snow, snow_depth, tmax):
+    """Estimate the depth of snow on the ground with a simple melt rate
+
+    Snow accumulates at half of the snowfall (a settle rate of 2 to 1)
+    and melts at 4 mm/day per degree C of TMax.  The depth is the
+    smaller of the input depth and the accumulated snow.
+
+    The days are on the last axis, so the recurrence can be run for many
+    stations at once with 2D arrays [station, day].  The comparisons
+    match the builtin min() and max() when values are NaN.
+
+    Args:
+        snow (numpy array): daily snowfall [mm]
+        snow_depth (numpy array): daily depth of snow on the ground [mm]
+        tmax (numpy array): daily maximum temperature [C]
+
+    Returns:
+        A NumPy array of the estimated depth of snow on the ground [mm]
+    """
+    snow = np.asarray(snow, dtype=np.float64)
+    snow_depth = np.asarray(snow_depth, dtype=np.float64)
+    tmax = np.asarray(tmax, dtype=np.float64)
+    if snow.ndim == 1:
+        # A scalar loop is faster than NumPy operations for one station
+        depth_list = snow_depth.tolist()
+        snow_accum = 0.
+        for i, (snow_i, tmax_i) in enumerate(zip(snow.tolist(),
+                                                 tmax.tolist())):
+            snow_accum += snow_i * 0.5
+            snow_accum = max(snow_accum - max(4 * tmax_i, 0.0), 0.0)
+            depth_list[i] = min(depth_list[i], snow_accum)
+        return np.array(depth_list)
+
+    depth_array = np.empty(snow.shape)
+    snow_accum = np.zeros(snow.shape[:-1])
+    for i in range(snow.shape[-1]):
+        snow_accum = snow_accum + snow[..., i] * 0.5
+        snow_melt = 4 * tmax[..., i]
+        snow_melt = np.where(0.0 > snow_melt, 0.0, snow_melt)
+        snow_accum = snow_accum - snow_melt
+        snow_accum = np.where(0.0 > snow_accum, 0.0, snow_accum)
+        depth_array[..., i] = np.where(
+            snow_accum < snow_depth[..., i], snow_accum, snow_depth[..., i])
+    return depth_array
+
+
 def es_from_t(t):
     """ Tetens (1930) equation for sat. vap pressure, kPa, (T in C)
 
@@ -48,6 +94,24 @@ def is_winter(et_cell, foo_day):
         return False
 
 
+def winter_mask(et_cell, month):
+    """Determine which days are in a winter month (see is_winter())
+
+    Args:
+        et_cell ():
+        month (numpy array): month of each day
+
+    Returns:
+        A boolean NumPy array that is True for days in a winter month
+    """
+    if et_cell.stn_lat > 0:
+        # Northern hemisphere
+        return (month < 4) | (month > 10)
+    else:
+        # Southern hemisphere
+        return np.zeros(month.shape, dtype=bool)
+
+
 def pair_from_elev(elevation):
     """Calculates air pressure as a function of elevation
 
@@ -0,0 +1,533 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+
+def _max(a, b):
+    """Element-wise version of the builtin max(a, b)"""
+    return np.where(b > a, b, a)
+
+
+def _min(a, b):
+    """Element-wise version of the builtin min(a, b)"""
+    return np.where(b < a, b, a)
+
+
+class WaterBalance(object):
+    """Soil water balance for a set of cell/crop "lanes" advanced together
+
+    Each lane is one crop in one ET cell.  The daily water balance
+    in compute_crop_et.compute_crop_water_balance(), runoff.runoff()
+    and grow_root.grow_root() is applied to all lanes at once with the
+    branches replaced by masked array operations.
+
+    The crop phenology (kcb_daily(), etc.) is not computed here.
+    The daily phenology values (in_season, kc_bas, kc_max, fc, ...)
+    are passed in to step() as arrays with one value per lane.
+
+    All lanes must share the same weather station, since the daily
+    weather values passed to step() are scalars.
+
+    Open water crops (55-57) do not have a water balance
+    and must not be included as lanes.  Crops that fail supported()
+    must be run with crop_cycle.crop_day_loop() instead.
+    """
+
+    @staticmethod
+    def supported(foo):
+        """Check if the water balance of a cell/crop can be computed here
+
+        Only the zr_min > zr_dormant branch of setup_crop() is implemented.
+        The real, manual and special irrigations are not applied since
+        compute_crop_water_balance() always sets them to zero, so crops
+        with a special irrigation wetted fraction (fw_spec) are excluded
+        in case they are ever read in.
+
+        Args:
+            foo (): InitializeCropCycle object after crop_load()
+
+        Returns:
+            bool
+        """
+        # zr_dormant is 0.0 in setup_crop()
+        return foo.zr_min > 0.0 and foo.fw_spec == 0
+
+    def __init__(self, data, lanes):
+        """Initialize the lane arrays from the crop cycle objects
+
+        Args:
+            data (): CropETData
+            lanes (list): (et_cell, crop, foo) tuples
+                foo must already have been set up by crop_load()
+        """
+        if data.refet['type'] == 'eto':
+            self.etr_threshold = 5  # for ETo basis #'added March 26, 2008 RGA
+        elif data.refet['type'] == 'etr':
+            self.etr_threshold = 4  # for ETr basis
+
+        def lane_array(values, dtype=np.float64):
+            return np.array(values, dtype=dtype)
+
+        # Soil and crop parameters (constant for each lane)
+        self.aw = lane_array([foo.aw for c, crop, foo in lanes])
+        self.rew = lane_array([foo.rew for c, crop, foo in lanes])
+        self.tew2 = lane_array([foo.tew2 for c, crop, foo in lanes])
+        self.tew3 = lane_array([foo.tew3 for c, crop, foo in lanes])
+        self.fw_std = lane_array([foo.fw_std for c, crop, foo in lanes])
+        self.irr_min = lane_array([foo.irr_min for c, crop, foo in lanes])
+        self.zr_min = lane_array([foo.zr_min for c, crop, foo in lanes])
+        self.zr_max = lane_array([foo.zr_max for c, crop, foo in lanes])
+        self.irr_flag = lane_array(
+            [foo.irr_flag for c, crop, foo in lanes], dtype=bool)
+        self.invoke_stress = lane_array(
+            [crop.invoke_stress for c, crop, foo in lanes])
+        self.days_after_planting_irrigation = lane_array(
+            [crop.days_after_planting_irrigation for c, crop, foo in lanes])
+
+        # Curve number for the winter cover, applied in setup_dormant()
+        cn2_dormant = []
+        for et_cell, crop, foo in lanes:
+            wscc_params = et_cell.crop_params[
+                crop.winter_surface_cover_class + 43]
+            if et_cell.stn_hydrogroup == 1:
+                cn2_dormant.append(wscc_params.cn_coarse_soil)
+            elif et_cell.stn_hydrogroup == 2:
+                cn2_dormant.append(wscc_params.cn_medium_soil)
+            elif et_cell.stn_hydrogroup == 3:
+                cn2_dormant.append(wscc_params.cn_fine_soil)
+            else:
+                cn2_dormant.append(np.nan)
+        self.cn2_dormant = lane_array(cn2_dormant)
+
+        # Soil water state
+        for name in [
+                'depl_root', 'depl_ze', 'depl_zep', 'depl_surface', 'zr',
+                'aw3', 'cn2', 'tew', 'kr2', 'fw_irr', 'wt_irr',
+                'totwatin_ze', 's', 's1', 's2', 's3', 's4', 'sro',
+                'ppt_inf', 'ppt_inf_prev', 'irr_sim', 'irr_auto',
+                'cum_evap', 'cum_evap_prev', 'dperc', 'niwr',
+                'etc_act', 'etc_pot', 'etc_bas', 'kc_act', 'kc_pot']:
+            setattr(self, name, lane_array(
+                [getattr(foo, name) for c, crop, foo in lanes]))
+        self.stress_event = lane_array(
+            [foo.stress_event for c, crop, foo in lanes], dtype=bool)
+
+    def setup_crop(self, mask):
+        """Soil water part of InitializeCropCycle.setup_crop()
+
+        Args:
+            mask (numpy array): lanes where the crop season is set up
+        """
+        if not np.any(mask):
+            return
+        zr_dormant = 0.0
+
+        tew = np.where(self.tew2 < self.tew3, self.tew3, self.tew2)
+        daw3 = self.aw3 * (self.zr_max - zr_dormant)
+        taw3 = self.aw * (self.zr_max - zr_dormant)
+        daw3 = np.where(daw3 < 0., 0., daw3)
+        taw3 = np.where(taw3 < 0., 0., taw3)
+
+        # Only the zr_min > zr_dormant case is supported,
+        #   the other case divides by zr_dormant
+        depl_root = np.where(
+            self.zr_min > zr_dormant,
+            self.depl_root + (taw3 - daw3) *
+            (self.zr_min - zr_dormant) / (self.zr_max - zr_dormant),
+            self.depl_root)
+        depl_root = np.where(depl_root < 0., 0., depl_root)
+
+        self.tew = np.where(mask, tew, self.tew)
+        self.fw_irr = np.where(mask, self.fw_std, self.fw_irr)
+        self.irr_auto = np.where(mask, 0, self.irr_auto)
+        self.irr_sim = np.where(mask, 0, self.irr_sim)
+        self.depl_root = np.where(mask, depl_root, self.depl_root)
+        self.zr = np.where(mask, self.zr_min, self.zr)
+
+    def setup_dormant(self, mask, fc):
+        """Soil water part of InitializeCropCycle.setup_dormant()
+
+        Args:
+            mask (numpy array): lanes where the dormant season is set up
+            fc (numpy array): fraction of cover set in setup_dormant()
+        """
+        if not np.any(mask):
+            return
+        zr_dormant = 0.1
+        ze = 0.1
+
+        daw3 = self.aw3 * (self.zr_max - self.zr)
+        taw_root = self.aw * self.zr
+        daw_root = _max(taw_root - self.depl_root, 0)
+
+        # zr_dormant is never greater than ze, so only the "corrected"
+        #   equation from setup_dormant() is needed
+        # setup_dormant() fails if zr is not greater than zr_dormant
+        aw_root = daw_root / self.zr
+        totwatinzr_dormant = (
+            (self.totwatin_ze * (1 - (ze - zr_dormant) / ze)) * (1 - fc) +
+            aw_root * zr_dormant * fc)
+        daw_below = np.where(
+            daw_root > totwatinzr_dormant, daw_root - totwatinzr_dormant, 0)
+        aw3 = (daw_below + daw3) / (self.zr_max - zr_dormant)
+        aw3 = np.where(zr_dormant < self.zr, aw3, self.aw3)
+        depl_root = self.aw * zr_dormant - totwatinzr_dormant
+
+        self.cn2 = np.where(
+            mask & ~np.isnan(self.cn2_dormant), self.cn2_dormant, self.cn2)
+        self.aw3 = np.where(mask, aw3, self.aw3)
+        self.depl_root = np.where(mask, depl_root, self.depl_root)
+        self.zr = np.where(mask, zr_dormant, self.zr)
+        self.fw_irr = np.where(mask, self.fw_std, self.fw_irr)
+        self.irr_auto = np.where(mask, 0, self.irr_auto)
+        self.irr_sim = np.where(mask, 0, self.irr_sim)
+
+    def step(self, precip, etref, doy, kc_mult, in_season, kc_bas, kc_max,
+             fc, mad, doy_start_cycle, etref_30, fractime):
+        """Advance the water balance of all lanes by one day
+
+        Args:
+            precip (float): precipitation
+            etref (float): reference ET
+            doy (int): day of year
+            kc_mult (float): Kc multiplier for snow cover
+            in_season (numpy array): in season flags
+            kc_bas (numpy array): basal crop coefficients
+            kc_max (numpy array): maximum crop coefficients
+            fc (numpy array): fractions of ground cover
+            mad (numpy array): management allowable depletions
+            doy_start_cycle (numpy array): season start days of year
+            etref_30 (numpy array): 30 day mean reference ET
+            fractime (numpy array): root growth time fractions
+
+        Returns:
+            None
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._step(precip, etref, doy, kc_mult, in_season, kc_bas,
+                       kc_max, fc, mad, doy_start_cycle, etref_30, fractime)
+
+    def _step(self, precip, etref, doy, kc_mult, in_season, kc_bas, kc_max,
+              fc, mad, doy_start_cycle, etref_30, fractime):
+        """"""
+        # Estimate infiltrating precipitation
+        self.ppt_inf_prev = self.ppt_inf
+        self.ppt_inf = np.zeros(self.ppt_inf.shape)
+        self.sro = np.zeros(self.sro.shape)
+        if precip > 0:
+            # Compute weighted depletion of surface from irr and precip areas
+            self.depl_surface = (
+                self.wt_irr * self.depl_ze +
+                (1 - self.wt_irr) * self.depl_zep)
+            self.runoff(precip)
+            self.ppt_inf = precip - self.sro
+
+        # Update fw of irrigation if an irrigation yesterday
+        # Real, manual and special irrigations are not used
+        self.fw_irr = np.where(self.irr_auto > 0, self.fw_std, self.fw_irr)
+
+        # Find current water in fw_irr portion of ze layer
+        watin_ze = self.tew - self.depl_ze
+        watin_ze = np.where(np.round(watin_ze, 6) <= 0., 0.001, watin_ze)
+        watin_ze = _min(watin_ze, self.tew)
+
+        # Find current water in fwp portion of Ze layer
+        watin_zep = self.tew - self.depl_zep
+        watin_zep = np.where(np.round(watin_zep, 6) <= 0., 0.001, watin_zep)
+        watin_zep = _min(watin_zep, self.tew)
+
+        # Fraction of ground that is both exposed and wet
+        few = 1 - fc
+        # Limit to fraction wetted by irrigation
+        few = _min(_max(few, 0.001), self.fw_irr)
+
+        # Fraction of ground that is exposed and wet by precip beyond irrigation
+        fewp = 1 - fc - few
+        fewp = _max(fewp, 0.001)
+        self.totwatin_ze = (watin_ze * few + watin_zep * fewp) / (few + fewp)
+
+        # Deep percolation from Ze layer (not root zone, only surface soil)
+        irr_wet = self.fw_irr > 0.0001
+        dperc_ze = np.where(
+            irr_wet,
+            self.ppt_inf + self.irr_sim / self.fw_irr - self.depl_ze,
+            self.ppt_inf + self.irr_sim / 1 - self.depl_ze)
+        dperc_ze = _max(dperc_ze, 0)
+
+        # depl_zep from yesterday
+        depl_zep_prev = _max(self.ppt_inf - self.depl_zep, 0)
+
+        # Compute initial balance of Ze layer
+        self.depl_ze = np.where(
+            irr_wet,
+            self.depl_ze - self.ppt_inf - self.irr_sim / self.fw_irr + dperc_ze,
+            self.depl_ze - self.ppt_inf - self.irr_sim / 1 + dperc_ze)
+        self.depl_ze = _min(_max(self.depl_ze, 0), self.tew)
+
+        # Update depletion of few beyond that wetted by irrigation
+        self.depl_zep = self.depl_zep - self.ppt_inf + depl_zep_prev
+        self.depl_zep = _min(_max(self.depl_zep, 0), self.tew)
+
+        # Reducer coefficient for evaporation based on moisture left
+        self.kr2 = np.where(self.tew3 < 0.1, 0.0, self.kr2)
+
+        # Use 30 day ETr, if less than 4 or 5 mm/d to reduce TEW
+        tew2use = self.tew2
+        tew3use = self.tew3
+        rew2use = self.rew
+        etref_30_low = etref_30 < self.etr_threshold
+        etref_30_scale = np.sqrt(etref_30 / self.etr_threshold)
+        tew2use = np.where(etref_30_low, self.tew2 * etref_30_scale, tew2use)
+        tew3use = np.where(etref_30_low, self.tew3 * etref_30_scale, tew3use)
+        rew2use = np.where(
+            etref_30_low & (rew2use > 0.8 * tew2use), 0.8 * tew2use, rew2use)
+
+        kr = self.kr_from_depl(self.depl_ze, tew2use, tew3use, rew2use)
+        krp = self.kr_from_depl(self.depl_zep, tew2use, tew3use, rew2use)
+
+        # Find weighting factor based on water in Ze layer
+        #   in irrig. wetted and precip wetted
+        wt_denom = few * watin_ze + fewp * watin_zep
+        self.wt_irr = np.where(
+            wt_denom > 0.0001, few * watin_ze / wt_denom, few * watin_ze)
+        self.wt_irr = _min(_max(self.wt_irr, 0), 1)
+
+        ke_irr = kr * (kc_max - kc_bas) * self.wt_irr
+        ke_ppt = krp * (kc_max - kc_bas) * (1 - self.wt_irr)
+
+        # Limit to maximum rate per unit surface area
+        ke_irr = _min(_max(ke_irr, 0), few * kc_max)
+        ke_ppt = _min(_max(ke_ppt, 0), fewp * kc_max)
+        ke = ke_irr + ke_ppt
+
+        # Transpiration coefficient for moisture stress
+        taw = self.aw * self.zr
+        taw = _max(taw, 0.001)
+        raw = mad * taw / 100
+        ks = np.where(
+            self.depl_root > raw,
+            _max((taw - self.depl_root) / (taw - raw), 0), 1)
+
+        # Check to see if stress flag is turned off.
+        ks = np.where(self.invoke_stress < 1, 1, ks)
+        stress_lanes = self.invoke_stress == 1
+        self.stress_event = self.stress_event | (
+            stress_lanes & (ks < 0.05) & in_season & (kc_bas > 0.3) &
+            (doy != doy_start_cycle))
+        ks = np.where(stress_lanes & self.stress_event, 0.0, ks)
+
+        ke = ke * kc_mult
+        ke_irr = ke_irr * kc_mult
+        ke_ppt = ke_ppt * kc_mult
+
+        e_irr = ke_irr * etref
+        e_ppt = ke_ppt * etref
+
+        # Transpiration from Ze layer
+        ze = 0.0001
+        self.zr = np.where(self.zr < 0.0001, 0.01, self.zr)
+        kt_prop = (ze / self.zr) ** 0.6
+        kt_prop = _min(kt_prop, 1)
+
+        # For irrigation wetted fraction
+        kt_reducer_denom = _max(1 - self.depl_root / taw, 0.001)
+        kt_reducer = few * (1 - self.depl_ze / tew2use) / kt_reducer_denom
+        kt_prop = kt_prop * kt_reducer
+        kt_prop = _min(kt_prop, 1)
+        te_irr = kc_mult * ks * kc_bas * etref * kt_prop
+
+        # For precip wetted fraction beyond that irrigated
+        kt_reducer = fewp * (1 - self.depl_zep / tew2use) / kt_reducer_denom
+        kt_prop = kt_prop * kt_reducer
+        kt_prop = _min(kt_prop, 1)
+        te_ppt = kc_mult * ks * kc_bas * etref * kt_prop
+
+        # Setup for water balance of evaporation layer
+        depl_ze_prev = self.depl_ze
+        depl_zep_prev = self.depl_zep
+
+        # Finish water balance of Ze evaporation layer
+        self.depl_ze = depl_ze_prev + e_irr / few + te_irr
+        self.depl_ze = np.where(self.depl_ze < 0, 0.0, self.depl_ze)
+        e_factor = self.e_factor(self.depl_ze, depl_ze_prev)
+        depl_ze_over = self.depl_ze > self.tew
+        e_irr = np.where(depl_ze_over, e_irr * e_factor, e_irr)
+        te_irr = np.where(depl_ze_over, te_irr * e_factor, te_irr)
+        self.depl_ze = np.where(
+            depl_ze_over, depl_ze_prev + e_irr / few + te_irr, self.depl_ze)
+
+        self.depl_zep = depl_zep_prev + e_ppt / fewp + te_ppt
+        self.depl_zep = _max(self.depl_zep, 0)
+        e_factor = self.e_factor(self.depl_zep, depl_zep_prev)
+        depl_zep_over = self.depl_zep > self.tew
+        e_ppt = np.where(depl_zep_over, e_ppt * e_factor, e_ppt)
+        te_ppt = np.where(depl_zep_over, te_ppt * e_factor, te_ppt)
+        self.depl_zep = np.where(
+            depl_zep_over, depl_zep_prev + e_ppt / fewp + te_ppt,
+            self.depl_zep)
+
+        # Recomputed these based on corrections above if depl_ze > TEW
+        etref_divisor = etref
+        if etref_divisor < 0.01:
+            etref_divisor = 0.01
+        ke_irr = e_irr / etref_divisor
+        ke_ppt = e_ppt / etref_divisor
+        # limit for when ETref is super small
+        ke_irr = _min(_max(ke_irr, 0), 1.5)
+        ke_ppt = _min(_max(ke_ppt, 0), 1.5)
+        ke = ke_irr + ke_ppt
+
+        self.kc_act = kc_mult * ks * kc_bas + ke
+        self.kc_pot = kc_bas + ke
+        self.etc_act = self.kc_act * etref
+        self.etc_pot = self.kc_pot * etref
+        self.etc_bas = kc_bas * etref
+
+        # Accumulate evaporation following each irrigation event.
+        self.cum_evap_prev = (
+            self.cum_evap_prev + e_irr - (self.ppt_inf - depl_zep_prev))
+        self.cum_evap_prev = _max(self.cum_evap_prev, 0)
+
+        # Depletion of the root zone
+        self.depl_root = self.depl_root + (self.etc_act - self.ppt_inf)
+
+        # Determine if there is a need for an automatic irrigation
+        irr_sim_prev = self.irr_sim
+        doy_to_start_irr = doy_start_cycle + self.days_after_planting_irrigation
+        doy_to_start_irr = np.where(
+            doy_to_start_irr > 365, doy_to_start_irr - 365, doy_to_start_irr)
+        crop_doy = doy - doy_start_cycle + 1
+        crop_doy = np.where(crop_doy < 1, crop_doy + 365, crop_doy)
+        irr_mask = (
+            self.irr_flag & in_season &
+            (crop_doy >= self.days_after_planting_irrigation) &
+            (doy >= doy_to_start_irr) & (self.depl_root > raw) &
+            (kc_bas > 0.22))
+        self.irr_sim = np.where(
+            irr_mask, _max(self.depl_root, self.irr_min), 0.0)
+
+        # Update depletion of the root zone
+        self.depl_root = self.depl_root - self.irr_sim
+
+        # Total irrigation for today
+        self.irr_auto = self.irr_sim
+        irr_today = self.irr_sim > 0
+        self.cum_evap = np.where(irr_today, self.cum_evap_prev, self.cum_evap)
+        self.cum_evap_prev = np.where(irr_today, 0.0, self.cum_evap_prev)
+
+        # Deep percolation from root zone
+        dry = (
+            ((self.irr_sim + irr_sim_prev + self.ppt_inf +
+              self.ppt_inf_prev) <= 0.0001) |
+            (self.zr < 0.2))
+        self.dperc = np.where(
+            dry,
+            np.where(self.depl_root < 0.0, -self.depl_root, 0.0),
+            np.where(self.depl_root < -20, -20.0 - self.depl_root, 0.0))
+
+        # Final update to depl_root (depletion of root zone)
+        self.depl_root = self.depl_root + self.dperc
+
+        # If depl_root > taw, assume it is because we have overshot E+T
+        overshot = (self.invoke_stress > 0.5) & (self.depl_root > taw)
+        self.etc_act = np.where(
+            overshot, _max(self.etc_act - (self.depl_root - taw), 0),
+            self.etc_act)
+        if etref > 0.1:
+            self.kc_act = np.where(
+                overshot, self.etc_act / etref, self.kc_act)
+        self.depl_root = np.where(overshot, taw, self.depl_root)
+
+        # Update average Avail. Water in soil layer below current root depth
+        #   and above maximum root depth.  Add gross deep percolation to it.
+        gross_dperc = self.dperc + 0.1 * self.irr_sim
+        daw3 = self.aw3 * (self.zr_max - self.zr)
+        taw3 = self.aw * (self.zr_max - self.zr)
+        daw3 = _max(daw3, 0)
+        taw3 = _max(taw3, 0)
+        daw3 = daw3 + gross_dperc
+        daw3_over = daw3 > taw3
+        self.dperc = np.where(daw3_over, daw3 - taw3, 0)
+        daw3 = np.where(daw3_over, taw3, daw3)
+        daw3 = _max(daw3, 0)
+        self.aw3 = np.where(
+            self.zr_max > self.zr, daw3 / (self.zr_max - self.zr), 0)
+
+        # Compute NIWR (ET - precip + runoff + deep percolation)
+        # Don't include deep percolation when irrigating
+        self.niwr = np.where(
+            self.irr_sim > 0,
+            self.etc_act - (precip - self.sro),
+            self.etc_act - (precip - self.sro - self.dperc))
+
+        # Get setup for next time step.
+        self.grow_root(in_season, fractime)
+
+    def runoff(self, precip):
+        """Curve number method for computing runoff (see runoff.runoff())"""
+        cn2 = _min(_max(self.cn2, 10), 100)
+        cn1 = cn2 / (2.281 - 0.01281 * cn2)
+        cn3 = cn2 / (0.427 + 0.00573 * cn2)
+
+        awc3 = 0.5 * self.rew
+        awc1 = 0.7 * self.rew + 0.3 * self.tew
+        awc1 = np.where(awc1 <= awc3, awc3 + 0.01, awc1)
+        cn = np.where(
+            self.depl_surface < awc3, cn3,
+            np.where(
+                self.depl_surface > awc1, cn1,
+                ((self.depl_surface - awc3) * cn1 +
+                 (awc1 - self.depl_surface) * cn3) / (awc1 - awc3)))
+        self.s = 250 * (100 / cn - 1)
+
+        # Irrigated lanes use an average of the prior four days
+        ppt_net4 = _max(precip - 0.2 * self.s4, 0)
+        ppt_net3 = _max(precip - 0.2 * self.s3, 0)
+        ppt_net2 = _max(precip - 0.2 * self.s2, 0)
+        ppt_net1 = _max(precip - 0.2 * self.s1, 0)
+        sro_irr = 0.25 * (
+            ppt_net4 ** 2 / (precip + 0.8 * self.s4) +
+            ppt_net3 ** 2 / (precip + 0.8 * self.s3) +
+            ppt_net2 ** 2 / (precip + 0.8 * self.s2) +
+            ppt_net1 ** 2 / (precip + 0.8 * self.s1))
+        ppt_net = _max(precip - 0.2 * self.s, 0)
+        sro = ppt_net * ppt_net / (precip + 0.8 * self.s)
+        self.sro = np.where(self.irr_flag, sro_irr, sro)
+
+        self.s4 = np.where(self.irr_flag, self.s3, self.s4)
+        self.s3 = np.where(self.irr_flag, self.s2, self.s3)
+        self.s2 = np.where(self.irr_flag, self.s1, self.s2)
+        self.s1 = np.where(self.irr_flag, self.s, self.s1)
+
+    def grow_root(self, in_season, fractime):
+        """Determine depth of root zone (see grow_root.grow_root())"""
+        zr_prev = self.zr
+        zr = (
+            (0.5 + 0.5 * np.sin(3.03 * fractime - 1.47)) *
+            (self.zr_max - self.zr_min) + self.zr_min)
+        delta_zr = zr - zr_prev
+        self.depl_root = np.where(
+            in_season & (delta_zr > 0),
+            self.depl_root + delta_zr * (self.aw - self.aw3),
+            self.depl_root)
+        self.zr = np.where(in_season, _max(zr, zr_prev), self.zr)
+
+    def kr_from_depl(self, depl, tew2use, tew3use, rew2use):
+        """Evaporation reducer for a depletion of the evaporation layer"""
+        return np.where(
+            depl <= rew2use, 1,
+            np.where(
+                depl <= tew2use,
+                self.kr2 + (1 - self.kr2) * (tew2use - depl) /
+                (tew2use - rew2use),
+                np.where(
+                    tew3use > tew2use,
+                    self.kr2 * (tew3use - depl) / (tew3use - tew2use),
+                    0.0)))
+
+    def e_factor(self, depl, depl_prev):
+        """Evaporation scaling to keep the depletion within TEW"""
+        potential_e = depl - depl_prev
+        potential_e = np.where(potential_e < 0.0001, 0.0001, potential_e)
+        e_factor = 1 - (depl - self.tew) / potential_e
+        return _min(_max(e_factor, 0), 1)
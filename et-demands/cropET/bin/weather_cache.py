@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+# Number of stations and station/climate combinations that are kept
+# Cells are processed grouped by station, so only the current station
+#   is normally needed and the memory use doesn't grow with the basin size
+station_cache_size = 2
+climate_cache_size = 4
+
+
+class LRUCache(object):
+    """Least recently used cache with a fixed number of items"""
+
+    def __init__(self, size):
+        """ """
+        self.size = size
+        self.items = OrderedDict()
+
+    def get(self, key):
+        """Return the cached value or None if the key is not cached"""
+        try:
+            value = self.items.pop(key)
+        except KeyError:
+            return None
+        self.items[key] = value
+        return value
+
+    def put(self, key, value):
+        """Cache a value, dropping the least recently used items if full"""
+        self.items.pop(key, None)
+        self.items[key] = value
+        while len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        """ """
+        self.items.clear()
+
+
+# Parsed and unit converted RefET and weather data frames by station key
+station_cache = LRUCache(station_cache_size)
+
+# Processed RefET, weather and climate data by climate key
+climate_cache = LRUCache(climate_cache_size)
+
+
+def station_key(et_cell):
+    """Cells with the same key have the same RefET and weather data
+
+    The weather data depends on the station elevation through the
+    air pressure (when Tdew is computed from specific humidity).
+
+    Args:
+        et_cell (): ETCell object
+
+    Returns:
+        tuple
+    """
+    return (et_cell.refet_id, et_cell.stn_elev)
+
+
+def climate_key(et_cell):
+    """Cells with the same key have the same weather and climate data
+
+    The climate data also depends on the aridity rating of the cell.
+
+    Args:
+        et_cell (): ETCell object
+
+    Returns:
+        tuple
+    """
+    return station_key(et_cell) + (et_cell.aridity_rating,)
+
+
+def clear():
+    """Clear the station and climate caches"""
+    station_cache.clear()
+    climate_cache.clear()
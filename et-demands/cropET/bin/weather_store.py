@@ -0,0 +1,337 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+import station_input
+
+# Increment if the stored data changes, so old stores are not used
+store_version = 1
+
+# Station data frames that are stored
+store_frames = ['refet_pd', 'weather_pd']
+
+
+def source_paths(data, et_cell):
+    """RefET and weather file paths of a cell
+
+    Args:
+        data (): CropETData object
+        et_cell (): ETCell object
+
+    Returns:
+        list of file paths
+    """
+    return [station_input.station_path(data.refet, et_cell.refet_id),
+            station_input.station_path(data.weather, et_cell.refet_id)]
+
+
+def source_stats(data, et_cell):
+    """Size and modification time of the RefET and weather files
+
+    Returns:
+        list of [path, size, mtime] lists, None if a file doesn't exist
+    """
+    try:
+        return [[path, os.path.getsize(path), os.path.getmtime(path)]
+                for path in source_paths(data, et_cell)]
+    except OSError:
+        return None
+
+
+def station_settings(data, et_cell):
+    """INI and cell values that the parsed station data depends on
+
+    Args:
+        data (): CropETData object
+        et_cell (): ETCell object
+
+    Returns:
+        dict
+    """
+    ratio_list = None
+    if data.refet_ratios_path and et_cell.refet_id in data.refet_ratios:
+        ratio_list = [float(r) for r in data.refet_ratios[et_cell.refet_id]]
+    return {
+        'version': store_version,
+        'refet_id': et_cell.refet_id,
+        'stn_elev': float(et_cell.stn_elev),
+        'refet': data.refet,
+        'weather': data.weather,
+        'refet_ratios': ratio_list}
+
+
+def settings_name(name, settings):
+    """Add a hash of the settings to a base file name
+
+    The hash allows runs with different INI files to share the store folder.
+
+    Returns:
+        tuple of the file name and the settings as they are read from JSON
+    """
+    settings = json.loads(json.dumps(settings, sort_keys=True, default=str))
+    settings_hash = hashlib.md5(json.dumps(
+        settings, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return name.format(settings_hash), settings
+
+
+def store_name(data, et_cell):
+    """Base file name and settings of the stored station data"""
+    return settings_name(
+        et_cell.refet_id + '_{}', station_settings(data, et_cell))
+
+
+def climate_name(data, et_cell):
+    """Base file name and settings of the stored climate data
+
+    The climate data also depends on the aridity rating of the cell
+    (see weather_cache.climate_key()).
+    """
+    settings = station_settings(data, et_cell)
+    settings['aridity_rating'] = float(et_cell.aridity_rating)
+    return settings_name(et_cell.refet_id + '_{}_climate', settings)
+
+
+def read_header(data, et_cell, base_name, settings):
+    """Read a JSON header and check that the stored data is up to date
+
+    Returns:
+        dict, None if the header doesn't exist or is out of date
+    """
+    header_path = os.path.join(data.weather_store_ws, base_name + '.json')
+    if not os.path.isfile(header_path):
+        return None
+    try:
+        with open(header_path, 'r') as header_f:
+            header = json.load(header_f)
+    except (IOError, ValueError):
+        logging.debug('  Weather store header could not be read')
+        return None
+    if (header.get('settings') != settings or
+            header.get('sources') != source_stats(data, et_cell)):
+        logging.debug('  Weather store is out of date')
+        return None
+    return header
+
+
+def read_records(data, header, frame_name, start_dt=None, end_dt=None):
+    """Read the records of a stored data frame within a date range
+
+    The array is memory mapped, so only the dates and the records in the
+    date range are read from the file.
+
+    Returns:
+        numpy record array, None if the file could not be read
+    """
+    try:
+        record_array = np.load(
+            os.path.join(data.weather_store_ws, header[frame_name]),
+            mmap_mode='r')
+    except (IOError, ValueError, KeyError):
+        logging.debug('  Weather store file could not be read')
+        return None
+    if start_dt is None and end_dt is None:
+        return record_array
+    date_array = record_array[header['index_name']]
+    date_mask = np.ones(len(date_array), dtype=bool)
+    if start_dt is not None:
+        date_mask &= date_array >= np.datetime64(start_dt)
+    if end_dt is not None:
+        date_mask &= date_array <= np.datetime64(end_dt)
+    return record_array[date_mask]
+
+
+def read_station(data, et_cell, start_dt=None, end_dt=None):
+    """Read the stored RefET and weather data frames of a cell
+
+    The store is only used if the station settings and the size and
+    modification time of the source files have not changed.
+    The arrays are memory mapped and copied into the data frames.
+
+    Args:
+        data (): CropETData object
+        et_cell (): ETCell object
+        start_dt (): first date to read, the first stored date if None
+        end_dt (): last date to read, the last stored date if None
+
+    Returns:
+        tuple of the RefET and weather data frames, None if not stored
+    """
+    base_name, settings = store_name(data, et_cell)
+    header = read_header(data, et_cell, base_name, settings)
+    if header is None:
+        return None
+    frame_list = []
+    for frame_name in store_frames:
+        record_array = read_records(
+            data, header, frame_name, start_dt, end_dt)
+        if record_array is None:
+            return None
+        frame_list.append(pd.DataFrame.from_records(
+            record_array, index=header['index_name']))
+    logging.debug('  Using stored RefET and weather data')
+    return tuple(frame_list)
+
+
+def read_climate(data, et_cell, start_dt=None, end_dt=None):
+    """Read the stored weather and climate data of a cell within a date range
+
+    The long term climate arrays and the climate data frame (T30, CGDD and
+    the snow depth) are computed from the full record, so only the dates
+    in the range need to be read when the climate data is stored.
+
+    Args:
+        data (): CropETData object
+        et_cell (): ETCell object
+        start_dt (): first date to read, the first stored date if None
+        end_dt (): last date to read, the last stored date if None
+
+    Returns:
+        tuple of the RefET, weather and climate data frames and the
+            climate array dictionary, None if not stored
+    """
+    base_name, settings = climate_name(data, et_cell)
+    header = read_header(data, et_cell, base_name, settings)
+    if header is None:
+        return None
+    station_data = read_station(data, et_cell, start_dt, end_dt)
+    record_array = read_records(data, header, 'climate_pd', start_dt, end_dt)
+    if station_data is None or record_array is None:
+        return None
+    refet_pd, weather_pd = station_data
+    climate_pd = pd.DataFrame.from_records(
+        record_array, index=header['index_name'])
+
+    # The snow depth of the weather data is computed in process_climate()
+    weather_pd['snow_depth'] = climate_pd.pop('weather_snow_depth').values
+    climate = dict(
+        (str(k), np.array(v, dtype=np.float64))
+        for k, v in header['climate'].items())
+    logging.debug('  Using stored climate data')
+    return refet_pd, weather_pd, climate_pd, climate
+
+
+def replace_file(src_path, dst_path):
+    """Rename a file, replacing the destination file if it exists"""
+    try:
+        os.rename(src_path, dst_path)
+    except OSError:
+        # Windows can't rename onto an existing file
+        os.remove(dst_path)
+        os.rename(src_path, dst_path)
+
+
+def write_header(data, base_name, header):
+    """Write a JSON header after the data files it describes"""
+    temp_ext = '.{}.tmp'.format(os.getpid())
+    header_path = os.path.join(data.weather_store_ws, base_name + '.json')
+    with open(header_path + temp_ext, 'w') as header_f:
+        json.dump(header, header_f, sort_keys=True)
+    replace_file(header_path + temp_ext, header_path)
+
+
+def write_records(data, npy_name, record_array):
+    """Write a record array to the store folder"""
+    temp_ext = '.{}.tmp'.format(os.getpid())
+    npy_path = os.path.join(data.weather_store_ws, npy_name)
+    with open(npy_path + temp_ext, 'wb') as npy_f:
+        np.save(npy_f, record_array)
+    replace_file(npy_path + temp_ext, npy_path)
+
+
+def frame_records(df, index_name='date'):
+    """Convert a numeric data frame to a record array
+
+    Returns:
+        numpy record array, None if a column is not numeric
+    """
+    if (df.index.name != index_name or
+            not all(np.issubdtype(t, np.number) for t in df.dtypes)):
+        return None
+    return np.rec.fromarrays(
+        [df.index.values] + [df[c].values for c in df.columns],
+        names=[str(c) for c in [df.index.name] + list(df.columns)])
+
+
+def write_station(data, et_cell, frame_list):
+    """Write the parsed RefET and weather data frames of a cell
+
+    Each data frame is saved as a NumPy record array (.npy) and the JSON
+    header with the station settings and source file sizes and times is
+    written last.  Stations with non-numeric columns are not stored.
+
+    Args:
+        data (): CropETData object
+        et_cell (): ETCell object
+        frame_list (list): RefET and weather data frames
+
+    Returns:
+        bool
+    """
+    base_name, settings = store_name(data, et_cell)
+    header = {
+        'settings': settings,
+        'sources': source_stats(data, et_cell),
+        'index_name': 'date'}
+    record_list = []
+    for frame_name, df in zip(store_frames, frame_list):
+        record_list.append(frame_records(df, header['index_name']))
+        header[frame_name] = '{}_{}.npy'.format(base_name, frame_name)
+    if header['sources'] is None or any(r is None for r in record_list):
+        logging.debug('  Weather data can not be stored')
+        return False
+
+    # Write to temporary files and rename them, since other processes
+    #   may be reading or writing the same station
+    try:
+        if not os.path.isdir(data.weather_store_ws):
+            os.makedirs(data.weather_store_ws)
+        for frame_name, record_array in zip(store_frames, record_list):
+            write_records(data, header[frame_name], record_array)
+        write_header(data, base_name, header)
+    except (IOError, OSError) as e:
+        logging.warning('  Weather data could not be stored\n  {}'.format(e))
+        return False
+    return True
+
+
+def write_climate(data, et_cell):
+    """Write the climate data of a cell after process_climate()
+
+    The climate data frame is stored for the full record, with the
+    computed snow depth of the weather data as an extra column.
+    The long term climate arrays are stored in the JSON header.
+
+    Args:
+        data (): CropETData object
+        et_cell (): ETCell object
+
+    Returns:
+        bool
+    """
+    base_name, settings = climate_name(data, et_cell)
+    header = {
+        'settings': settings,
+        'sources': source_stats(data, et_cell),
+        'index_name': 'date',
+        'climate_pd': '{}.npy'.format(base_name),
+        'climate': dict(
+            (k, [float(x) for x in v]) for k, v in et_cell.climate.items())}
+    climate_pd = et_cell.climate_pd.copy()
+    climate_pd['weather_snow_depth'] = et_cell.weather_pd['snow_depth']
+    record_array = frame_records(climate_pd, header['index_name'])
+    if header['sources'] is None or record_array is None:
+        logging.debug('  Climate data can not be stored')
+        return False
+    try:
+        if not os.path.isdir(data.weather_store_ws):
+            os.makedirs(data.weather_store_ws)
+        write_records(data, header['climate_pd'], record_array)
+        write_header(data, base_name, header)
+    except (IOError, OSError) as e:
+        logging.warning('  Climate data could not be stored\n  {}'.format(e))
+        return False
+    return True
@@ -0,0 +1,171 @@
+#--------------------------------
+# Name:         check_engines.py
+# Purpose:      Check that the CropET engines write identical output files
+# Python:       2.7
+#--------------------------------
+
+import argparse
+import datetime as dt
+import filecmp
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+try:
+    import ConfigParser as configparser
+except ImportError:
+    import configparser
+
+# Output folder options of the INI file
+output_folders = [
+    'daily_output_folder', 'monthly_output_folder',
+    'annual_output_folder', 'gs_output_folder']
+
+
+def main(ini_path, engine_list, mp_procs=1, keep_flag=False):
+    """Run CropET with each engine and compare the output files
+
+    The output folders of each run are redirected to a temporary folder
+    with a copy of the INI file.  The output files of each engine must be
+    identical to the files of the first engine.
+
+    Args:
+        ini_path (str): file path of the project INI
+        engine_list (list): CropET engine names ('crop', 'cell', 'station')
+        mp_procs (int): number of cores to use for multiprocessing
+        keep_flag (bool): if True, don't remove the temporary folder
+
+    Returns:
+        True if all of the output files are identical
+    """
+    logging.info('\nCheck that the CropET engines write identical output')
+    mod_path = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        os.pardir, 'cropET', 'bin', 'mod_crop_et.py')
+    if not os.path.isfile(ini_path):
+        logging.error('\nERROR: The INI file {} does not exist\n'.format(
+            ini_path))
+        sys.exit()
+    elif not os.path.isfile(mod_path):
+        logging.error('\nERROR: mod_crop_et.py could not be found\n')
+        sys.exit()
+
+    # Raw values are written back unchanged (i.e. the %s of name_format)
+    config = configparser.RawConfigParser()
+    config.read(ini_path)
+
+    temp_ws = tempfile.mkdtemp(prefix='check_engines_')
+    logging.info('  Output Folder: {}'.format(temp_ws))
+    try:
+        for engine in engine_list:
+            logging.warning('\nEngine: {}'.format(engine))
+            engine_ws = os.path.join(temp_ws, engine)
+            for folder_option in output_folders:
+                config.set('CROP_ET', folder_option, os.path.join(
+                    engine_ws, folder_option.replace('_folder', '')))
+            engine_ini = os.path.join(temp_ws, engine + '.ini')
+            with open(engine_ini, 'w') as ini_f:
+                config.write(ini_f)
+            args = [sys.executable, mod_path, '-i', engine_ini,
+                    '--engine', engine]
+            if mp_procs > 1:
+                args.extend(['-mp', str(mp_procs)])
+            if subprocess.call(args, cwd=os.path.dirname(mod_path)):
+                logging.error('\nERROR: The {} engine failed\n'.format(
+                    engine))
+                sys.exit()
+
+        base_ws = os.path.join(temp_ws, engine_list[0])
+        diff_count = 0
+        file_count = 0
+        for engine in engine_list[1:]:
+            engine_ws = os.path.join(temp_ws, engine)
+            for folder_option in output_folders:
+                folder = folder_option.replace('_folder', '')
+                diff_list, count = compare_folders(
+                    os.path.join(base_ws, folder),
+                    os.path.join(engine_ws, folder))
+                file_count += count
+                diff_count += len(diff_list)
+                for name in diff_list:
+                    logging.warning('  {} {} is different'.format(
+                        engine, os.path.join(folder, name)))
+        logging.warning('\n{} files compared, {} different'.format(
+            file_count, diff_count))
+        return diff_count == 0
+    finally:
+        if not keep_flag:
+            shutil.rmtree(temp_ws, ignore_errors=True)
+
+
+def compare_folders(base_ws, test_ws):
+    """Compare the contents of the files in two folders
+
+    Args:
+        base_ws (str): folder of the base files
+        test_ws (str): folder of the test files
+
+    Returns:
+        tuple of the names of the missing or different files
+            and the number of files compared
+    """
+    name_list = sorted(set(
+        os.listdir(base_ws) if os.path.isdir(base_ws) else []) | set(
+        os.listdir(test_ws) if os.path.isdir(test_ws) else []))
+    diff_list = []
+    for name in name_list:
+        base_path = os.path.join(base_ws, name)
+        test_path = os.path.join(test_ws, name)
+        if (not os.path.isfile(base_path) or
+                not os.path.isfile(test_path) or
+                not filecmp.cmp(base_path, test_path, shallow=False)):
+            diff_list.append(name)
+    return diff_list, len(name_list)
+
+
+def parse_args():
+    """"""
+    parser = argparse.ArgumentParser(
+        description='Check CropET Engine Output',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        '-i', '--ini', required=True, metavar='PATH',
+        help='Project input file')
+    parser.add_argument(
+        '-e', '--engines', default='crop,cell,station', type=str,
+        help='Comma separated list of the engines to compare')
+    parser.add_argument(
+        '-mp', '--multiprocessing', default=1, type=int, metavar='N',
+        help='Number of processers to use')
+    parser.add_argument(
+        '--keep', action='store_true', default=False,
+        help='Keep the temporary output folder')
+    parser.add_argument(
+        '--debug', default=logging.INFO, const=logging.DEBUG,
+        help='Debug level logging', action="store_const", dest="loglevel")
+    args = parser.parse_args()
+
+    # Convert INI path to an absolute path if necessary
+    if args.ini and os.path.isfile(os.path.abspath(args.ini)):
+        args.ini = os.path.abspath(args.ini)
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    logging.basicConfig(level=args.loglevel, format='%(message)s')
+    logging.info('\n{0}'.format('#'*80))
+    log_f = '{0:<20s} {1}'
+    logging.info(log_f.format(
+        'Run Time Stamp:', dt.datetime.now().isoformat(' ')))
+    logging.info(log_f.format('Current Directory:', os.getcwd()))
+    logging.info(log_f.format('Script:', os.path.basename(sys.argv[0])))
+
+    if not main(ini_path=args.ini,
+                engine_list=[e.strip() for e in args.engines.split(',')],
+                mp_procs=args.multiprocessing, keep_flag=args.keep):
+        sys.exit(1)
@@ -0,0 +1,167 @@
+#--------------------------------
+# Name:         check_kernels.py
+# Purpose:      Check the CropET lookups and array functions
+# Python:       2.7
+#--------------------------------
+
+import argparse
+import datetime as dt
+import logging
+import os
+import sys
+
+import numpy as np
+
+# The CropET modules are imported from the cropET/bin folder
+bin_ws = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, 'cropET', 'bin')
+sys.path.insert(0, bin_ws)
+import crop_coefficients
+import util
+
+
+def main(static_ws, tolerance=1e-9):
+    """Run all of the checks
+
+    Args:
+        static_ws (str): folder of the static input files
+        tolerance (float): largest allowed absolute difference
+
+    Returns:
+        True if all of the checks pass
+    """
+    logging.info('\nCheck the CropET lookups and array functions')
+    check_list = [
+        check_crop_coefs(
+            os.path.join(static_ws, 'CropCoefs.txt'), tolerance),
+        check_snow_depth(tolerance)]
+    return all(check_list)
+
+
+def check_crop_coefs(crop_coefs_path, tolerance=1e-9):
+    """Compare CropCoeff.interpolate() to the original curve arithmetic
+
+    Before the lookup tables, kcb_daily() interpolated the curves with:
+        i = min(max_lines_in_crop_curve_table - 1, int(x))
+        data[i] + (x - i) * (data[i + 1] - data[i])
+    Each curve is checked at table positions from 0 past the last entry.
+
+    Args:
+        crop_coefs_path (str): file path of the static crop coefficients
+        tolerance (float): largest allowed absolute difference
+
+    Returns:
+        True if all of the values are within the tolerance
+    """
+    logging.info('\nCrop coefficient curves')
+    if not os.path.isfile(crop_coefs_path):
+        logging.error('\nERROR: The crop coefficients file {} does not '
+                      'exist\n'.format(crop_coefs_path))
+        sys.exit()
+    coeffs_dict = crop_coefficients.read_crop_coefs(crop_coefs_path)
+
+    # Set in InitializeCropCycle
+    max_lines_in_crop_curve_table = 34
+    x_list = np.arange(0, 40.001, 0.001).tolist()
+
+    max_diff = 0.
+    for curve_no, coeff_obj in sorted(coeffs_dict.items()):
+        data = coeff_obj.data
+        for x in x_list:
+            i = min(max_lines_in_crop_curve_table - 1, int(x))
+            kc_orig = data[i] + (x - i) * (data[i + 1] - data[i])
+            kc = coeff_obj.interpolate(x, max_lines_in_crop_curve_table - 1)
+            max_diff = max(max_diff, abs(kc - kc_orig))
+    logging.info('  {} curves, {} positions'.format(
+        len(coeffs_dict), len(x_list)))
+    return log_result(max_diff, tolerance)
+
+
+def check_snow_depth(tolerance=1e-9, station_count=20, day_count=3650):
+    """Compare the 2D and 1D versions of util.snow_depth_from_snow()
+
+    The 2D array version for many stations [station, day] must match
+    calling the scalar 1D version for each station separately.
+    Random daily values with some missing (NaN) values are used.
+
+    Args:
+        tolerance (float): largest allowed absolute difference
+        station_count (int): number of stations
+        day_count (int): number of days
+
+    Returns:
+        True if all of the values are within the tolerance
+            and the missing values are the same
+    """
+    logging.info('\nSnow depth')
+    np.random.seed(0)
+    shape = (station_count, day_count)
+    snow = np.where(
+        np.random.random(shape) < 0.2, np.random.gamma(1.0, 10.0, shape), 0.)
+    snow_depth = np.random.uniform(0., 400., shape)
+    tmax = np.random.normal(5., 10., shape)
+    for array in [snow, snow_depth, tmax]:
+        array[np.random.random(shape) < 0.005] = np.nan
+
+    # NaN comparisons are expected with the missing values
+    with np.errstate(invalid='ignore'):
+        depth_2d = util.snow_depth_from_snow(snow, snow_depth, tmax)
+    depth_1d = np.array([
+        util.snow_depth_from_snow(snow[i], snow_depth[i], tmax[i])
+        for i in range(station_count)])
+    logging.info('  {} stations, {} days'.format(station_count, day_count))
+    if not np.array_equal(np.isnan(depth_2d), np.isnan(depth_1d)):
+        logging.warning('  FAILED (missing values are different)')
+        return False
+    finite_mask = np.isfinite(depth_1d)
+    return log_result(
+        np.max(np.abs(depth_2d - depth_1d)[finite_mask]), tolerance)
+
+
+def log_result(max_diff, tolerance):
+    """Log the largest difference of a check and if it passed"""
+    if max_diff <= tolerance:
+        logging.warning('  Passed (max difference {:.3g})'.format(max_diff))
+        return True
+    else:
+        logging.warning('  FAILED (max difference {:.3g})'.format(max_diff))
+        return False
+
+
+def parse_args():
+    """"""
+    parser = argparse.ArgumentParser(
+        description='Check CropET Lookups and Array Functions',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        '--static', metavar='FOLDER',
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), os.pardir, 'static'),
+        help='Static input files folder')
+    parser.add_argument(
+        '--tol', default=1e-9, type=float,
+        help='Largest allowed absolute difference')
+    parser.add_argument(
+        '--debug', default=logging.INFO, const=logging.DEBUG,
+        help='Debug level logging', action="store_const", dest="loglevel")
+    args = parser.parse_args()
+
+    # Convert static folder to an absolute path if necessary
+    if args.static and os.path.isdir(os.path.abspath(args.static)):
+        args.static = os.path.abspath(args.static)
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    logging.basicConfig(level=args.loglevel, format='%(message)s')
+    logging.info('\n{0}'.format('#'*80))
+    log_f = '{0:<20s} {1}'
+    logging.info(log_f.format(
+        'Run Time Stamp:', dt.datetime.now().isoformat(' ')))
+    logging.info(log_f.format('Current Directory:', os.getcwd()))
+    logging.info(log_f.format('Script:', os.path.basename(sys.argv[0])))
+
+    if not main(static_ws=args.static, tolerance=args.tol):
+        sys.exit(1)
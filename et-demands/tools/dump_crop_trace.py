@@ -0,0 +1,138 @@
+#--------------------------------
+# Name:         dump_crop_trace.py
+# Purpose:      Print the daily crop trace for a cell, crop and date range
+# Python:       2.7
+#--------------------------------
+
+import argparse
+import datetime as dt
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import util
+
+
+def main(trace_ws, cell_id, crop_num, start_date=None, end_date=None,
+         field_str='', output_path=None):
+    """Print the daily crop trace saved with the CropET "--trace" argument
+
+    Args:
+        trace_ws (str): folder of the trace files
+        cell_id (str): ET cell ID
+        crop_num (int): crop class number
+        start_date (str): ISO format date string (YYYY-MM-DD)
+        end_date (str): ISO format date string (YYYY-MM-DD)
+        field_str (str): comma separated list of trace fields to print
+        output_path (str): if set, save the trace to this CSV file instead
+
+    Returns:
+        None
+    """
+    logging.info('\nDump ET-Demands crop trace')
+
+    # Trace file names are set in cropET/bin/crop_trace.trace_name()
+    trace_path = os.path.join(
+        trace_ws, '{0}_trace_crop_{1:02d}.npz'.format(cell_id, int(crop_num)))
+    if not os.path.isfile(trace_path):
+        logging.error(
+            '\nERROR: The trace file {} does not exist, exiting'.format(
+                trace_path))
+        sys.exit()
+    logging.debug('  Trace: {}'.format(trace_path))
+
+    trace_npz = np.load(trace_path)
+    field_list = [str(f) for f in trace_npz['fields']]
+    if field_str:
+        user_fields = [f.strip() for f in field_str.split(',') if f.strip()]
+        missing_fields = [f for f in user_fields if f not in field_list]
+        if missing_fields:
+            logging.error(
+                ('\nERROR: The trace fields {} are not in the trace, ' +
+                 'exiting\n  Fields: {}').format(
+                    ', '.join(missing_fields), ', '.join(field_list)))
+            sys.exit()
+        field_list = user_fields
+
+    trace_df = pd.DataFrame(
+        dict((f, trace_npz[f]) for f in field_list),
+        index=pd.to_datetime(trace_npz['date']), columns=field_list)
+    trace_df.index.name = 'Date'
+    if start_date:
+        trace_df = trace_df[trace_df.index >= start_date]
+    if end_date:
+        trace_df = trace_df[trace_df.index <= end_date]
+    if trace_df.empty:
+        logging.error('\nERROR: No trace values in the date range, exiting')
+        sys.exit()
+
+    if output_path:
+        logging.info('  Writing: {}'.format(output_path))
+        trace_df.to_csv(output_path)
+    else:
+        # Print one row per trace field so long traces stay readable
+        with pd.option_context(
+                'display.max_rows', None, 'display.max_columns', None,
+                'display.width', 200):
+            print(trace_df.T if len(trace_df.index) <= 10 else trace_df)
+
+
+def parse_args():
+    """"""
+    parser = argparse.ArgumentParser(
+        description='Dump ET-Demands Crop Trace',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        'workspace', nargs='?', default=os.path.join(os.getcwd(), 'trace'),
+        type=lambda x: util.is_valid_directory(parser, x),
+        help='Trace Folder', metavar='FOLDER')
+    parser.add_argument(
+        '--cell', required=True, type=str,
+        help='ET cell ID')
+    parser.add_argument(
+        '-c', '--crop', required=True, type=int,
+        help='Crop class number')
+    parser.add_argument(
+        '--date', default=None, type=util.valid_date,
+        help='Single date (format YYYY-MM-DD)', metavar='DATE')
+    parser.add_argument(
+        '--start', default=None, type=util.valid_date,
+        help='Start date (format YYYY-MM-DD)', metavar='DATE')
+    parser.add_argument(
+        '--end', default=None, type=util.valid_date,
+        help='End date (format YYYY-MM-DD)', metavar='DATE')
+    parser.add_argument(
+        '-f', '--fields', default='', type=str,
+        help='Comma separated list of trace fields to print')
+    parser.add_argument(
+        '-o', '--output', default=None, metavar='PATH',
+        help='Save the trace to a CSV file instead of printing it')
+    parser.add_argument(
+        '--debug', default=logging.INFO, const=logging.DEBUG,
+        help='Debug level logging', action="store_const", dest="loglevel")
+    args = parser.parse_args()
+
+    # A single date overrides the start and end dates
+    if args.date:
+        args.start = args.date
+        args.end = args.date
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    logging.basicConfig(level=args.loglevel, format='%(message)s')
+    logging.info('\n{0}'.format('#'*80))
+    log_f = '{0:<20s} {1}'
+    logging.info(log_f.format(
+        'Run Time Stamp:', dt.datetime.now().isoformat(' ')))
+    logging.info(log_f.format('Trace Folder:', args.workspace))
+    logging.info(log_f.format('Script:', os.path.basename(sys.argv[0])))
+
+    main(trace_ws=args.workspace, cell_id=args.cell, crop_num=args.crop,
+         start_date=args.start, end_date=args.end, field_str=args.fields,
+         output_path=args.output)
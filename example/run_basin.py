@@ -8,7 +8,7 @@ import sys
 
 
 def main(ini_path, verbose_flag=False, debug_flag=False, vb_flag=False,
-         mp_procs=1):
+         mp_procs=1, engine='crop', trace_flag=False, shared_flag=False):
     """Wrapper for running ET-Demands on a basin
 
     This serves the same purpose as the runBasinLinux.sh script in the
@@ -20,6 +20,9 @@ def main(ini_path, verbose_flag=False, debug_flag=False, vb_flag=False,
         debug_flag (bool): If True, write debug level comments to debug.txt
         vb_flag (bool): If True, mimic calculations in VB version of code
         mp_procs (int): number of cores to use
+        engine (str): crop cycle engine ('crop', 'cell' or 'station')
+        trace_flag (bool): If True, save daily crop traces to the trace folder
+        shared_flag (bool): If True, share the weather data between the cores
 
     Returns:
         None
@@ -53,6 +56,12 @@ def main(ini_path, verbose_flag=False, debug_flag=False, vb_flag=False,
         args_list.append('--vb')
     if mp_procs > 1:
         args_list.extend(['-mp', str(mp_procs)])
+    if engine != 'crop':
+        args_list.extend(['--engine', engine])
+    if trace_flag:
+        args_list.append('--trace')
+    if shared_flag:
+        args_list.append('--shared')
     subprocess.call(args_list)
 
 
@@ -79,6 +88,16 @@ def parse_args():
         '-mp', '--multiprocessing', default=1, type=int,
         metavar='N', nargs='?', const=mp.cpu_count(),
         help='Number of processers to use')
+    parser.add_argument(
+        '--engine', default='crop', choices=['crop', 'cell', 'station'],
+        help=('Run each crop separately, all crops of a cell together, ' +
+              'or each crop for all cells of a station together'))
+    parser.add_argument(
+        '--trace', action='store_true', default=False,
+        help='Save daily crop cycle variables to the trace folder')
+    parser.add_argument(
+        '--shared', action='store_true', default=False,
+        help='Read the weather data once into memory shared by the cores')
     args = parser.parse_args()
 
     # Convert INI path to an absolute path if necessary
@@ -119,4 +138,6 @@ if __name__ == '__main__':
         ini_path = get_ini_path(os.getcwd())
 
     main(ini_path, verbose_flag=args.verbose, debug_flag=args.debug,
-         vb_flag=args.vb, mp_procs=args.multiprocessing)
+         vb_flag=args.vb, mp_procs=args.multiprocessing,
+         engine=args.engine, trace_flag=args.trace,
+         shared_flag=args.shared)